@@ -4,4 +4,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cda_interactive.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up
+from production.collab import collab_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """HTTP goes to Django, WebSockets to the page editing sessions"""
+    if scope['type'] == 'websocket':
+        await collab_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
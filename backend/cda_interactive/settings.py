@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -79,6 +80,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'cda_interactive.wsgi.application'
+ASGI_APPLICATION = 'cda_interactive.asgi.application'
 
 
 # Database
@@ -100,6 +102,43 @@ else:
         }
     }
 
+# Cache
+# API responses are only cached on a backend shared by all the workers: with a
+# per-process one (LocMemCache) the invalidations of one worker would not reach
+# the others (see production.caching). Off by default (DummyCache): set
+# CACHE_BACKEND to a Redis or Memcached backend to enable it, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache with
+# CACHE_LOCATION=redis://host:6379. The database backend
+# (django.core.cache.backends.db.DatabaseCache, after `manage.py
+# createcachetable`) also works but costs several queries per cached write and
+# only pays off on large responses.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.dummy.DummyCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'cda_cache'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 3600)),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('.DatabaseCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 20000))}
+
+# Cache alias used for API responses (see production.caching)
+PRODUCTION_CACHE_ALIAS = 'default'
+
+# Delta sync change log retention (see production.changes): older cursors
+# must resync from scratch. Prune with `python manage.py prune_change_log`
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv('CHANGE_LOG_RETENTION_DAYS', '30'))
+
+# Planning-driven cache warming (see production.warming): look-ahead window and
+# public site URL for `python manage.py warm_caches [--every MINUTES]`
+CACHE_WARMING_HOURS = int(os.getenv('CACHE_WARMING_HOURS', '24'))
+CACHE_WARMING_URL = os.getenv('CACHE_WARMING_URL', '')
+
+# Fan-out of the page editing WebSockets (see production.collab): 'memory'
+# only reaches connections served by the same process; with several workers,
+# use 'postgres' (LISTEN/NOTIFY)
+COLLAB_FANOUT = os.getenv('COLLAB_FANOUT', 'memory')
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
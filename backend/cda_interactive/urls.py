@@ -37,6 +37,12 @@ urlpatterns = [
     path('api/', include('production.urls.sheets')),
     path('api/library/', include('production.urls.library')),
     path('api/', include('production.urls.references')),
+    path('api/cache/', include('production.urls.cache')),
+    path('api/sync/', include('production.urls.sync')),
+    path('api/resolve/', include('production.urls.resolve')),
+    path('api/', include('production.urls.planning')),
+    path('api/hierarchy/', include('production.urls.hierarchy')),
+    path('api/reports/', include('production.urls.reports')),
 ]
 
 # Serve media files in development (must be before catch-all route)
@@ -9,6 +9,7 @@ from .models import (
     Cabine,
     ProductionPlanningLine,
     Sheet,
+    SheetSnapshot,
     PosteVarianteDocumentation,
     SheetPage,
     InteractiveElement,
@@ -19,11 +20,12 @@ from .models import (
     MediaTag,
     MediaLibrary
 )
+from .querysets import media_tags_with_counts
 
 
 @admin.register(Ligne)
 class LigneAdmin(admin.ModelAdmin):
-    list_display = ['internal_id', 'name']
+    list_display = ['internal_id', 'name', 'capacity']
     search_fields = ['internal_id', 'name']
     ordering = ['internal_id']
 
@@ -70,6 +72,7 @@ class CabineAdmin(admin.ModelAdmin):
 @admin.register(ProductionPlanningLine)
 class ProductionPlanningLineAdmin(admin.ModelAdmin):
     list_display = ['cabine', 'ligne', 'ligne_sens', 'entry_date', 'exit_date']
+    list_select_related = ['cabine', 'ligne']
     list_filter = ['ligne', 'ligne_sens', 'entry_date']
     search_fields = ['cabine__internal_id', 'ligne__name']
     date_hierarchy = 'entry_date'
@@ -91,6 +94,22 @@ class SheetAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 
+@admin.register(SheetSnapshot)
+class SheetSnapshotAdmin(admin.ModelAdmin):
+    """Published snapshots are immutable: read-only in the admin"""
+    list_display = ['sheet', 'version', 'content_hash', 'published_by', 'published_at']
+    list_filter = ['published_at', 'published_by']
+    search_fields = ['sheet__name', 'sheet__business_id']
+    readonly_fields = ['sheet', 'version', 'content_hash', 'documents', 'published_by', 'published_at']
+    ordering = ['sheet', '-version']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(MediaTag)
 class MediaTagAdmin(admin.ModelAdmin):
     list_display = ['name', 'get_media_count', 'created_at']
@@ -98,9 +117,13 @@ class MediaTagAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     ordering = ['name']
     
+    def get_queryset(self, request):
+        return media_tags_with_counts(super().get_queryset(request))
+    
     def get_media_count(self, obj):
-        return obj.media_items.count()
+        return obj.media_count
     get_media_count.short_description = 'Media Count'
+    get_media_count.admin_order_field = 'media_count'
 
 
 @admin.register(MediaLibrary)
@@ -0,0 +1,92 @@
+"""
+Page render bundle.
+
+Builds everything the canvas viewer needs to render one page (page header,
+ordered elements, linked references, field values and media) in a fixed
+number of queries, as a flat normalized document:
+
+    {
+        "page": {...},
+        "element_order": [12, 15, 13],
+        "elements": {"12": {...}, ...},
+        "references": {"4": {...}, ...},
+        "media": {"7": {...}, ...}
+    }
+"""
+from django.shortcuts import get_object_or_404
+
+from .models import SheetPage, InteractiveElement, ReferenceValue, MediaLibrary
+from .languages import project_language
+from .serializers import (
+    BundlePageSerializer,
+    BundleElementSerializer,
+    BundleReferenceSerializer,
+    BundleMediaSerializer
+)
+
+
+def _keyed(serialized):
+    """Turn a serialized list into a dict keyed by id"""
+    return {str(item['id']): item for item in serialized}
+
+
+def build_page_bundle(page, context=None):
+    """
+    Build the render bundle for a page.
+
+    `page` can be a SheetPage instance or a page id. Runs 7 queries regardless
+    of the number of elements on the page:
+    page, elements, element field values, references, reference fields,
+    media, media tags.
+
+    When `context['lang']` is set, page and element multilingual fields are
+    projected to that language in the database (see `languages.project_language`);
+    a page instance passed in must then come from a projected queryset.
+    """
+    context = context or {}
+    language = context.get('lang')
+
+    if not isinstance(page, SheetPage):
+        pages = SheetPage.objects.select_related('sheet', 'created_by')
+        if language:
+            pages = project_language(pages, language)
+        page = get_object_or_404(pages, pk=page)
+
+    elements = InteractiveElement.objects.all()
+    if language:
+        elements = project_language(elements, language)
+    elements = list(
+        elements
+        .filter(page=page)
+        .select_related('created_by')
+        .prefetch_related('field_values')
+        .order_by('z_order', 'id')
+    )
+
+    reference_ids = {e.reference_value_id for e in elements if e.reference_value_id}
+    references = list(
+        ReferenceValue.objects
+        .filter(id__in=reference_ids)
+        .select_related('created_by')
+        .prefetch_related('fields')
+    ) if reference_ids else []
+
+    media_ids = set()
+    for element in elements:
+        media_ids.update(fv.value_image_id for fv in element.field_values.all() if fv.value_image_id)
+    for reference in references:
+        media_ids.update(fv.value_image_id for fv in reference.fields.all() if fv.value_image_id)
+    media = list(
+        MediaLibrary.objects
+        .filter(id__in=media_ids)
+        .select_related('created_by')
+        .prefetch_related('tags')
+    ) if media_ids else []
+
+    return {
+        'page': BundlePageSerializer(page, context=context).data,
+        'element_order': [element.id for element in elements],
+        'elements': _keyed(BundleElementSerializer(elements, many=True, context=context).data),
+        'references': _keyed(BundleReferenceSerializer(references, many=True, context=context).data),
+        'media': _keyed(BundleMediaSerializer(media, many=True, context=context).data),
+    }
@@ -0,0 +1,195 @@
+"""
+Versioned server-side response cache for the read endpoints.
+
+A cached response is keyed by resource, request (host + path + query),
+role, language, the validator (ETag) computed for the request by
+`ConditionalGetMixin` and the current version of every dependency it was
+built from (e.g. `sheet:12`, `references`, `media`). Writes never delete entries: the
+signals in `production.signals` bump the versions of what they touched, so
+stale entries are simply never looked up again and expire from the backend.
+
+The backend is the pluggable Django cache configured in `CACHES`
+(`PRODUCTION_CACHE_ALIAS`, default alias by default). It must be shared by
+all the workers: versions bumped in one process have to be seen by the
+others. On a per-process backend (LocMemCache) or the default DummyCache
+nothing is cached, no version is written and every request is built from
+the database. Hit/miss counters are kept in memory by each worker.
+"""
+import hashlib
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.response import Response
+
+VERSION_PREFIX = 'cda:version:'
+RESPONSE_PREFIX = 'cda:response:'
+CACHED_RESOURCES = ['sheets', 'pages', 'elements', 'media', 'references', 'hierarchy', 'resolve', 'planning', 'reports']
+# Headers set by views themselves (e.g. published snapshots) that are replayed on hits
+CACHED_HEADERS = ['ETag', 'Last-Modified', 'Cache-Control', 'X-Sheet-Version']
+
+
+def get_cache():
+    return caches[getattr(settings, 'PRODUCTION_CACHE_ALIAS', 'default')]
+
+
+def is_shared():
+    """Whether the cache backend is shared by the workers (not local to this process nor a dummy)"""
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def invalidate(*dependencies):
+    """Give the dependencies a new version: responses built from them become unreachable"""
+    if dependencies and is_shared():
+        get_cache().set_many({VERSION_PREFIX + dep: uuid.uuid4().hex for dep in dependencies}, timeout=None)
+
+
+def get_versions(dependencies):
+    """Current version of each dependency. Unknown ones get a fresh random version
+    (never a counter restart), so an evicted version can't revive stale entries."""
+    cache = get_cache()
+    keys = [VERSION_PREFIX + dep for dep in dependencies]
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def cached_data(resource, parts, dependencies, build):
+    """
+    Cached result of `build()` for a request described by `parts`, rebuilt
+    once one of the dependencies changed. Returns (data, hit).
+    """
+    if not is_shared():
+        return build(), False
+    parts = list(parts) + [f'{dep}={version}' for dep, version in zip(dependencies, get_versions(dependencies))]
+    key = f"{RESPONSE_PREFIX}{resource}:{hashlib.sha1('|'.join(map(str, parts)).encode('utf-8')).hexdigest()}"
+    cache = get_cache()
+    data = cache.get(key)
+    if data is not None:
+        _count(resource, 'hit')
+        return data, True
+    _count(resource, 'miss')
+    data = build()
+    cache.set(key, data)
+    return data, False
+
+
+# Hit/miss counters of this worker process. Kept in memory: writing them to
+# the cache backend would cost a round trip or two on every request.
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(resource, outcome):
+    with _stats_lock:
+        _stats[resource, outcome] += 1
+
+
+def get_stats():
+    """Hit/miss counters per resource of this worker process"""
+    with _stats_lock:
+        counts = dict(_stats)
+    stats = {}
+    for resource in CACHED_RESOURCES:
+        hits = counts.get((resource, 'hit'), 0)
+        misses = counts.get((resource, 'miss'), 0)
+        total = hits + misses
+        stats[resource] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 3) if total else None,
+        }
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class CachedResponseMixin:
+    """
+    Caches `list` and `retrieve` responses (and actions calling `cached_response`).
+
+    - cache_resource: resource name, list dependency and stats bucket (e.g. 'pages')
+    - cache_sheet_field: detail responses depend on the version of their sheet, 'sheet:<id>',
+      found through this field (e.g. 'page__sheet_id', 'id' for sheets) instead of the whole
+      resource. Writes then bump one key per sheet instead of one per object.
+    - cache_shared_dependencies: shared resources embedded in responses (e.g. 'references', 'media')
+    """
+    cache_resource = None
+    cache_sheet_field = None
+    cache_shared_dependencies = []
+
+    def get_object_sheet_id(self):
+        """Sheet of the object of a detail route (None if it doesn't exist), looked up once per request"""
+        if not hasattr(self, '_object_sheet_id'):
+            try:
+                pk = int(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+            except (KeyError, TypeError, ValueError):
+                pk = None
+            if pk is None or self.cache_sheet_field == 'id':
+                self._object_sheet_id = pk
+            else:
+                objects = self.queryset.model.objects.filter(pk=pk)
+                self._object_sheet_id = objects.values_list(self.cache_sheet_field, flat=True).first()
+        return self._object_sheet_id
+
+    def get_cache_dependencies(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        dependencies = [self.cache_resource]
+        if self.detail and self.cache_sheet_field and lookup_url_kwarg in self.kwargs:
+            sheet_id = self.get_object_sheet_id()
+            if sheet_id is not None:
+                dependencies = [f'sheet:{sheet_id}']
+        return dependencies + list(self.cache_shared_dependencies)
+
+    def get_cache_key(self, request):
+        language = self.get_language() if hasattr(self, 'get_language') else None
+        dependencies = self.get_cache_dependencies()
+        parts = [
+            request.get_host(),
+            request.get_full_path(),
+            getattr(request, 'accepted_media_type', ''),
+            getattr(request.user, 'role', ''),
+            language or '',
+            getattr(self, 'cache_validator', ''),
+        ] + [f'{dep}={version}' for dep, version in zip(dependencies, get_versions(dependencies))]
+        digest = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+        return f'{RESPONSE_PREFIX}{self.cache_resource}:{self.action}:{digest}'
+
+    def cached_response(self, view, request, *args, **kwargs):
+        if request.method != 'GET' or self.cache_resource is None or not is_shared():
+            return view(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            _count(self.cache_resource, 'hit')
+            response = Response(entry['data'])
+            for header, value in entry['headers'].items():
+                response[header] = value
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count(self.cache_resource, 'miss')
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and isinstance(response, Response):
+            headers = {header: response[header] for header in CACHED_HEADERS if response.has_header(header)}
+            cache.set(key, {'data': response.data, 'headers': headers})
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,172 @@
+"""
+Delta sync feed over the change log.
+
+Database triggers log every insert, update and delete of pages, elements and
+instance field values in `change_log` (see `ChangeLogEntry`), tagged with the
+writing transaction id. The feed returns the current state of the rows changed
+after a cursor, and tombstones for the ones that no longer exist.
+
+The cursor is `<txid>-<entry id>`. Entry ids are allocated before commit, so
+a transaction committing late can add entries below ids already read; the
+feed therefore only reads entries of transactions older than the oldest
+transaction still running (snapshot xmin), and orders them by (txid, id).
+Every entry a later read can see sorts after the returned cursor.
+
+The log is pruned after CHANGE_LOG_RETENTION_DAYS (`prune_change_log`, run
+by the `prune_change_log` command). The last pruned entry is kept as a
+'prune' marker: cursors before it are expired (`CursorExpired`), and their
+clients have to reload everything and start again from a new cursor.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Value
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .languages import project_language
+from .models import ChangeLogEntry, SheetPage, InteractiveElement, FieldDefinitionValue
+from .pagination import KeysetAfter
+from .querysets import pages_with_counts, prefetch_tags_with_counts
+from .serializers import SheetPageListSerializer, InteractiveElementListSerializer, SyncFieldValueSerializer
+
+CURSOR_RE = re.compile(r'^(\d+)-(\d+)$')
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 5000
+
+# Feed key of each logged model
+FEED_KEYS = {'page': 'pages', 'element': 'elements', 'field_value': 'field_values'}
+
+
+class CursorExpired(Exception):
+    """The changes after the cursor were pruned: the client has to resync from scratch"""
+
+
+def encode_cursor(txid, entry_id):
+    return f'{txid}-{entry_id}'
+
+
+def decode_cursor(value):
+    match = CURSOR_RE.match(value or '')
+    if not match:
+        raise ValidationError({'since': 'Invalid cursor'})
+    return int(match.group(1)), int(match.group(2))
+
+
+def _visible_txid_limit():
+    """Transactions below this id are all finished: their entries can't change anymore"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+def current_cursor():
+    """Cursor of the latest readable entry, to start following changes from now"""
+    entry = (
+        ChangeLogEntry.objects.filter(txid__lt=_visible_txid_limit())
+        .order_by('-txid', '-id')
+        .values_list('txid', 'id')
+        .first()
+    )
+    return encode_cursor(*entry) if entry else encode_cursor(0, 0)
+
+
+def prune_change_log(days=None):
+    """
+    Delete the entries older than `days` (CHANGE_LOG_RETENTION_DAYS by
+    default) of finished transactions, keeping the last one as the 'prune'
+    marker. Returns the number of deleted entries.
+    """
+    days = settings.CHANGE_LOG_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    with transaction.atomic():
+        boundary = (
+            ChangeLogEntry.objects.filter(txid__lt=_visible_txid_limit(), changed_at__lt=cutoff)
+            .order_by('-txid', '-id')
+            .values_list('txid', 'id')
+            .first()
+        )
+        if boundary is None:
+            return 0
+        # Everything before the boundary in cursor order, the previous marker included
+        deleted, _ = ChangeLogEntry.objects.filter(
+            KeysetAfter(['txid', 'id'], [Value(boundary[0]), Value(boundary[1])], descending=True)
+        ).delete()
+        ChangeLogEntry.objects.filter(id=boundary[1]).update(action='prune')
+    return deleted
+
+
+def _check_not_expired(txid, entry_id):
+    marker = ChangeLogEntry.objects.filter(action='prune').values_list('txid', 'id').first()
+    if marker is not None and (txid, entry_id) < marker:
+        raise CursorExpired()
+
+
+def _changed_pages(ids, sheet_id, context):
+    pages = pages_with_counts(SheetPage.objects.filter(id__in=ids).select_related('sheet', 'created_by'))
+    if sheet_id:
+        pages = pages.filter(sheet_id=sheet_id)
+    if context.get('lang'):
+        pages = project_language(pages, context['lang'])
+    return SheetPageListSerializer(pages, many=True, context=context).data
+
+
+def _changed_elements(ids, sheet_id, context):
+    elements = InteractiveElement.objects.filter(id__in=ids).select_related('page__sheet', 'created_by')
+    if sheet_id:
+        elements = elements.filter(page__sheet_id=sheet_id)
+    if context.get('lang'):
+        elements = project_language(elements, context['lang'])
+    return InteractiveElementListSerializer(elements, many=True, context=context).data
+
+
+def _changed_field_values(ids, sheet_id, context):
+    field_values = FieldDefinitionValue.objects.filter(
+        id__in=ids, interactive_element__isnull=False
+    ).select_related('value_image__created_by').prefetch_related(prefetch_tags_with_counts('value_image__tags'))
+    if sheet_id:
+        field_values = field_values.filter(interactive_element__page__sheet_id=sheet_id)
+    return SyncFieldValueSerializer(field_values, many=True, context=context).data
+
+
+def get_changes(since, sheet_id=None, limit=DEFAULT_LIMIT, context=None):
+    """
+    Changes after the `since` cursor, optionally restricted to one sheet.
+
+    Returns the next cursor, whether more changes are pending, the current
+    state of the changed rows and the ids of the deleted ones. Rows changed
+    several times are returned once. Raises CursorExpired when the log was
+    pruned past the cursor.
+    """
+    context = context or {}
+    txid, entry_id = decode_cursor(since)
+    _check_not_expired(txid, entry_id)
+
+    entries = ChangeLogEntry.objects.filter(txid__lt=_visible_txid_limit()).filter(
+        KeysetAfter(['txid', 'id'], [Value(txid), Value(entry_id)])
+    )
+    if sheet_id:
+        entries = entries.filter(sheet_id=sheet_id)
+    rows = list(entries.order_by('txid', 'id').values_list('txid', 'id', 'model', 'object_id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed = {model: set() for model in FEED_KEYS}
+    for _, _, model, object_id in rows:
+        changed[model].add(object_id)
+
+    result = {
+        'cursor': encode_cursor(*rows[-1][:2]) if rows else since,
+        'has_more': has_more,
+        'pages': _changed_pages(changed['page'], sheet_id, context) if changed['page'] else [],
+        'elements': _changed_elements(changed['element'], sheet_id, context) if changed['element'] else [],
+        'field_values': _changed_field_values(changed['field_value'], sheet_id, context) if changed['field_value'] else [],
+    }
+    # Changed rows that are gone (or no longer in the sheet) are tombstones
+    result['deleted'] = {
+        key: sorted(changed[model] - {row['id'] for row in result[key]})
+        for model, key in FEED_KEYS.items()
+    }
+    return result
@@ -0,0 +1,141 @@
+"""
+Deep copy of a sheet.
+
+Sheets for a new variante are usually near-identical to an existing one.
+`clone_sheet` copies a sheet with its pages, elements (image elements with
+their image row) and their instance field values (and optionally its
+documentation links) level by level with
+`INSERT ... SELECT` statements: the ids of the copies are allocated upfront
+from the table sequences and each level joins on the old id -> new id mapping
+of its parent, so rows (and their JSON) never leave the database and the
+number of queries doesn't depend on the size of the sheet.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .caching import invalidate
+from .models import (
+    Sheet, SheetPage, InteractiveElement, ImageElement, FieldDefinitionValue, PosteVarianteDocumentation
+)
+
+PAGE_COLUMNS = ['number', 'description']
+ELEMENT_COLUMNS = ['business_id', 'type', 'z_order', 'descriptions', 'konva_jsons', 'reference_value_id']
+IMAGE_ELEMENT_COLUMNS = ['url', 'width', 'height']
+FIELD_VALUE_COLUMNS = ['name', 'type', 'language', 'value_string', 'value_int', 'value_float', 'value_image_id']
+
+
+def _allocate_ids(cursor, model, count):
+    """Reserve `count` ids from the primary key sequence of a model's table"""
+    if not count:
+        return []
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+        [model._meta.db_table, count]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _copy_rows(cursor, model, columns, source_ids, new_ids, parent_column, parent_map, extra=None):
+    """
+    Copy the rows of `model` with ids `source_ids` as `new_ids`, pointing
+    `parent_column` to the new parent through `parent_map` ({old id: new id}),
+    and setting the `extra` columns to constant values
+    """
+    if not source_ids:
+        return
+    quote = connection.ops.quote_name
+    extra = extra or {}
+    table = quote(model._meta.db_table)
+    targets = ', '.join(quote(column) for column in ['id', parent_column, *columns, *extra])
+    values = ', '.join(['ids.new_id', 'parents.new_id', *[f'source.{quote(column)}' for column in columns], *['%s'] * len(extra)])
+    cursor.execute(
+        f'INSERT INTO {table} ({targets}) SELECT {values} FROM {table} AS source '
+        f'JOIN unnest(%s::bigint[], %s::bigint[]) AS ids(old_id, new_id) ON source.id = ids.old_id '
+        f'JOIN unnest(%s::bigint[], %s::bigint[]) AS parents(old_id, new_id) ON source.{quote(parent_column)} = parents.old_id',
+        [*extra.values(), source_ids, new_ids, list(parent_map), list(parent_map.values())]
+    )
+
+
+def _copy_child_rows(cursor, model, columns, parent_map):
+    """
+    Copy the rows of a multi-table inheritance child `model` (e.g. ImageElement)
+    whose parent rows were copied, keyed by the new parent ids of `parent_map`
+    ({old id: new id})
+    """
+    if not parent_map:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    link = quote(model._meta.pk.column)
+    targets = ', '.join([link, *[quote(column) for column in columns]])
+    values = ', '.join(['ids.new_id', *[f'source.{quote(column)}' for column in columns]])
+    cursor.execute(
+        f'INSERT INTO {table} ({targets}) SELECT {values} FROM {table} AS source '
+        f'JOIN unnest(%s::bigint[], %s::bigint[]) AS ids(old_id, new_id) ON source.{link} = ids.old_id',
+        [list(parent_map), list(parent_map.values())]
+    )
+
+
+def clone_sheet(sheet, name, business_id, user=None, include_documentation=False, variante_gamme=None):
+    """
+    Copy a sheet with its pages, elements and instance field values.
+
+    With include_documentation, its poste/variante documentation links are
+    copied too, pointing to `variante_gamme` when given (which requires
+    include_documentation). Elements keep their business ids, references and
+    image files; published snapshots are not copied.
+    """
+    if variante_gamme is not None and not include_documentation:
+        raise ValueError('variante_gamme only applies with include_documentation')
+    now = timezone.now()
+    created_by_id = user.pk if user is not None else None
+    tracking = {'created_at': now, 'updated_at': now, 'created_by_id': created_by_id}
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        clone = Sheet.objects.create(name=name, business_id=business_id, created_by=user)
+
+        page_ids = list(SheetPage.objects.filter(sheet=sheet).order_by('id').values_list('id', flat=True))
+        new_page_ids = _allocate_ids(cursor, SheetPage, len(page_ids))
+        _copy_rows(cursor, SheetPage, PAGE_COLUMNS, page_ids, new_page_ids, 'sheet_id', {sheet.pk: clone.pk}, tracking)
+
+        element_ids = list(
+            InteractiveElement.objects.filter(page__sheet=sheet).order_by('id').values_list('id', flat=True)
+        )
+        new_element_ids = _allocate_ids(cursor, InteractiveElement, len(element_ids))
+        _copy_rows(
+            cursor, InteractiveElement, ELEMENT_COLUMNS, element_ids, new_element_ids,
+            'page_id', dict(zip(page_ids, new_page_ids)), tracking
+        )
+        element_map = dict(zip(element_ids, new_element_ids))
+        _copy_child_rows(cursor, ImageElement, IMAGE_ELEMENT_COLUMNS, element_map)
+
+        field_value_ids = list(
+            FieldDefinitionValue.objects.filter(interactive_element__page__sheet=sheet)
+            .order_by('id').values_list('id', flat=True)
+        )
+        new_field_value_ids = _allocate_ids(cursor, FieldDefinitionValue, len(field_value_ids))
+        _copy_rows(
+            cursor, FieldDefinitionValue, FIELD_VALUE_COLUMNS, field_value_ids, new_field_value_ids,
+            'interactive_element_id', element_map
+        )
+
+        if include_documentation:
+            links = PosteVarianteDocumentation.objects.filter(sheet=sheet)
+            if variante_gamme is not None:
+                # Links differing only by variante collapse into one
+                links = links.values('poste_id', 'ligne_sens').distinct()
+            else:
+                links = links.values('poste_id', 'ligne_sens', 'varianteGamme_id')
+            PosteVarianteDocumentation.objects.bulk_create([
+                PosteVarianteDocumentation(
+                    sheet=clone,
+                    poste_id=link['poste_id'],
+                    varianteGamme_id=variante_gamme.pk if variante_gamme is not None else link['varianteGamme_id'],
+                    ligne_sens=link['ligne_sens']
+                )
+                for link in links
+            ])
+
+        # Raw and bulk inserts bypass the signals (documentation links feed the coverage report)
+        invalidate('sheets', 'pages', 'elements', *(['documentation'] if include_documentation else []))
+    return clone
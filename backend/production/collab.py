@@ -0,0 +1,382 @@
+"""
+Collaborative editing of a page over WebSocket.
+
+Editors of a page connect to `/ws/pages/<page id>/` (routed by
+`cda_interactive.asgi`, authenticated with the JWT of the `bearertoken` cookie
+or a `token` query parameter). EDITOR and ADMIN users send batched element
+diffs, applied in one transaction with `sync_page_elements`; every other
+connection of the page then receives the resulting element states and the
+deleted business ids. Readers only receive.
+
+Messages are JSON objects with a `type`:
+
+- client -> server: `diff` {id, upsert: [element items as accepted by the bulk
+  sync endpoint, `type` only needed for new elements], delete: [business ids]}
+  and `ping`
+- server -> client: `welcome` {connection}, `ack` {id, created, updated,
+  unchanged, deleted}, `error` {id, error}, `diff` {origin, user, elements,
+  deleted}, `joined` / `left` {connection, user} and `pong`
+
+Events go through a hub: in process by default, or through Postgres
+LISTEN/NOTIFY with `COLLAB_FANOUT = 'postgres'` so that connections served by
+different workers see each other without another broker. Events only carry
+business ids; each process loads the element states once for all its
+connections of the page.
+"""
+import asyncio
+import json
+import logging
+import re
+import uuid
+from collections import defaultdict
+from urllib.parse import parse_qs, urlsplit
+
+import psycopg2
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, close_old_connections, connections
+from django.http.cookie import parse_cookie
+from django.http.request import split_domain_port, validate_host
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .element_sync import sync_page_elements
+from .models import SheetPage, InteractiveElement
+from .serializers import ElementSyncSerializer, InteractiveElementListSerializer
+
+logger = logging.getLogger(__name__)
+
+PATH_RE = re.compile(r'^/ws/pages/(?P<page_id>\d+)/$')
+NOTIFY_CHANNEL = 'cda_collab'
+# NOTIFY payloads are limited to 8000 bytes: diffs are split in chunks of ids
+NOTIFY_CHUNK = 50
+MAX_BATCH = 500
+# Backoff of the Postgres listener reconnections, in seconds
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 30
+
+# Close codes (4000-4999 are free for applications)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+CLOSE_NOT_FOUND = 4404
+
+
+def database_sync_to_async(func):
+    """Run a database function in the sync thread, dropping stale connections like a request would"""
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper)
+
+
+@database_sync_to_async
+def authenticate(scope):
+    """User of the JWT given in the query string or the bearertoken cookie, or None"""
+    headers = dict(scope.get('headers', []))
+    raw_token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+    if raw_token is None:
+        raw_token = parse_cookie(headers.get(b'cookie', b'').decode('latin-1')).get('bearertoken')
+    if not raw_token:
+        return None
+    authentication = JWTAuthentication()
+    try:
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return user if user.is_active else None
+
+
+def origin_allowed(scope):
+    """Browsers always send an Origin: only accept allowed hosts, like CSRF protection would"""
+    origin = dict(scope.get('headers', [])).get(b'origin')
+    if origin is None:
+        return True
+    host, _ = split_domain_port(urlsplit(origin.decode('latin-1')).netloc)
+    return bool(host) and validate_host(host, settings.ALLOWED_HOSTS)
+
+
+def can_edit(user):
+    return user.role in ('EDITOR', 'ADMIN')
+
+
+@database_sync_to_async
+def get_page(page_id):
+    return SheetPage.objects.filter(pk=page_id).first()
+
+
+@database_sync_to_async
+def apply_diff(page, user, upsert, delete):
+    """Validate and apply a diff; returns (result, None) or (None, error)"""
+    serializer = ElementSyncSerializer(data={'elements': upsert, 'deleted': delete, 'replace': False})
+    if not serializer.is_valid():
+        return None, serializer.errors
+    try:
+        result = sync_page_elements(
+            page,
+            serializer.validated_data['elements'],
+            user=user,
+            replace=False,
+            deleted=serializer.validated_data['deleted']
+        )
+    except (ValueError, ObjectDoesNotExist) as e:
+        return None, str(e)
+    except DatabaseError:
+        # e.g. the page was deleted meanwhile: the connection gets an error, not a dead socket
+        logger.exception('Collaboration diff failed on page %s', page.pk)
+        return None, 'The diff could not be applied'
+    return result, None
+
+
+@database_sync_to_async
+def load_elements(page_id, business_ids):
+    elements = InteractiveElement.objects.filter(
+        page_id=page_id, business_id__in=business_ids
+    ).select_related('page__sheet', 'created_by').order_by('z_order', 'id')
+    return InteractiveElementListSerializer(elements, many=True).data
+
+
+class PageConnection:
+    """One WebSocket connection to a page"""
+
+    def __init__(self, send, page_id, user):
+        self.id = uuid.uuid4().hex
+        self.page_id = page_id
+        self.user = user
+        self._send = send
+
+    async def send_json(self, data):
+        await self._send({'type': 'websocket.send', 'text': json.dumps(data, cls=DjangoJSONEncoder)})
+
+
+class LocalHub:
+    """Delivers events to the connections of this process"""
+
+    def __init__(self):
+        self.connections = defaultdict(set)
+
+    async def add(self, connection):
+        self.connections[connection.page_id].add(connection)
+
+    async def discard(self, connection):
+        page_connections = self.connections.get(connection.page_id)
+        if page_connections is not None:
+            page_connections.discard(connection)
+            if not page_connections:
+                del self.connections[connection.page_id]
+
+    async def publish(self, event):
+        await self.dispatch(event)
+
+    async def dispatch(self, event):
+        """Send an event to the connections of its page, except the one it comes from"""
+        recipients = [
+            connection for connection in self.connections.get(event['page'], ())
+            if connection.id != event['origin']
+        ]
+        if not recipients:
+            return
+        message = await self.render(event)
+        await asyncio.gather(*[connection.send_json(message) for connection in recipients], return_exceptions=True)
+
+    async def render(self, event):
+        message = {key: value for key, value in event.items() if key not in ('page', 'upserted')}
+        if event['type'] == 'diff':
+            message['elements'] = await load_elements(event['page'], event['upserted']) if event['upserted'] else []
+        return message
+
+
+class PostgresHub(LocalHub):
+    """
+    Delivers events through Postgres NOTIFY to every process, each listening
+    on a dedicated connection while it has connections. A failed listener is
+    closed and replaced right away, retrying with backoff; events notified
+    in between are not delivered to this process.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+        self.listener_fd = None
+        self.listening = asyncio.Lock()
+        self.reconnecting = None
+
+    async def add(self, connection):
+        await self.listen()
+        await super().add(connection)
+
+    async def discard(self, connection):
+        await super().discard(connection)
+        if not self.connections:
+            if self.reconnecting is not None:
+                self.reconnecting.cancel()
+            self.stop_listening()
+
+    async def listen(self):
+        """Open the listening connection unless it is open"""
+        async with self.listening:
+            if self.listener is None:
+                self.listener = await sync_to_async(self.connect)()
+                self.listener_fd = self.listener.fileno()
+                asyncio.get_running_loop().add_reader(self.listener_fd, self.on_notify)
+
+    def stop_listening(self):
+        if self.listener is None:
+            return
+        asyncio.get_running_loop().remove_reader(self.listener_fd)
+        try:
+            self.listener.close()
+        except psycopg2.Error:
+            pass
+        self.listener = self.listener_fd = None
+
+    async def reconnect(self):
+        """Listen again after a failure while there are connections, with exponential backoff"""
+        delay = RECONNECT_DELAY
+        while self.connections and self.listener is None:
+            try:
+                await self.listen()
+            except psycopg2.Error:
+                logger.warning('Collaboration listener reconnection failed, retrying in %ss', delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    @staticmethod
+    def connect():
+        params = connections['default'].get_connection_params()
+        params.pop('cursor_factory', None)
+        params.pop('context', None)
+        listener = psycopg2.connect(**params)
+        listener.set_session(autocommit=True)
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+        return listener
+
+    def on_notify(self):
+        try:
+            self.listener.poll()
+        except psycopg2.Error:
+            logger.exception('Collaboration listener failed, reconnecting')
+            self.stop_listening()
+            if self.reconnecting is None or self.reconnecting.done():
+                self.reconnecting = asyncio.ensure_future(self.reconnect())
+            return
+        while self.listener.notifies:
+            event = json.loads(self.listener.notifies.pop(0).payload)
+            asyncio.ensure_future(self.dispatch(event))
+
+    async def publish(self, event):
+        chunks = [event]
+        if event['type'] == 'diff':
+            ids = [('upserted', business_id) for business_id in event['upserted']]
+            ids += [('deleted', business_id) for business_id in event['deleted']]
+            chunks = [
+                {**event, **{key: [value for kind, value in ids[i:i + NOTIFY_CHUNK] if kind == key] for key in ('upserted', 'deleted')}}
+                for i in range(0, len(ids), NOTIFY_CHUNK)
+            ]
+        await self.notify([json.dumps(chunk, cls=DjangoJSONEncoder) for chunk in chunks])
+
+    @database_sync_to_async
+    def notify(self, payloads):
+        with connections['default'].cursor() as cursor:
+            for payload in payloads:
+                cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, payload])
+
+
+HUBS = {'memory': LocalHub, 'postgres': PostgresHub}
+_hub = None
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        _hub = HUBS[getattr(settings, 'COLLAB_FANOUT', 'memory')]()
+    return _hub
+
+
+async def handle_message(hub, connection, page, text):
+    try:
+        message = json.loads(text)
+    except (TypeError, ValueError):
+        message = None
+    if not isinstance(message, dict):
+        await connection.send_json({'type': 'error', 'id': None, 'error': 'Messages must be JSON objects'})
+        return
+
+    if message.get('type') == 'ping':
+        await connection.send_json({'type': 'pong'})
+        return
+    if message.get('type') != 'diff':
+        await connection.send_json({'type': 'error', 'id': message.get('id'), 'error': 'Unknown message type'})
+        return
+    if not can_edit(connection.user):
+        await connection.send_json({'type': 'error', 'id': message.get('id'), 'error': 'Only editors can change elements'})
+        return
+
+    upsert, delete = message.get('upsert') or [], message.get('delete') or []
+    if not isinstance(upsert, list) or not isinstance(delete, list) or len(upsert) + len(delete) > MAX_BATCH:
+        await connection.send_json({
+            'type': 'error', 'id': message.get('id'),
+            'error': f'upsert and delete must be lists of at most {MAX_BATCH} items in total'
+        })
+        return
+    result, error = await apply_diff(page, connection.user, upsert, delete)
+    if error is not None:
+        await connection.send_json({'type': 'error', 'id': message.get('id'), 'error': error})
+        return
+    await connection.send_json({'type': 'ack', 'id': message.get('id'), **result})
+
+    if result['created'] or result['updated'] or result['deleted']:
+        await hub.publish({
+            'type': 'diff',
+            'page': page.pk,
+            'origin': connection.id,
+            'user': connection.user.username,
+            'upserted': [item['business_id'] for item in upsert],
+            'deleted': [str(business_id) for business_id in delete],
+        })
+
+
+async def collab_application(scope, receive, send):
+    """ASGI application of the page editing WebSockets"""
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    match = PATH_RE.match(scope['path'])
+    if match is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+    if not origin_allowed(scope):
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+    user = await authenticate(scope)
+    if user is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+    page = await get_page(int(match.group('page_id')))
+    if page is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+
+    await send({'type': 'websocket.accept'})
+    hub = get_hub()
+    connection = PageConnection(send, page.pk, user)
+    await hub.add(connection)
+    await connection.send_json({'type': 'welcome', 'connection': connection.id, 'page': page.pk})
+    presence = {'page': page.pk, 'origin': connection.id, 'connection': connection.id, 'user': user.username}
+    await hub.publish({'type': 'joined', **presence})
+    try:
+        while True:
+            event = await receive()
+            if event['type'] == 'websocket.disconnect':
+                break
+            if event['type'] == 'websocket.receive':
+                await handle_message(hub, connection, page, event.get('text') or event.get('bytes'))
+    finally:
+        await hub.discard(connection)
+        await hub.publish({'type': 'left', **presence})
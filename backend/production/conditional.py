@@ -0,0 +1,124 @@
+"""
+Conditional GET (ETag / Last-Modified) for read endpoints.
+
+Validators are computed with one aggregate query over `updated_at` columns
+(kept current for parents by `production.signals`), and a matching
+If-None-Match / If-Modified-Since is answered with 304 Not Modified before
+the serializer runs.
+"""
+import hashlib
+
+from django.db import connection
+from django.db.models import Count, F, Max
+from django.db.models.functions import Greatest
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Boat, GammeCabine, VarianteGamme, Cabine, Ligne, Poste
+
+HIERARCHY_MODELS = [Boat, GammeCabine, VarianteGamme, Cabine, Ligne, Poste]
+
+
+def make_etag(*parts):
+    """Strong ETag from the given validator parts"""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """304 response when the request's validators match, None otherwise"""
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def hierarchy_validator():
+    """
+    (row count, last modification) over all boat/ligne hierarchy tables, in one query.
+    Any hierarchy change (including deletions) changes it.
+    """
+    parts = ' UNION ALL '.join(
+        f'SELECT MAX(updated_at) AS last_modified, COUNT(*) AS total FROM "{model._meta.db_table}"'
+        for model in HIERARCHY_MODELS
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT SUM(total), MAX(last_modified) FROM ({parts}) AS hierarchy')
+        total, last_modified = cursor.fetchone()
+    return total or 0, last_modified
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / Last-Modified validators to `list` and `retrieve`.
+
+    `last_modified_fields` lists the timestamps the representation depends on
+    (e.g. an element list shows its page number and sheet name). The validator
+    is the latest of them over the requested rows plus the row count, so that
+    deletions are detected too.
+    """
+    last_modified_fields = ['updated_at']
+
+    def get_last_modified_expression(self):
+        fields = [F(name) for name in self.last_modified_fields]
+        return Greatest(*fields) if len(fields) > 1 else fields[0]
+
+    def get_validator(self):
+        """Return (row count, last modified) for the current request, or None to skip"""
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = self.get_queryset().model._default_manager.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        else:
+            queryset = self.filter_queryset(self.get_queryset()).order_by()
+        state = queryset.aggregate(total=Count('pk'), last_modified=Max(self.get_last_modified_expression()))
+        if self.action == 'retrieve' and not state['total']:
+            return None
+        return state['total'], state['last_modified']
+
+    def conditional_response(self, view, request, *args, **kwargs):
+        validator = self.get_validator()
+        if validator is None:
+            return view(request, *args, **kwargs)
+
+        total, last_modified = validator
+        etag = make_etag(
+            request.get_full_path(),
+            getattr(request.user, 'role', ''),
+            total,
+            last_modified.isoformat() if last_modified else ''
+        )
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        # A cached body is only reused for the state it was built from (see CachedResponseMixin)
+        self.cache_validator = etag
+        response = view(request, *args, **kwargs)
+        # Keep validators set by the view itself (e.g. published snapshots)
+        if response.status_code == 200 and not response.has_header('ETag'):
+            set_validators(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class HierarchyConditionalGetMixin(ConditionalGetMixin):
+    """Conditional GET for the boat/ligne hierarchy: any hierarchy change revalidates"""
+
+    def get_validator(self):
+        return hierarchy_validator()
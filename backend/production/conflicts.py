@@ -0,0 +1,195 @@
+"""
+Planning conflict detection.
+
+Two kinds of conflicts make a planning impossible to run:
+
+- overlaps: a cabine planned on two lignes (or twice) at overlapping dates;
+- over capacity: a ligne holding more cabines at once than its `capacity`.
+
+Planning periods are inclusive, like everywhere else in the planning (see
+`planning_during`, `LigneDailyLoad`): a line occupies its ligne from its entry
+day to its exit day, both included. Two lines of a cabine overlap when one
+starts on or before the day the other ends, so a cabine entering a ligne the
+day it leaves another, or planned twice on the same single day, is a
+conflict.
+
+Both checks sort and sweep NumPy arrays loaded with one `values_list` query,
+in O(n log n) instead of comparing lines pairwise:
+
+- overlaps: lines sorted by (cabine, first day); a line conflicts when it
+  starts on or before the furthest last day of the earlier lines of its
+  cabine, a running maximum computed with `maximum.accumulate` (cabines
+  kept apart by offsetting the ends by cabine);
+- capacity: +1 occupancy events on entry days and -1 the day after exits,
+  sorted by (ligne, day), whose running sum is the occupancy of each ligne
+  from each change on (the events of a ligne sum to zero, so one `cumsum`
+  serves all lignes); consecutive days over capacity are merged into
+  periods.
+
+`find_conflicts` runs on every planning import (for the cabines and lignes
+of the file) and backs the conflicts report.
+"""
+import numpy as np
+from django.db.models import Q
+
+from .caching import cached_data
+from .models import Cabine, Ligne, ProductionPlanningLine
+from .planning import PERIODS, EpochDay, planning_during
+
+MAX_CONFLICTS = 1000
+
+
+def _dates(days):
+    return days.astype('datetime64[D]').astype(object).tolist()
+
+
+def find_overlaps(ids, cabines, first, last):
+    """
+    Lines starting on or before the last day of an earlier line of their
+    cabine. Returns (line indexes, other line indexes, overlap first days,
+    overlap last days), the other line being the earlier one ending last.
+    """
+    if len(ids) < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    order = np.lexsort((last, first, cabines))
+    cabine, start, end = cabines[order], first[order], last[order]
+    group = np.concatenate(([0], np.cumsum(cabine[1:] != cabine[:-1])))
+    # Ends offset by cabine so that a running maximum never crosses cabines
+    base, span = start.min(), int(end.max() - start.min()) + 2
+    keys = group * span + (end - base)
+    reach = np.maximum.accumulate(keys)
+    holder = np.maximum.accumulate(np.where(keys == reach, np.arange(len(keys)), 0))
+
+    previous_end = reach[:-1] - group[:-1] * span + base
+    conflicts = np.nonzero((cabine[1:] == cabine[:-1]) & (start[1:] <= previous_end))[0] + 1
+    return (
+        order[conflicts],
+        order[holder[conflicts - 1]],
+        start[conflicts],
+        np.minimum(end[conflicts], previous_end[conflicts - 1]),
+    )
+
+
+def find_over_capacity(lignes, first, last, capacities):
+    """
+    Periods when lignes hold more cabines than their capacity (`capacities`
+    maps ligne ids to capacities, lignes missing from it are unlimited).
+    Returns (lignes, first days, last days, peak cabines).
+    """
+    limited = np.array(sorted(capacities), dtype=np.int64)
+    mask = np.isin(lignes, limited)
+    lignes, first, last = lignes[mask], first[mask], last[mask]
+    if not len(lignes):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+
+    event_lignes = np.concatenate((lignes, lignes))
+    event_days = np.concatenate((first, last + 1))
+    deltas = np.concatenate((np.ones(len(lignes), dtype=np.int64), -np.ones(len(lignes), dtype=np.int64)))
+    order = np.lexsort((event_days, event_lignes))
+    event_lignes, event_days = event_lignes[order], event_days[order]
+    occupancy = np.cumsum(deltas[order])
+
+    # Occupancy from each (ligne, day) with events until the next one
+    changes = np.ones(len(order), dtype=bool)
+    changes[:-1] = (event_lignes[1:] != event_lignes[:-1]) | (event_days[1:] != event_days[:-1])
+    ligne, start, cabines = event_lignes[changes], event_days[changes], occupancy[changes]
+    # The last change of a ligne empties it, so its (meaningless) end is never used
+    end = np.append(start[1:] - 1, start[-1])
+
+    capacity = np.array([capacities[ligne_id] for ligne_id in limited], dtype=np.int64)
+    over = cabines > capacity[np.searchsorted(limited, ligne)]
+    continued = np.zeros(len(over), dtype=bool)
+    continued[1:] = over[:-1] & (ligne[1:] == ligne[:-1])
+    runs = np.nonzero(over & ~continued)[0]
+    if not len(runs):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    over_indexes = np.nonzero(over)[0]
+    run_starts = np.searchsorted(over_indexes, runs)
+    run_ends = np.append(run_starts[1:], len(over_indexes)) - 1
+    return (
+        ligne[runs],
+        start[runs],
+        end[over_indexes[run_ends]],
+        np.maximum.reduceat(cabines[over_indexes], run_starts),
+    )
+
+
+def find_conflicts(kind='actual', start=None, end=None, cabines=None, lignes=None):
+    """
+    Overlaps and capacity violations of the planning lines overlapping
+    [start, end] (all lines by default), on the actual or scheduled dates.
+    `cabines` / `lignes` (ids) limit the overlap check to those cabines and
+    the capacity check to those lignes. Returns {dates, summary, overlaps,
+    over_capacity}, the conflicts columnar and capped at MAX_CONFLICTS.
+    """
+    lines = ProductionPlanningLine.objects.all()
+    if start is not None and end is not None:
+        lines = planning_during(lines, start, end, kind)
+    if cabines is not None or lignes is not None:
+        cabines, lignes = set(cabines or []), set(lignes or [])
+        lines = lines.filter(Q(cabine_id__in=cabines) | Q(ligne_id__in=lignes))
+
+    rows = list(lines.values_list('id', 'cabine_id', 'ligne_id', *(EpochDay(field) for field in PERIODS[kind])))
+    table = np.array(rows, dtype=np.int64).reshape(-1, 5)
+    ids, line_cabines, line_lignes = table[:, 0], table[:, 1], table[:, 2]
+    first, last = np.minimum(table[:, 3], table[:, 4]), np.maximum(table[:, 3], table[:, 4])
+
+    checked = np.ones(len(ids), dtype=bool) if cabines is None else np.isin(line_cabines, list(cabines))
+    checked_ids, checked_cabines = ids[checked], line_cabines[checked]
+    overlaps = find_overlaps(checked_ids, checked_cabines, first[checked], last[checked])
+    line, other, overlap_first, overlap_last = (column[:MAX_CONFLICTS] for column in overlaps)
+
+    capacities = Ligne.objects.filter(capacity__isnull=False)
+    if lignes is not None:
+        capacities = capacities.filter(id__in=lignes)
+    capacities = dict(capacities.values_list('id', 'capacity'))
+    over_capacity = find_over_capacity(line_lignes, first, last, capacities)
+    over_lignes, over_first, over_last, peaks = (column[:MAX_CONFLICTS] for column in over_capacity)
+
+    conflict_cabines = checked_cabines[line].tolist()
+    internal_ids = dict(Cabine.objects.filter(id__in=set(conflict_cabines)).values_list('id', 'internal_id'))
+    checked_lignes = line_lignes[checked]
+    return {
+        'dates': kind,
+        'summary': {
+            'lines': len(ids),
+            'overlaps': len(overlaps[0]),
+            'over_capacity': len(over_capacity[0]),
+        },
+        'overlaps': {
+            'cabine': conflict_cabines,
+            'cabine_internal_id': [internal_ids[cabine_id] for cabine_id in conflict_cabines],
+            'line': checked_ids[line].tolist(),
+            'ligne': checked_lignes[line].tolist(),
+            'other_line': checked_ids[other].tolist(),
+            'other_ligne': checked_lignes[other].tolist(),
+            'start': _dates(overlap_first),
+            'end': _dates(overlap_last),
+        },
+        'over_capacity': {
+            'ligne': over_lignes.tolist(),
+            'capacity': [capacities[ligne_id] for ligne_id in over_lignes.tolist()],
+            'start': _dates(over_first),
+            'end': _dates(over_last),
+            'peak': peaks.tolist(),
+        },
+    }
+
+
+def conflicts_report(kind='actual', start=None, end=None, ligne_id=None):
+    """
+    Cached `find_conflicts` over the whole planning, or for one ligne: its
+    capacity and the overlaps of the cabines planned on it. Returns
+    (report, cache hit).
+    """
+    def build():
+        if ligne_id is None:
+            return find_conflicts(kind, start, end)
+        cabines = ProductionPlanningLine.objects.filter(ligne_id=ligne_id).values_list('cabine_id', flat=True)
+        return find_conflicts(kind, start, end, cabines=list(cabines), lignes=[ligne_id])
+
+    parts = ['conflicts', kind, start, end, ligne_id]
+    return cached_data('reports', parts, ['planning', 'hierarchy'], build)
@@ -0,0 +1,128 @@
+"""
+Documentation coverage report.
+
+Every (poste, variante, sens) combination should have a documentation link
+(`PosteVarianteDocumentation`) to the sheet shown at that poste, a link with
+sens '-' covering both sens. `coverage_report` computes the whole
+poste x variante x sens matrix in the database with one set-based query: a
+cross join of the selected postes, variantes and sens, anti-joined to the
+documentation links through the (variante, poste, sens) index, so that only
+the gaps (or, on request, every cell with its sheet) are returned.
+
+Variantes can be limited to a boat, or to the ones with planning lines in the
+next hours, which are the gaps about to be hit on the shop floor. Cells are
+returned in columnar form (parallel lists) and cached until the hierarchy,
+the documentation links or, for upcoming variantes, the planning change.
+"""
+from django.db import connection
+
+from .caching import cached_data
+from .resolution import ANY_SENS
+from .warming import planning_window
+
+SENS = ['D', 'G']
+STATUSES = ['missing', 'all']
+
+SELECTION_SQL = """
+WITH postes AS (
+    SELECT p.id, p.internal_id, p.ligne_id FROM poste p WHERE true {poste_filter}
+), variantes AS (
+    SELECT v.id, v.internal_id FROM variante_gamme v JOIN gamme_cabine g ON g.id = v.gamme_id WHERE true {variante_filter}
+)
+"""
+COUNTS_SQL = SELECTION_SQL + """
+SELECT (SELECT count(*) FROM postes), (SELECT count(*) FROM variantes)
+"""
+COVERAGE_SQL = SELECTION_SQL + """
+SELECT m.*{sheet_column}
+FROM (
+    SELECT p.id AS poste, p.internal_id AS poste_internal_id, p.ligne_id AS ligne,
+        v.id AS variante, v.internal_id AS variante_internal_id, s.sens AS ligne_sens
+    FROM postes p CROSS JOIN variantes v CROSS JOIN unnest(%(sens)s::varchar[]) AS s (sens)
+) m
+{documentation_join}
+ORDER BY m.ligne, m.poste_internal_id, m.poste, m.variante_internal_id, m.variante, m.ligne_sens
+"""
+# Gaps only: combinations without any link for their sens or for both
+MISSING_JOIN = """
+WHERE NOT EXISTS (
+    SELECT 1 FROM poste_variante_documentation d
+    WHERE d."varianteGamme_id" = m.variante AND d.poste_id = m.poste AND d.ligne_sens IN (m.ligne_sens, %(any)s)
+)
+"""
+# Every cell with the sheet resolution would pick (the exact sens wins over '-')
+ALL_JOIN = """
+LEFT JOIN LATERAL (
+    SELECT sheet_id FROM poste_variante_documentation d
+    WHERE d."varianteGamme_id" = m.variante AND d.poste_id = m.poste AND d.ligne_sens IN (m.ligne_sens, %(any)s)
+    ORDER BY d.ligne_sens = %(any)s, d.id
+    LIMIT 1
+) d ON true
+"""
+# Variantes of the cabines planned in the window (actual or scheduled dates)
+UPCOMING_FILTER = """
+AND v.id IN (
+    SELECT c.variante_gamme_id FROM production_planning_line pl JOIN cabine c ON c.id = pl.cabine_id
+    WHERE (pl.entry_date <= %(until)s AND pl.exit_date >= %(today)s)
+        OR (pl.scheduled_entry_date <= %(until)s AND pl.scheduled_exit_date >= %(today)s)
+)
+"""
+
+CELL_COLUMNS = ['poste', 'poste_internal_id', 'ligne', 'variante', 'variante_internal_id', 'ligne_sens']
+
+
+def build_coverage(status='missing', ligne=None, poste=None, boat=None, sens=None, window=None):
+    """Uncached `coverage_report`, `window` being the (first, last) planning dates"""
+    params = {'sens': [sens] if sens else SENS, 'any': ANY_SENS}
+    poste_filter = variante_filter = ''
+    if ligne is not None:
+        poste_filter += ' AND p.ligne_id = %(ligne)s'
+        params['ligne'] = ligne
+    if poste is not None:
+        poste_filter += ' AND p.id = %(poste)s'
+        params['poste'] = poste
+    if boat is not None:
+        variante_filter += ' AND g.boat_id = %(boat)s'
+        params['boat'] = boat
+    if window is not None:
+        variante_filter += UPCOMING_FILTER
+        params['today'], params['until'] = window
+
+    columns = CELL_COLUMNS + (['sheet'] if status == 'all' else [])
+    with connection.cursor() as cursor:
+        cursor.execute(COUNTS_SQL.format(poste_filter=poste_filter, variante_filter=variante_filter), params)
+        postes, variantes = cursor.fetchone()
+        cursor.execute(COVERAGE_SQL.format(
+            poste_filter=poste_filter,
+            variante_filter=variante_filter,
+            sheet_column=', d.sheet_id' if status == 'all' else '',
+            documentation_join=ALL_JOIN if status == 'all' else MISSING_JOIN,
+        ), params)
+        rows = cursor.fetchall()
+
+    combinations = postes * variantes * len(params['sens'])
+    missing = len(rows) if status == 'missing' else sum(1 for row in rows if row[-1] is None)
+    return {
+        'summary': {
+            'postes': postes,
+            'variantes': variantes,
+            'combinations': combinations,
+            'covered': combinations - missing,
+            'missing': missing,
+        },
+        'cells': {column: [row[index] for row in rows] for index, column in enumerate(columns)},
+    }
+
+
+def coverage_report(status='missing', ligne=None, poste=None, boat=None, sens=None, upcoming_hours=None):
+    """
+    Coverage of the poste x variante x sens matrix, optionally limited to a
+    ligne, a poste, a boat, a sens, or the variantes planned in the next
+    `upcoming_hours` hours. `status` 'missing' returns the uncovered cells,
+    'all' every cell with its sheet (None when uncovered).
+    Returns ({summary, cells}, cache hit).
+    """
+    window = planning_window(upcoming_hours) if upcoming_hours is not None else None
+    dependencies = ['hierarchy', 'documentation'] + (['planning'] if window is not None else [])
+    parts = ['coverage', status, ligne, poste, boat, sens, window]
+    return cached_data('reports', parts, dependencies, lambda: build_coverage(status, ligne, poste, boat, sens, window))
@@ -0,0 +1,161 @@
+"""
+Bulk synchronization of a page's elements.
+
+The canvas editor saves a whole page at once. Instead of one request (and a
+few queries) per element, `sync_page_elements` matches the desired element set
+to the page's elements by business_id and applies the difference in one
+transaction with bulk_create / bulk_update / set-based deletes, field values
+included, so the number of queries doesn't depend on the number of elements.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import invalidate
+from .models import SheetPage, InteractiveElement, ImageElement, FieldDefinitionValue, MediaLibrary
+from .signals import touch_pages
+
+ELEMENT_FIELDS = ['type', 'z_order', 'descriptions', 'konva_jsons', 'reference_value_id']
+BATCH_SIZE = 500
+
+
+def _delete_rows(model, field, ids):
+    """
+    Delete with a single DELETE statement, without loading the rows.
+
+    No cascade is applied: the rows referencing an element (its field values
+    and its ImageElement child row) are deleted before it. The per-row
+    signals are replaced by one touch of the page.
+    """
+    if not ids:
+        return 0
+    queryset = model.objects.filter(**{f'{field}__in': ids})
+    return queryset._raw_delete(queryset.db)
+
+
+def _field_values(element, items, image_ids):
+    """Unsaved field values of an element, dropping unknown images like the element serializer does"""
+    return [
+        FieldDefinitionValue(
+            interactive_element=element,
+            name=item['name'],
+            type=item['type'],
+            language=item.get('language') or None,
+            value_string=item.get('value_string'),
+            value_int=item.get('value_int'),
+            value_float=item.get('value_float'),
+            value_image_id=item.get('value_image') if item.get('value_image') in image_ids else None,
+        )
+        for item in items
+    ]
+
+
+def sync_page_elements(page, elements, user=None, replace=True, deleted=()):
+    """
+    Apply a desired element set (validated `ElementSyncItemSerializer` data) to a page.
+
+    Existing elements only get the attributes present in their item; their
+    field values are replaced when `field_values_data` is given. With replace,
+    elements missing from `elements` are deleted, otherwise only the business
+    ids in `deleted`.
+
+    Returns the number of created, updated, unchanged and deleted elements.
+    Raises ValueError, before writing anything, when an item without `type`
+    doesn't match an existing element.
+    """
+    with transaction.atomic():
+        # Serialize concurrent saves of the same page
+        SheetPage.objects.select_for_update().only('pk').get(pk=page.pk)
+
+        existing = {}
+        duplicate_ids = []
+        for element in InteractiveElement.objects.filter(page=page).order_by('id').only('id', 'business_id', *ELEMENT_FIELDS):
+            if element.business_id in existing:
+                duplicate_ids.append(element.id)
+            else:
+                existing[element.business_id] = element
+
+        image_ids = {
+            item['value_image']
+            for element in elements
+            for item in element.get('field_values_data', [])
+            if item.get('value_image') is not None
+        }
+        if image_ids:
+            image_ids = set(MediaLibrary.objects.filter(id__in=image_ids).values_list('id', flat=True))
+
+        now = timezone.now()
+        next_z_order = max((element.z_order for element in existing.values()), default=-1) + 1
+        to_create, to_update, unchanged = [], [], 0
+        field_values = []  # (element, items)
+        for item in elements:
+            element = existing.get(item['business_id'])
+            if element is None:
+                if 'type' not in item:
+                    raise ValueError(f"type is required to create element {item['business_id']}")
+                element = InteractiveElement(
+                    page=page,
+                    business_id=item['business_id'],
+                    type=item['type'],
+                    z_order=item['z_order'] if 'z_order' in item else next_z_order,
+                    descriptions=item.get('descriptions') or {},
+                    konva_jsons=item.get('konva_jsons') or {},
+                    reference_value_id=item.get('reference_value'),
+                    created_by=user,
+                )
+                if 'z_order' not in item:
+                    next_z_order += 1
+                to_create.append(element)
+            else:
+                changed = 'field_values_data' in item
+                values = {
+                    'type': item.get('type', element.type),
+                    'z_order': item.get('z_order', element.z_order),
+                    'descriptions': item.get('descriptions', element.descriptions),
+                    'konva_jsons': item.get('konva_jsons', element.konva_jsons),
+                    'reference_value_id': item.get('reference_value', element.reference_value_id),
+                }
+                for name, value in values.items():
+                    if getattr(element, name) != value:
+                        setattr(element, name, value)
+                        changed = True
+                if changed:
+                    element.updated_at = now
+                    to_update.append(element)
+                else:
+                    unchanged += 1
+            if 'field_values_data' in item:
+                field_values.append((element, item['field_values_data']))
+
+        desired = {item['business_id'] for item in elements}
+        if replace:
+            delete_ids = [element.id for business_id, element in existing.items() if business_id not in desired]
+            delete_ids += duplicate_ids
+        else:
+            delete_ids = [
+                existing[business_id].id for business_id in set(deleted)
+                if business_id in existing and business_id not in desired
+            ]
+
+        replaced_ids = [element.id for element, _ in field_values if element.pk]
+        _delete_rows(FieldDefinitionValue, 'interactive_element_id', delete_ids + replaced_ids)
+        _delete_rows(ImageElement, 'interactiveelement_ptr_id', delete_ids)
+        _delete_rows(InteractiveElement, 'id', delete_ids)
+
+        InteractiveElement.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        InteractiveElement.objects.bulk_update(to_update, ELEMENT_FIELDS + ['updated_at'], batch_size=BATCH_SIZE)
+        FieldDefinitionValue.objects.bulk_create(
+            [value for element, items in field_values for value in _field_values(element, items, image_ids)],
+            batch_size=BATCH_SIZE
+        )
+
+        if delete_ids or to_create or to_update:
+            # Element detail responses depend on their sheet, bumped with the page
+            invalidate('elements')
+            touch_pages([page.pk])
+
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'unchanged': unchanged,
+        'deleted': len(delete_ids),
+    }
@@ -0,0 +1,44 @@
+"""
+The whole boat and ligne hierarchy as one document.
+
+Filter UIs used to walk the hierarchy level by level (boats, then the gammes
+of a boat, ...), one request per selection. `hierarchy_tree` returns every
+level at once in columnar form, one query per level: for each level, parallel
+lists of ids, internal ids and parent ids (names for boats and lignes), which
+the client indexes by parent. The document only changes with the hierarchy
+rows, so it is cached under the hierarchy validator (see `conditional`), which
+also makes its ETag.
+"""
+from .caching import cached_data
+from .conditional import hierarchy_validator, make_etag
+from .models import Boat, Cabine, GammeCabine, Ligne, Poste, VarianteGamme
+
+# Level name -> (model, columns, ordering)
+LEVELS = {
+    'boats': (Boat, ['id', 'internal_id', 'name'], ['name', 'id']),
+    'gammes': (GammeCabine, ['id', 'internal_id', 'boat'], ['internal_id', 'id']),
+    'variantes': (VarianteGamme, ['id', 'internal_id', 'gamme'], ['internal_id', 'id']),
+    'cabines': (Cabine, ['id', 'internal_id', 'variante_gamme'], ['internal_id', 'id']),
+    'lignes': (Ligne, ['id', 'internal_id', 'name'], ['name', 'id']),
+    'postes': (Poste, ['id', 'internal_id', 'ligne'], ['internal_id', 'id']),
+}
+
+
+def build_hierarchy_tree():
+    tree = {}
+    for level, (model, columns, ordering) in LEVELS.items():
+        rows = list(model.objects.order_by(*ordering).values_list(*columns))
+        tree[level] = {column: [row[index] for row in rows] for index, column in enumerate(columns)}
+    return tree
+
+
+def hierarchy_state():
+    """(ETag, last modification) of the hierarchy, from its validator"""
+    total, last_modified = hierarchy_validator()
+    return make_etag('hierarchy', total, last_modified.isoformat() if last_modified else ''), last_modified
+
+
+def hierarchy_tree(etag):
+    """Return (tree, cache hit) for the hierarchy in state `etag`"""
+    # Keyed by the state too: bulk writes that skip the signals still show
+    return cached_data('hierarchy', ['tree', etag], ['hierarchy'], build_hierarchy_tree)
@@ -0,0 +1,232 @@
+"""
+Bulk import of the production hierarchy.
+
+Onboarding a boat creates its gammes, variantes and cabines (and the lignes and
+postes they go through) by the thousands. The import reads flat records, one
+per path in the hierarchy:
+
+    boat, boat_name, gamme, variante, cabine, ligne, ligne_name, poste
+
+(internal ids; any record may stop at any level, and the ligne/poste columns
+are independent of the boat ones), from CSV or from JSON, either a list of such
+records or the nested form
+
+    {"boats": [{"internal_id", "name", "gammes": [{"internal_id", "variantes":
+        [{"internal_id", "cabines": ["<internal id>", ...]}]}]}],
+     "lignes": [{"internal_id", "name", "postes": ["<internal id>", ...]}]}
+
+Records are streamed into the set of keys of each level, then each level is
+created top-down with one `bulk_create`, parents resolved through the
+{(parent id, internal_id): id} map of the level above. A boat or ligne is
+identified by its internal id, anything below by its internal id within its
+parent, so running an import again creates nothing: existing rows are matched
+(the oldest one when internal ids were already duplicated) and only boat and
+ligne names are updated.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import invalidate
+from .models import Boat, Cabine, GammeCabine, Ligne, Poste, VarianteGamme
+
+COLUMNS = ['boat', 'boat_name', 'gamme', 'variante', 'cabine', 'ligne', 'ligne_name', 'poste']
+# Each column requires the ones before it in its path
+PATHS = [['boat', 'gamme', 'variante', 'cabine'], ['ligne', 'poste']]
+INTERNAL_ID_LENGTH = Boat._meta.get_field('internal_id').max_length
+MAX_ERRORS = 100
+BATCH_SIZE = 2000
+
+
+class HierarchyImportError(ValueError):
+    """The file can't be imported at all (format, missing columns)"""
+
+
+def _csv_records(stream, delimiter=None):
+    header = stream.readline()
+    if delimiter is None:
+        delimiter = max([',', ';', '\t'], key=header.count)
+    names = [name.strip().lower() for name in next(csv.reader([header], delimiter=delimiter), [])]
+    if not set(names) & {'boat', 'ligne'}:
+        raise HierarchyImportError('Expected at least a boat or a ligne column')
+    for row in csv.reader(stream, delimiter=delimiter):
+        yield dict(zip(names, row))
+
+
+def _json_nodes(parent, key, path, leaves=False):
+    """
+    (path, item) of the `key` list of a nested node: objects, or internal ids
+    for the leaves (cabines, postes)
+    """
+    items = parent.get(key, [])
+    if not isinstance(items, list):
+        raise HierarchyImportError(f'{path}{key} must be a list')
+    for index, item in enumerate(items):
+        item_path = f'{path}{key}[{index}]'
+        if leaves and isinstance(item, (dict, list)):
+            raise HierarchyImportError(f'{item_path} must be an internal id')
+        if not leaves and not isinstance(item, dict):
+            raise HierarchyImportError(f'{item_path} must be an object')
+        yield f'{item_path}.', item
+
+
+def _json_records(document):
+    if isinstance(document, list):
+        yield from document
+        return
+    if not isinstance(document, dict):
+        raise HierarchyImportError('Expected a list of records or {"boats": [...], "lignes": [...]}')
+    for boat_path, boat in _json_nodes(document, 'boats', ''):
+        yield {'boat': boat.get('internal_id'), 'boat_name': boat.get('name')}
+        for gamme_path, gamme in _json_nodes(boat, 'gammes', boat_path):
+            yield {'boat': boat.get('internal_id'), 'gamme': gamme.get('internal_id')}
+            for variante_path, variante in _json_nodes(gamme, 'variantes', gamme_path):
+                path = {'boat': boat.get('internal_id'), 'gamme': gamme.get('internal_id'), 'variante': variante.get('internal_id')}
+                yield path
+                for _, cabine in _json_nodes(variante, 'cabines', variante_path, leaves=True):
+                    yield {**path, 'cabine': cabine}
+    for ligne_path, ligne in _json_nodes(document, 'lignes', ''):
+        yield {'ligne': ligne.get('internal_id'), 'ligne_name': ligne.get('name')}
+        for _, poste in _json_nodes(ligne, 'postes', ligne_path, leaves=True):
+            yield {'ligne': ligne.get('internal_id'), 'poste': poste}
+
+
+def _collect(records, errors, counts):
+    """Keys of each level (tuples of internal ids down from the top) and the names given"""
+    keys = {column: set() for path in PATHS for column in path}
+    names = {'boat': {}, 'ligne': {}}
+    for line, record in enumerate(records, 1):
+        if not isinstance(record, dict):
+            raise HierarchyImportError(f'Record {line} is not an object')
+        values = {column: str(record.get(column) or '').strip() for column in COLUMNS}
+        if not any(values.values()):
+            continue
+        counts['records'] += 1
+        record_keys = []
+        try:
+            for column in COLUMNS:
+                if isinstance(record.get(column), (dict, list)):
+                    raise ValueError(f'{column} must be a single value')
+            for path in PATHS:
+                for depth, column in enumerate(path):
+                    if not values[column]:
+                        continue
+                    missing = [parent for parent in path[:depth] if not values[parent]]
+                    if missing:
+                        raise ValueError(f"{column} \"{values[column]}\" without {', '.join(missing)}")
+                    if len(values[column]) > INTERNAL_ID_LENGTH:
+                        raise ValueError(f'{column} "{values[column]}" is longer than {INTERNAL_ID_LENGTH} characters')
+                    record_keys.append((column, tuple(values[parent] for parent in path[:depth + 1])))
+        except ValueError as e:
+            counts['invalid'] += 1
+            if len(errors) < MAX_ERRORS:
+                errors.append({'record': line, 'error': str(e)})
+            continue
+        for column, key in record_keys:
+            keys[column].add(key)
+        for column in names:
+            if values[column] and values[f'{column}_name']:
+                names[column][values[column]] = values[f'{column}_name']
+    return keys, names
+
+
+def _import_level(model, parent_field, keys, parent_ids, report):
+    """
+    Create the missing rows of a level. `keys` are tuples of internal ids whose
+    last item is the row's, `parent_ids` maps the key of the parent (the tuple
+    without that last item) to its id. Returns {key: id} for the level.
+    """
+    parent_column = f'{parent_field}_id' if parent_field else None
+    by_parent = {(parent_ids[key[:-1]] if parent_column else None, key[-1]): key for key in keys}
+
+    existing = model.objects.filter(internal_id__in={key[-1] for key in keys})
+    if parent_column:
+        existing = existing.filter(**{f'{parent_column}__in': set(parent_ids.values())})
+    ids = {}
+    # Oldest row last, so that it wins when internal ids are duplicated
+    for row in existing.order_by('-id').values('id', 'internal_id', *filter(None, [parent_column])).iterator():
+        key = by_parent.get((row.get(parent_column), row['internal_id']))
+        if key is not None:
+            ids[key] = row['id']
+
+    missing = [
+        model(internal_id=internal_id, **({parent_column: parent_id} if parent_column else {}))
+        for (parent_id, internal_id), key in by_parent.items() if key not in ids
+    ]
+    for row in model.objects.bulk_create(missing, batch_size=BATCH_SIZE):
+        ids[by_parent[(getattr(row, parent_column) if parent_column else None, row.internal_id)]] = row.id
+
+    report[model._meta.model_name] = {'created': len(missing), 'existing': len(keys) - len(missing)}
+    return ids
+
+
+def _rename(model, ids, names):
+    """Set the names given for the rows of `ids` (keyed by 1-tuples)"""
+    renamed = [row for row in model.objects.filter(id__in=[ids[(internal_id,)] for internal_id in names])
+               if row.name != names[row.internal_id]]
+    now = timezone.now()
+    for row in renamed:
+        row.name = names[row.internal_id]
+        # bulk_update skips auto_now, which the hierarchy validator relies on
+        row.updated_at = now
+    model.objects.bulk_update(renamed, ['name', 'updated_at'], batch_size=BATCH_SIZE)
+    return len(renamed)
+
+
+def import_hierarchy(stream, file_format='csv', delimiter=None, dry_run=False):
+    """
+    Import a hierarchy file (binary stream): create the boats, gammes,
+    variantes, cabines, lignes and postes it lists that don't exist yet.
+
+    Returns, per level, the counts of created and existing rows, the counts
+    of records read and invalid, of renamed boats and lignes, and the first
+    errors. Raises HierarchyImportError when the file can't be read. With
+    dry_run, nothing is written.
+    """
+    errors = []
+    counts = {'records': 0, 'invalid': 0}
+    try:
+        if file_format == 'csv':
+            records = _csv_records(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''), delimiter)
+        elif file_format == 'json':
+            records = _json_records(json.load(stream))
+        else:
+            raise HierarchyImportError(f'Unsupported format "{file_format}"')
+        keys, names = _collect(records, errors, counts)
+    except UnicodeDecodeError:
+        raise HierarchyImportError('The file is not UTF-8 encoded text')
+    except json.JSONDecodeError as e:
+        raise HierarchyImportError(f'Invalid JSON: {e}')
+
+    # Parents are implied by their children's paths
+    for path in PATHS:
+        for depth in range(len(path) - 1, 0, -1):
+            keys[path[depth - 1]] |= {key[:depth] for key in keys[path[depth]]}
+
+    report = {}
+    with transaction.atomic():
+        boats = _import_level(Boat, None, keys['boat'], {}, report)
+        gammes = _import_level(GammeCabine, 'boat', keys['gamme'], boats, report)
+        variantes = _import_level(VarianteGamme, 'gamme', keys['variante'], gammes, report)
+        _import_level(Cabine, 'variante_gamme', keys['cabine'], variantes, report)
+        lignes = _import_level(Ligne, None, keys['ligne'], {}, report)
+        _import_level(Poste, 'ligne', keys['poste'], lignes, report)
+        renamed = _rename(Boat, boats, names['boat']) + _rename(Ligne, lignes, names['ligne'])
+
+        created = sum(level['created'] for level in report.values())
+        if dry_run:
+            transaction.set_rollback(True)
+        elif created or renamed:
+            # bulk_create and bulk_update don't send the signals
+            invalidate('hierarchy', 'sheets')
+
+    return {
+        **counts,
+        **report,
+        'renamed': renamed,
+        'dry_run': dry_run,
+        'errors': errors,
+    }
@@ -0,0 +1,94 @@
+"""
+Server-side language projection of multilingual JSON fields.
+
+Multilingual fields (`SheetPage.description`, `InteractiveElement.descriptions`,
+`InteractiveElement.konva_jsons`) store every language in one jsonb object.
+Reader stations only need one language, so these helpers pick it inside
+Postgres with jsonb operators, using the same fallback chain as
+`SheetPage.get_description`: requested language, then 'en', then 'fr', then
+the first available language.
+
+Writes can likewise replace a single language in place with `JSONSetKey`.
+"""
+import re
+
+from django.db.models import F, Func, JSONField, Value
+from django.db.models.fields.json import KeyTransform
+from django.db.models.functions import Coalesce, JSONObject
+from rest_framework.exceptions import ValidationError
+
+FALLBACK_LANGUAGES = ['en', 'fr']
+
+# Fields that are projected on each model, with the value used when no language matches
+PROJECTED_FIELDS = {
+    'SheetPage': {'description': ''},
+    'InteractiveElement': {'descriptions': '', 'konva_jsons': None},
+}
+
+LANGUAGE_RE = re.compile(r'^[a-z]{2}$')
+
+
+class JSONFirstValue(Func):
+    """Value of the first key of a jsonb object (NULL for an empty object or any other jsonb value)"""
+    output_field = JSONField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        field, params = compiler.compile(self.get_source_expressions()[0])
+        # jsonb_each raises on strings, arrays and null, which the fields don't forbid
+        sql = f"(SELECT value FROM jsonb_each(CASE WHEN jsonb_typeof({field}) = 'object' THEN {field} END) LIMIT 1)"
+        return sql, [*params, *params]
+
+
+class JSONSetKey(Func):
+    """`jsonb_set` of one top-level key of a jsonb field, keeping the other keys"""
+    output_field = JSONField()
+
+    def __init__(self, field_name, key, value):
+        super().__init__(F(field_name), Value([key]), Value(value, output_field=JSONField()))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        (field, field_params), (path, path_params), (value, value_params) = [
+            compiler.compile(expression) for expression in self.get_source_expressions()
+        ]
+        sql = f"jsonb_set(COALESCE({field}, '{{}}'::jsonb), {path}::text[], {value}, true)"
+        return sql, [*field_params, *path_params, *value_params]
+
+
+def language_value(field_name, language, default=None):
+    """
+    Expression selecting one language of a multilingual jsonb field,
+    with the 'en' -> 'fr' -> first available fallback.
+    """
+    languages = [language] + [lang for lang in FALLBACK_LANGUAGES if lang != language]
+    expressions = [KeyTransform(lang, field_name) for lang in languages]
+    expressions.append(JSONFirstValue(field_name))
+    if default is not None:
+        expressions.append(Value(default, output_field=JSONField()))
+    return Coalesce(*expressions, output_field=JSONField())
+
+
+def project_language(queryset, language):
+    """
+    Defer the multilingual fields of the queryset model and annotate
+    `<field>_lang` with `{language: value}` instead, so the full blobs
+    are never loaded into Python.
+    """
+    fields = PROJECTED_FIELDS.get(queryset.model.__name__, {})
+    if not fields:
+        return queryset
+    annotations = {
+        f'{name}_lang': JSONObject(**{language: language_value(name, language, default)})
+        for name, default in fields.items()
+    }
+    return queryset.defer(*fields).annotate(**annotations)
+
+
+def get_requested_language(request):
+    """Return the validated `lang` query parameter, or None when not provided"""
+    language = request.query_params.get('lang')
+    if not language:
+        return None
+    language = language.lower()
+    if not LANGUAGE_RE.match(language):
+        raise ValidationError({'lang': 'Expected a two-letter language code (e.g. "en", "fr")'})
+    return language
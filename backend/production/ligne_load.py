@@ -0,0 +1,86 @@
+"""
+Ligne load dashboard.
+
+The load of each ligne per day (cabines entering, leaving and on the ligne)
+is materialized in `ligne_daily_load` and kept current by database triggers
+on the planning, which only recompute the days touched by each write or
+import (see `LigneDailyLoad`). Dashboards read it by day, or rolled up by
+week (at most 7 rows per bucket), with one indexed query whatever the
+planning history.
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Max, Sum
+from django.db.models.functions import TruncWeek
+
+from .models import Ligne, LigneDailyLoad
+
+BUCKETS = ['day', 'week']
+
+
+def week_bounds(start, end):
+    """[start, end] widened to whole weeks (Monday to Sunday)"""
+    return start - timedelta(days=start.weekday()), end + timedelta(days=6 - end.weekday())
+
+
+def ligne_load(start, end, bucket='day', ligne_id=None):
+    """
+    Load of the lignes (or one) over [start, end], by day or by week (whole
+    weeks, from the Monday of start). Returns columnar {lignes, loads}: the
+    lignes, then one entry per ligne and bucket with cabines, with entries,
+    exits and wip (by week: the highest and average daily wip).
+    """
+    if bucket == 'week':
+        start, end = week_bounds(start, end)
+    rows = LigneDailyLoad.objects.filter(day__range=(start, end))
+    lignes = Ligne.objects.order_by('name', 'id')
+    if ligne_id is not None:
+        rows = rows.filter(ligne_id=ligne_id)
+        lignes = lignes.filter(id=ligne_id)
+
+    if bucket == 'week':
+        rows = list(rows.annotate(start=TruncWeek('day')).values('ligne_id', 'start').annotate(
+            entries=Sum('entries'), exits=Sum('exits'), wip_max=Max('wip'), wip_days=Sum('wip')
+        ).order_by('ligne_id', 'start'))
+    else:
+        rows = list(rows.annotate(start=F('day')).values('ligne_id', 'start', 'entries', 'exits', 'wip').order_by('ligne_id', 'day'))
+
+    loads = {column: [row[key] for row in rows] for column, key in [
+        ('ligne', 'ligne_id'), ('start', 'start'), ('entries', 'entries'), ('exits', 'exits'),
+    ]}
+    if bucket == 'week':
+        loads['wip_max'] = [row['wip_max'] for row in rows]
+        # Days without cabines have no row: average over the whole week
+        loads['wip_avg'] = [round(row['wip_days'] / 7, 2) for row in rows]
+    else:
+        loads['wip'] = [row['wip'] for row in rows]
+
+    ligne_rows = list(lignes.values_list('id', 'internal_id', 'name'))
+    return {
+        'bucket': bucket,
+        'from': start,
+        'to': end,
+        'lignes': {
+            'id': [row[0] for row in ligne_rows],
+            'internal_id': [row[1] for row in ligne_rows],
+            'name': [row[2] for row in ligne_rows],
+        },
+        'loads': loads,
+    }
+
+
+def rebuild_ligne_load():
+    """Recompute the whole table, e.g. after writes made with the triggers disabled"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('DELETE FROM ligne_daily_load')
+        cursor.execute("""
+            SELECT ligne_load_refresh(array_agg(ligne_id), array_agg(first_day), array_agg(last_day))
+            FROM (
+                SELECT ligne_id, min(LEAST(entry_date, exit_date)), max(GREATEST(entry_date, exit_date))
+                FROM production_planning_line GROUP BY ligne_id
+            ) AS s (ligne_id, first_day, last_day)
+            HAVING count(*) > 0
+        """)
+        cursor.execute('SELECT count(*) FROM ligne_daily_load')
+        return cursor.fetchone()[0]
@@ -0,0 +1,43 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from production.hierarchy_import import HierarchyImportError, import_hierarchy
+
+LEVELS = ['boat', 'gammecabine', 'variantegamme', 'cabine', 'ligne', 'poste']
+
+
+class Command(BaseCommand):
+    help = "Import boats, gammes, variantes, cabines, lignes and postes from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Hierarchy file, or - to read from stdin")
+        parser.add_argument(
+            '--format', choices=['csv', 'json'],
+            help="File format (default: from the file extension)"
+        )
+        parser.add_argument('--delimiter', help="CSV delimiter (default: sniffed from the header)")
+        parser.add_argument('--dry-run', action='store_true', help="Report without writing")
+
+    def handle(self, *args, **options):
+        path = options['file']
+        file_format = options['format'] or ('json' if path.lower().endswith('.json') else 'csv')
+        started = time.monotonic()
+        try:
+            if path == '-':
+                report = import_hierarchy(sys.stdin.buffer, file_format, options['delimiter'], options['dry_run'])
+            else:
+                with open(path, 'rb') as stream:
+                    report = import_hierarchy(stream, file_format, options['delimiter'], options['dry_run'])
+        except (OSError, HierarchyImportError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"record {error['record']}: {error['error']}")
+        for level in LEVELS:
+            self.stdout.write(f"{level}: {report[level]['created']} created, {report[level]['existing']} existing")
+        self.stdout.write(
+            f"{report['records']} records, {report['invalid']} invalid, {report['renamed']} renamed "
+            f"in {time.monotonic() - started:.1f}s" + (" (dry run, nothing written)" if report['dry_run'] else "")
+        )
@@ -0,0 +1,46 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from production.planning_import import PlanningImportError, import_planning
+
+
+class Command(BaseCommand):
+    help = "Import a planning export (CSV or XLSX) into the production planning."
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Planning export, or - to read CSV from stdin")
+        parser.add_argument(
+            '--format', choices=['csv', 'xlsx'],
+            help="File format (default: from the file extension)"
+        )
+        parser.add_argument('--delimiter', help="CSV delimiter (default: sniffed from the header)")
+        parser.add_argument('--dry-run', action='store_true', help="Report without writing")
+
+    def handle(self, *args, **options):
+        path = options['file']
+        file_format = options['format'] or ('xlsx' if path.lower().endswith('.xlsx') else 'csv')
+        started = time.monotonic()
+        try:
+            if path == '-':
+                report = import_planning(sys.stdin.buffer, file_format, options['delimiter'], options['dry_run'])
+            else:
+                with open(path, 'rb') as stream:
+                    report = import_planning(stream, file_format, options['delimiter'], options['dry_run'])
+        except (OSError, PlanningImportError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(
+            f"{report['rows']} rows: {report['inserted']} inserted, {report['updated']} updated, "
+            f"{report['unchanged']} unchanged, {report['invalid']} invalid, {report['unresolved']} unresolved "
+            f"in {time.monotonic() - started:.1f}s" + (" (dry run, nothing written)" if report['dry_run'] else "")
+        )
+        conflicts = report['conflicts']['summary']
+        if conflicts['overlaps'] or conflicts['over_capacity']:
+            self.stderr.write(
+                f"Planning conflicts: {conflicts['overlaps']} overlapping lines, "
+                f"{conflicts['over_capacity']} periods over ligne capacity (see /api/reports/conflicts/)"
+            )
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from production.changes import prune_change_log
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the delta sync change log entries older than the retention period. "
+        "Clients with a cursor from before it get 410 Gone and resync from scratch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.CHANGE_LOG_RETENTION_DAYS,
+            help="Keep this many days of changes (default CHANGE_LOG_RETENTION_DAYS)"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{prune_change_log(options['days'])} entries deleted")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from production.ligne_load import rebuild_ligne_load
+
+
+class Command(BaseCommand):
+    help = "Recompute the whole ligne daily load from the planning (it is otherwise kept current by triggers)."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{rebuild_ligne_load()} ligne days")
@@ -0,0 +1,63 @@
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.http import HttpRequest
+
+from production.caching import is_shared
+from production.warming import warm_caches
+
+
+class Command(BaseCommand):
+    help = "Warm the sheet resolution caches for the cabines planned in the next hours."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=settings.CACHE_WARMING_HOURS,
+            help="Look-ahead window in hours (default: CACHE_WARMING_HOURS)"
+        )
+        parser.add_argument(
+            '--url', default=settings.CACHE_WARMING_URL,
+            help="Public base URL of the site, as stations reach it (default: CACHE_WARMING_URL)"
+        )
+        parser.add_argument(
+            '--lang', action='append', default=[],
+            help="Also warm this language (repeatable); all languages are always warmed"
+        )
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help="Keep running, warming every N minutes"
+        )
+
+    def handle(self, *args, **options):
+        if not options['url']:
+            raise CommandError("Set --url or CACHE_WARMING_URL to the site URL stations use.")
+        if not is_shared():
+            raise CommandError("Responses are not cached with this CACHE_BACKEND (disabled or local to the process): set a shared one.")
+        context = {'request': self.warming_request(options['url'])}
+        languages = [None] + [language.lower() for language in options['lang']]
+
+        while True:
+            started = time.monotonic()
+            counts = warm_caches(options['hours'], context, languages=languages)
+            self.stdout.write(
+                f"{counts['visits']} upcoming visits, {counts['documents']} documents, "
+                f"{counts['built']} built in {time.monotonic() - started:.1f}s"
+            )
+            if not options['every']:
+                break
+            time.sleep(options['every'] * 60)
+            close_old_connections()
+
+    def warming_request(self, url):
+        """Request standing for the stations: media URLs are built from its host and scheme"""
+        url = urlsplit(url)
+        request = HttpRequest()
+        request.META['HTTP_HOST'] = url.netloc
+        request.META['SERVER_PORT'] = str(url.port or (443 if url.scheme == 'https' else 80))
+        if url.scheme == 'https' and settings.SECURE_PROXY_SSL_HEADER:
+            header, value = settings.SECURE_PROXY_SSL_HEADER
+            request.META[header] = value
+        return request
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("production", "0011_remove_language_from_sheet"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SheetSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "version",
+                    models.IntegerField(
+                        help_text="Published version number, incremented on each publish"
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(
+                        help_text="SHA-256 of the published documents", max_length=64
+                    ),
+                ),
+                (
+                    "documents",
+                    models.JSONField(
+                        help_text="Resolved sheet documents by language: {'all': {...}, 'en': {...}, 'fr': {...}}"
+                    ),
+                ),
+                (
+                    "published_at",
+                    models.DateTimeField(
+                        auto_now_add=True, help_text="When the sheet was published"
+                    ),
+                ),
+                (
+                    "published_by",
+                    models.ForeignKey(
+                        help_text="User who published this version",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="published_snapshots",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "sheet",
+                    models.ForeignKey(
+                        help_text="reference to the sheet",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="production.sheet",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Sheet Snapshot",
+                "verbose_name_plural": "Sheet Snapshots",
+                "db_table": "sheet_snapshot",
+                "ordering": ["sheet", "-version"],
+                "unique_together": {("sheet", "version")},
+            },
+        ),
+    ]
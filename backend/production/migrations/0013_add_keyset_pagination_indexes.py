@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0012_add_sheet_snapshot"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="interactiveelement",
+            index=models.Index(
+                fields=["page", "z_order", "id"], name="element_page_zorder_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="medialibrary",
+            index=models.Index(
+                fields=["created_at", "id"], name="media_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="referencevalue",
+            index=models.Index(
+                fields=["created_at", "id"], name="reference_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sheet",
+            index=models.Index(
+                fields=["created_at", "id"], name="sheet_created_id_idx"
+            ),
+        ),
+    ]
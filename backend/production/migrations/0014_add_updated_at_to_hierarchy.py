@@ -0,0 +1,55 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0013_add_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="boat",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, help_text="When the boat was last updated"
+            ),
+        ),
+        migrations.AddField(
+            model_name="cabine",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, help_text="When the cabine was last updated"
+            ),
+        ),
+        migrations.AddField(
+            model_name="gammecabine",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, help_text="When the gamme was last updated"
+            ),
+        ),
+        migrations.AddField(
+            model_name="ligne",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, help_text="When the ligne was last updated"
+            ),
+        ),
+        migrations.AddField(
+            model_name="poste",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, help_text="When the poste was last updated"
+            ),
+        ),
+        migrations.AddField(
+            model_name="variantegamme",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, help_text="When the variante was last updated"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:28
+
+from django.db import migrations, models
+import django.db.models.constraints
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0014_add_updated_at_to_hierarchy"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="sheetpage",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="sheetpage",
+            constraint=models.UniqueConstraint(
+                deferrable=django.db.models.constraints.Deferrable["IMMEDIATE"],
+                fields=("sheet", "number"),
+                name="sheet_page_sheet_number_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,139 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+# Statement-level triggers: each INSERT/UPDATE/DELETE statement on a logged
+# table adds one change_log row per affected row, set-based, from the
+# statement's transition tables. `sheet` is the SQL resolving the sheet id of
+# a row aliased `r`; `parent` the column whose change moves a row to another
+# sheet, logged as a delete from the old one.
+LOGGED_TABLES = [
+    ("sheet_page", "page", "r.sheet_id", "sheet_id", ""),
+    (
+        "interactive_element",
+        "element",
+        "p.sheet_id",
+        "page_id",
+        "JOIN sheet_page p ON p.id = r.page_id",
+    ),
+    (
+        "field_definition_value",
+        "field_value",
+        "p.sheet_id",
+        "interactive_element_id",
+        "JOIN interactive_element e ON e.id = r.interactive_element_id "
+        "JOIN sheet_page p ON p.id = e.page_id",
+    ),
+]
+
+CREATE_TRIGGERS = ""
+DROP_TRIGGERS = ""
+for table, model, sheet, parent, joins in LOGGED_TABLES:
+    log = (
+        "INSERT INTO change_log (txid, model, object_id, sheet_id, action, changed_at) "
+        f"SELECT txid_current(), '{model}', r.id, {sheet}, '%s', now() FROM %s AS r %s {joins}"
+    )
+    moved = (
+        f"JOIN new_rows AS n ON n.id = r.id AND n.{parent} IS DISTINCT FROM r.{parent}"
+    )
+    CREATE_TRIGGERS += f"""
+CREATE FUNCTION change_log_{table}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {log % ('insert', 'new_rows', '')};
+    ELSIF TG_OP = 'UPDATE' THEN
+        {log % ('update', 'new_rows', '')};
+        {log % ('delete', 'old_rows', moved)};
+    ELSE
+        {log % ('delete', 'old_rows', '')};
+    END IF;
+    RETURN NULL;
+END;
+$$;
+CREATE TRIGGER change_log_{table}_insert AFTER INSERT ON {table}
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION change_log_{table}();
+CREATE TRIGGER change_log_{table}_update AFTER UPDATE ON {table}
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION change_log_{table}();
+CREATE TRIGGER change_log_{table}_delete AFTER DELETE ON {table}
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION change_log_{table}();
+"""
+    DROP_TRIGGERS += f"""
+DROP TRIGGER IF EXISTS change_log_{table}_insert ON {table};
+DROP TRIGGER IF EXISTS change_log_{table}_update ON {table};
+DROP TRIGGER IF EXISTS change_log_{table}_delete ON {table};
+DROP FUNCTION IF EXISTS change_log_{table}();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0015_sheet_page_deferrable_number_constraint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLogEntry",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "txid",
+                    models.BigIntegerField(
+                        help_text="Id of the writing transaction (txid_current())"
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        choices=[
+                            ("page", "Sheet Page"),
+                            ("element", "Interactive Element"),
+                            ("field_value", "Field Definition Value"),
+                        ],
+                        help_text="Kind of the changed row",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.BigIntegerField(help_text="Id of the changed row"),
+                ),
+                (
+                    "sheet_id",
+                    models.BigIntegerField(
+                        help_text="Sheet the row belongs to (not a foreign key: entries outlive the sheet)"
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("insert", "Insert"),
+                            ("update", "Update"),
+                            ("delete", "Delete"),
+                        ],
+                        help_text="Kind of change",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "changed_at",
+                    models.DateTimeField(help_text="When the change was made"),
+                ),
+            ],
+            options={
+                "verbose_name": "Change Log Entry",
+                "verbose_name_plural": "Change Log",
+                "db_table": "change_log",
+                "ordering": ["txid", "id"],
+                "indexes": [
+                    models.Index(fields=["txid", "id"], name="change_log_txid_id_idx"),
+                    models.Index(
+                        fields=["sheet_id", "txid", "id"],
+                        name="change_log_sheet_txid_id_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,238 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# sheet_hierarchy_refresh(doc ids) rebuilds the rows of the given documentation
+# links. Statement-level triggers on the links and the hierarchy tables call it
+# with the links affected by the statement, found from its transition tables.
+# For each table: the events handled, the SQL selecting the affected link ids
+# from rows aliased `r`, and for updates the column whose change matters
+# (None: any change).
+REFRESH_FUNCTION = """
+CREATE FUNCTION sheet_hierarchy_refresh(doc_ids bigint[]) RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM sheet_hierarchy WHERE documentation_id = ANY(doc_ids);
+    INSERT INTO sheet_hierarchy
+        (documentation_id, sheet_id, boat_id, gamme_id, variante_id, cabine_id, ligne_id, poste_id, ligne_sens)
+    SELECT d.id, d.sheet_id, g.boat_id, v.gamme_id, v.id, c.id, p.ligne_id, p.id, d.ligne_sens
+    FROM poste_variante_documentation d
+    JOIN variante_gamme v ON v.id = d."varianteGamme_id"
+    JOIN gamme_cabine g ON g.id = v.gamme_id
+    JOIN poste p ON p.id = d.poste_id
+    LEFT JOIN cabine c ON c.variante_gamme_id = v.id
+    WHERE d.id = ANY(doc_ids);
+END;
+$$;
+SELECT sheet_hierarchy_refresh(ARRAY(SELECT id FROM poste_variante_documentation));
+"""
+DOCS = "SELECT d.id FROM poste_variante_documentation d JOIN {rows} AS r ON {join}"
+WATCHED_TABLES = [
+    (
+        "poste_variante_documentation",
+        ["INSERT", "UPDATE", "DELETE"],
+        "SELECT r.id FROM {rows} AS r",
+        None,
+    ),
+    (
+        "cabine",
+        ["INSERT", "UPDATE", "DELETE"],
+        DOCS.format(rows="{rows}", join='r.variante_gamme_id = d."varianteGamme_id"'),
+        "variante_gamme_id",
+    ),
+    (
+        "variante_gamme",
+        ["UPDATE"],
+        DOCS.format(rows="{rows}", join='r.id = d."varianteGamme_id"'),
+        "gamme_id",
+    ),
+    (
+        "gamme_cabine",
+        ["UPDATE"],
+        'SELECT d.id FROM poste_variante_documentation d JOIN variante_gamme v ON v.id = d."varianteGamme_id" '
+        "JOIN {rows} AS r ON r.id = v.gamme_id",
+        "boat_id",
+    ),
+    (
+        "poste",
+        ["UPDATE"],
+        DOCS.format(rows="{rows}", join="r.id = d.poste_id"),
+        "ligne_id",
+    ),
+]
+TRANSITION_TABLES = {
+    "INSERT": "NEW TABLE AS new_rows",
+    "UPDATE": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "DELETE": "OLD TABLE AS old_rows",
+}
+
+CREATE_TRIGGERS = REFRESH_FUNCTION
+DROP_TRIGGERS = ""
+for table, events, docs, parent in WATCHED_TABLES:
+    if parent is None:
+        updated = "new_rows"
+    else:
+        # Rows moved to another parent, before and after the move
+        moved = (
+            f"JOIN old_rows o ON o.id = n.id AND o.{parent} IS DISTINCT FROM n.{parent}"
+        )
+        updated = f"(SELECT n.* FROM new_rows n {moved} UNION ALL SELECT o.* FROM new_rows n {moved})"
+    CREATE_TRIGGERS += f"""
+CREATE FUNCTION sheet_hierarchy_{table}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM sheet_hierarchy_refresh(ARRAY({docs.format(rows='new_rows')}));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM sheet_hierarchy_refresh(ARRAY({docs.format(rows=updated)}));
+    ELSE
+        PERFORM sheet_hierarchy_refresh(ARRAY({docs.format(rows='old_rows')}));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+"""
+    for event in events:
+        CREATE_TRIGGERS += (
+            f"CREATE TRIGGER sheet_hierarchy_{table}_{event.lower()} AFTER {event} ON {table} "
+            f"REFERENCING {TRANSITION_TABLES[event]} FOR EACH STATEMENT EXECUTE FUNCTION sheet_hierarchy_{table}();\n"
+        )
+        DROP_TRIGGERS += f"DROP TRIGGER IF EXISTS sheet_hierarchy_{table}_{event.lower()} ON {table};\n"
+    DROP_TRIGGERS += f"DROP FUNCTION IF EXISTS sheet_hierarchy_{table}();\n"
+DROP_TRIGGERS += "DROP FUNCTION IF EXISTS sheet_hierarchy_refresh(bigint[]);\n"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0016_add_change_log"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SheetHierarchy",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "ligne_sens",
+                    models.CharField(
+                        help_text="sens of the ligne: D, G or -", max_length=1
+                    ),
+                ),
+                (
+                    "boat",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        help_text="reference to the boat",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="production.boat",
+                    ),
+                ),
+                (
+                    "cabine",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        help_text="reference to the cabine",
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="production.cabine",
+                    ),
+                ),
+                (
+                    "documentation",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        help_text="reference to the documentation link",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="production.postevariantedocumentation",
+                    ),
+                ),
+                (
+                    "gamme",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        help_text="reference to the gamme",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="production.gammecabine",
+                    ),
+                ),
+                (
+                    "ligne",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        help_text="reference to the ligne",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="production.ligne",
+                    ),
+                ),
+                (
+                    "poste",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        help_text="reference to the poste",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="production.poste",
+                    ),
+                ),
+                (
+                    "sheet",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        help_text="reference to the sheet",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="production.sheet",
+                    ),
+                ),
+                (
+                    "variante",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        help_text="reference to the variante",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="production.variantegamme",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Sheet Hierarchy",
+                "verbose_name_plural": "Sheet Hierarchy",
+                "db_table": "sheet_hierarchy",
+                "indexes": [
+                    models.Index(
+                        fields=["boat", "sheet"], name="sheet_hierarchy_boat_idx"
+                    ),
+                    models.Index(
+                        fields=["gamme", "sheet"], name="sheet_hierarchy_gamme_idx"
+                    ),
+                    models.Index(
+                        fields=["variante", "sheet"],
+                        name="sheet_hierarchy_variante_idx",
+                    ),
+                    models.Index(
+                        fields=["cabine", "sheet"], name="sheet_hierarchy_cabine_idx"
+                    ),
+                    models.Index(
+                        fields=["ligne", "sheet"], name="sheet_hierarchy_ligne_idx"
+                    ),
+                    models.Index(
+                        fields=["poste", "sheet"], name="sheet_hierarchy_poste_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0017_add_sheet_hierarchy"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="postevariantedocumentation",
+            index=models.Index(
+                fields=["varianteGamme", "poste", "ligne_sens"],
+                name="pvd_variante_poste_sens_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productionplanningline",
+            index=models.Index(
+                fields=["cabine", "ligne", "entry_date"],
+                name="planning_cabine_ligne_idx",
+            ),
+        ),
+    ]
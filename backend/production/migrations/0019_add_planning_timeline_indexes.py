@@ -0,0 +1,35 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:46
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import production.planning
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0018_add_resolution_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="productionplanningline",
+            index=models.Index(fields=["entry_date"], name="planning_entry_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="productionplanningline",
+            index=django.contrib.postgres.indexes.GistIndex(
+                production.planning.DateSpan("entry_date", "exit_date"),
+                name="planning_period_gist",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productionplanningline",
+            index=django.contrib.postgres.indexes.GistIndex(
+                production.planning.DateSpan(
+                    "scheduled_entry_date", "scheduled_exit_date"
+                ),
+                name="planning_scheduled_gist",
+            ),
+        ),
+    ]
@@ -0,0 +1,151 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# ligne_load_refresh(lignes, firsts, lasts) recomputes the daily load of each
+# ligne over the days [first, last] given with it: they are merged into one
+# multirange of touched days per ligne, the days are deleted, and the ones that
+# still have cabines are re-inserted from the planning lines overlapping them,
+# each line counted on each of its touched days. A statement-level trigger on
+# the planning calls it with the spans of the rows the statement inserted,
+# deleted, or changed (before and after the change; updates of other columns
+# are skipped), found from its transition tables.
+SPAN = "LEAST({rows}.entry_date, {rows}.exit_date), GREATEST({rows}.entry_date, {rows}.exit_date)"
+TOUCHED = """
+    WITH touched AS (
+        SELECT ligne_id, range_agg(daterange(first_day, last_day, '[]')) AS days
+        FROM unnest(ligne_ids, firsts, lasts) AS s (ligne_id, first_day, last_day)
+        GROUP BY ligne_id
+    )
+"""
+CREATE_TRIGGERS = (
+    """
+CREATE FUNCTION ligne_load_refresh(ligne_ids bigint[], firsts date[], lasts date[]) RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+"""
+    + TOUCHED
+    + """
+    DELETE FROM ligne_daily_load l USING touched t WHERE l.ligne_id = t.ligne_id AND l.day <@ t.days;
+"""
+    + TOUCHED
+    + f"""
+    INSERT INTO ligne_daily_load (ligne_id, day, entries, exits, wip)
+    SELECT pl.ligne_id, d.day::date,
+        count(*) FILTER (WHERE pl.entry_date = d.day), count(*) FILTER (WHERE pl.exit_date = d.day), count(*)
+    FROM touched t
+    JOIN production_planning_line pl ON pl.ligne_id = t.ligne_id AND daterange({SPAN.format(rows="pl")}, '[]') && t.days
+    CROSS JOIN generate_series({SPAN.format(rows="pl")}, interval '1 day') AS d (day)
+    WHERE d.day::date <@ t.days
+    GROUP BY pl.ligne_id, d.day;
+END;
+$$;
+
+CREATE FUNCTION ligne_load_planning() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    spans RECORD;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(ligne_id) AS lignes, array_agg(first_day) AS firsts, array_agg(last_day) AS lasts INTO spans
+        FROM (SELECT n.ligne_id, {SPAN.format(rows="n")} FROM new_rows n) AS s (ligne_id, first_day, last_day);
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(ligne_id) AS lignes, array_agg(first_day) AS firsts, array_agg(last_day) AS lasts INTO spans
+        FROM (
+            SELECT n.ligne_id, {SPAN.format(rows="n")} FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (o.ligne_id, o.entry_date, o.exit_date) IS DISTINCT FROM (n.ligne_id, n.entry_date, n.exit_date)
+            UNION ALL
+            SELECT o.ligne_id, {SPAN.format(rows="o")} FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (o.ligne_id, o.entry_date, o.exit_date) IS DISTINCT FROM (n.ligne_id, n.entry_date, n.exit_date)
+        ) AS s (ligne_id, first_day, last_day);
+    ELSE
+        SELECT array_agg(ligne_id) AS lignes, array_agg(first_day) AS firsts, array_agg(last_day) AS lasts INTO spans
+        FROM (SELECT o.ligne_id, {SPAN.format(rows="o")} FROM old_rows o) AS s (ligne_id, first_day, last_day);
+    END IF;
+    IF spans.lignes IS NOT NULL THEN
+        PERFORM ligne_load_refresh(spans.lignes, spans.firsts, spans.lasts);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER ligne_load_planning_insert AFTER INSERT ON production_planning_line
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION ligne_load_planning();
+CREATE TRIGGER ligne_load_planning_update AFTER UPDATE ON production_planning_line
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION ligne_load_planning();
+CREATE TRIGGER ligne_load_planning_delete AFTER DELETE ON production_planning_line
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION ligne_load_planning();
+
+-- Backfill: the whole planning span of each ligne
+SELECT ligne_load_refresh(array_agg(ligne_id), array_agg(first_day), array_agg(last_day))
+FROM (
+    SELECT ligne_id, min(LEAST(entry_date, exit_date)), max(GREATEST(entry_date, exit_date))
+    FROM production_planning_line GROUP BY ligne_id
+) AS s (ligne_id, first_day, last_day)
+HAVING count(*) > 0;
+"""
+)
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS ligne_load_planning_insert ON production_planning_line;
+DROP TRIGGER IF EXISTS ligne_load_planning_update ON production_planning_line;
+DROP TRIGGER IF EXISTS ligne_load_planning_delete ON production_planning_line;
+DROP FUNCTION IF EXISTS ligne_load_planning();
+DROP FUNCTION IF EXISTS ligne_load_refresh(bigint[], date[], date[]);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0019_add_planning_timeline_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LigneDailyLoad",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("day", models.DateField(help_text="day of the load")),
+                (
+                    "entries",
+                    models.PositiveIntegerField(
+                        help_text="cabines entering the ligne that day"
+                    ),
+                ),
+                (
+                    "exits",
+                    models.PositiveIntegerField(
+                        help_text="cabines leaving the ligne that day"
+                    ),
+                ),
+                (
+                    "wip",
+                    models.PositiveIntegerField(
+                        help_text="cabines on the ligne that day (work in progress)"
+                    ),
+                ),
+                (
+                    "ligne",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        help_text="reference to the ligne",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="production.ligne",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ligne Daily Load",
+                "verbose_name_plural": "Ligne Daily Loads",
+                "db_table": "ligne_daily_load",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="lignedailyload",
+            constraint=models.UniqueConstraint(
+                fields=("ligne", "day"), name="ligne_daily_load_uniq"
+            ),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
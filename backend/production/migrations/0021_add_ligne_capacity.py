@@ -0,0 +1,22 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0020_add_ligne_daily_load"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ligne",
+            name="capacity",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Most cabines the ligne can hold at once (empty: unlimited)",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-17 09:12
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # When the cache is the database (CACHE_BACKEND, see CACHES), create its table on deploy.
+    # createcachetable skips non-database backends and existing tables.
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0021_add_ligne_capacity"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0022_create_cache_table"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="changelogentry",
+            name="action",
+            field=models.CharField(
+                choices=[
+                    ("insert", "Insert"),
+                    ("update", "Update"),
+                    ("delete", "Delete"),
+                    ("prune", "Prune marker"),
+                ],
+                help_text="Kind of change",
+                max_length=10,
+            ),
+        ),
+    ]
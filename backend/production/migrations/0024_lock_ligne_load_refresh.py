@@ -0,0 +1,84 @@
+# Generated by Django 4.2.16 on 2026-10-17 09:41
+
+from django.db import migrations
+
+# ligne_load_refresh (see 0020) deleted the touched days and re-inserted them:
+# two transactions refreshing the same ligne both inserted the days the other
+# had deleted, and one of them failed on the (ligne, day) unique constraint.
+# Refreshes of a ligne now take a transaction-level advisory lock on it first
+# (in key order, so concurrent refreshes of several lignes can't deadlock),
+# so that they run one after the other and each reads the planning lines the
+# previous one committed. The days are upserted, and the touched days left
+# without cabines deleted, in one statement.
+SPAN = "LEAST({rows}.entry_date, {rows}.exit_date), GREATEST({rows}.entry_date, {rows}.exit_date)"
+TOUCHED = """
+    WITH touched AS (
+        SELECT ligne_id, range_agg(daterange(first_day, last_day, '[]')) AS days
+        FROM unnest(ligne_ids, firsts, lasts) AS s (ligne_id, first_day, last_day)
+        GROUP BY ligne_id
+    )
+"""
+LOAD = f"""
+    SELECT pl.ligne_id, d.day::date,
+        count(*) FILTER (WHERE pl.entry_date = d.day), count(*) FILTER (WHERE pl.exit_date = d.day), count(*)
+    FROM touched t
+    JOIN production_planning_line pl ON pl.ligne_id = t.ligne_id AND daterange({SPAN.format(rows="pl")}, '[]') && t.days
+    CROSS JOIN generate_series({SPAN.format(rows="pl")}, interval '1 day') AS d (day)
+    WHERE d.day::date <@ t.days
+    GROUP BY pl.ligne_id, d.day
+"""
+LOCKED_REFRESH = (
+    """
+CREATE OR REPLACE FUNCTION ligne_load_refresh(ligne_ids bigint[], firsts date[], lasts date[]) RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('ligne_daily_load'), lock_key)
+    FROM (SELECT DISTINCT hashtext(ligne_id::text) FROM unnest(ligne_ids) AS s (ligne_id) ORDER BY 1) AS l (lock_key);
+"""
+    + TOUCHED
+    + """,
+    refreshed AS (
+        INSERT INTO ligne_daily_load (ligne_id, day, entries, exits, wip)
+"""
+    + LOAD
+    + """
+        ON CONFLICT (ligne_id, day) DO UPDATE
+        SET entries = EXCLUDED.entries, exits = EXCLUDED.exits, wip = EXCLUDED.wip
+        RETURNING ligne_id, day
+    )
+    DELETE FROM ligne_daily_load l USING touched t
+    WHERE l.ligne_id = t.ligne_id AND l.day <@ t.days
+        AND NOT EXISTS (SELECT 1 FROM refreshed r WHERE r.ligne_id = l.ligne_id AND r.day = l.day);
+END;
+$$;
+"""
+)
+UNLOCKED_REFRESH = (
+    """
+CREATE OR REPLACE FUNCTION ligne_load_refresh(ligne_ids bigint[], firsts date[], lasts date[]) RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+"""
+    + TOUCHED
+    + """
+    DELETE FROM ligne_daily_load l USING touched t WHERE l.ligne_id = t.ligne_id AND l.day <@ t.days;
+"""
+    + TOUCHED
+    + """
+    INSERT INTO ligne_daily_load (ligne_id, day, entries, exits, wip)
+"""
+    + LOAD
+    + """;
+END;
+$$;
+"""
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0023_add_change_log_prune_marker"),
+    ]
+
+    operations = [
+        migrations.RunSQL(LOCKED_REFRESH, UNLOCKED_REFRESH),
+    ]
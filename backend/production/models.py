@@ -1,11 +1,18 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GistIndex
 from datetime import date
 
+from .planning import period
+
 
 class Ligne(models.Model):
     internal_id = models.CharField(max_length=10, help_text="internal id of the ligne")
     name = models.CharField(max_length=100, help_text="Name of the ligne", default="none")
+    capacity = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Most cabines the ligne can hold at once (empty: unlimited)"
+    )
+    updated_at = models.DateTimeField(auto_now=True, help_text="When the ligne was last updated")
 
     class Meta:
         db_table = 'ligne'
@@ -19,6 +26,7 @@ class Ligne(models.Model):
 class Poste(models.Model):
     internal_id = models.CharField(max_length=10, help_text="internal id of the poste")
     ligne = models.ForeignKey(Ligne, on_delete=models.CASCADE, help_text="reference to the ligne")
+    updated_at = models.DateTimeField(auto_now=True, help_text="When the poste was last updated")
 
     class Meta:
         db_table = 'poste'
@@ -32,6 +40,7 @@ class Poste(models.Model):
 class Boat(models.Model):
     internal_id = models.CharField(max_length=10, help_text="internal id of the boat")
     name = models.CharField(max_length=100, help_text="Name of the boat", default="non défini")
+    updated_at = models.DateTimeField(auto_now=True, help_text="When the boat was last updated")
 
     class Meta:
         db_table = 'boat'
@@ -45,6 +54,7 @@ class Boat(models.Model):
 class GammeCabine(models.Model):
     internal_id = models.CharField(max_length=10, help_text="internal id of the gamme")
     boat = models.ForeignKey(Boat, on_delete=models.CASCADE, help_text="reference to the boat")
+    updated_at = models.DateTimeField(auto_now=True, help_text="When the gamme was last updated")
 
     class Meta:
         db_table = 'gamme_cabine'
@@ -58,6 +68,7 @@ class GammeCabine(models.Model):
 class VarianteGamme(models.Model):
     gamme = models.ForeignKey(GammeCabine, on_delete=models.CASCADE, help_text="reference to the gamme")
     internal_id = models.CharField(max_length=10, help_text="internal id of the variante")
+    updated_at = models.DateTimeField(auto_now=True, help_text="When the variante was last updated")
 
     class Meta:
         db_table = 'variante_gamme'
@@ -71,6 +82,7 @@ class VarianteGamme(models.Model):
 class Cabine(models.Model):
     internal_id = models.CharField(max_length=10, help_text="internal id of the cabine")
     variante_gamme = models.ForeignKey(VarianteGamme, on_delete=models.CASCADE, help_text="reference to the variante")
+    updated_at = models.DateTimeField(auto_now=True, help_text="When the cabine was last updated")
 
     class Meta:
         db_table = 'cabine'
@@ -94,6 +106,13 @@ class ProductionPlanningLine(models.Model):
         db_table = 'production_planning_line'
         verbose_name = 'Production Planning Line'
         verbose_name_plural = 'Production Planning Lines'
+        indexes = [
+            models.Index(fields=['cabine', 'ligne', 'entry_date'], name='planning_cabine_ligne_idx'),
+            models.Index(fields=['entry_date'], name='planning_entry_date_idx'),
+            # Timeline lookups (see planning.py)
+            GistIndex(period('actual'), name='planning_period_gist'),
+            GistIndex(period('scheduled'), name='planning_scheduled_gist'),
+        ]
 
     def __str__(self):
         return f"Planning {self.cabine} on {self.ligne}"
@@ -119,11 +138,55 @@ class Sheet(models.Model):
         verbose_name = 'Sheet'
         verbose_name_plural = 'Sheets'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='sheet_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.business_id})"
 
 
+class SheetSnapshot(models.Model):
+    """
+    Immutable published version of a sheet.
+    Holds the fully resolved sheet document (pages, elements, references, field values)
+    for all languages and for each single language, so readers never hit the editable rows.
+    """
+    ALL_LANGUAGES = 'all'
+    
+    sheet = models.ForeignKey(Sheet, on_delete=models.CASCADE, related_name='snapshots', help_text="reference to the sheet")
+    version = models.IntegerField(help_text="Published version number, incremented on each publish")
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of the published documents")
+    documents = models.JSONField(
+        help_text="Resolved sheet documents by language: {'all': {...}, 'en': {...}, 'fr': {...}}"
+    )
+    
+    # Tracking fields
+    published_at = models.DateTimeField(auto_now_add=True, help_text="When the sheet was published")
+    published_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='published_snapshots',
+        help_text="User who published this version"
+    )
+
+    class Meta:
+        db_table = 'sheet_snapshot'
+        verbose_name = 'Sheet Snapshot'
+        verbose_name_plural = 'Sheet Snapshots'
+        unique_together = [['sheet', 'version']]
+        ordering = ['sheet', '-version']
+
+    def __str__(self):
+        return f"{self.sheet.name} v{self.version}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Sheet snapshots are immutable, publish a new version instead")
+        super().save(*args, **kwargs)
+
+
 class PosteVarianteDocumentation(models.Model):
     poste = models.ForeignKey(Poste, on_delete=models.CASCADE, help_text="reference to the poste")
     varianteGamme = models.ForeignKey(VarianteGamme, on_delete=models.CASCADE, help_text="reference to the variante")
@@ -134,11 +197,85 @@ class PosteVarianteDocumentation(models.Model):
         db_table = 'poste_variante_documentation'
         verbose_name = 'Poste Variante Documentation'
         verbose_name_plural = 'Poste Variante Documentations'
+        indexes = [
+            models.Index(fields=['varianteGamme', 'poste', 'ligne_sens'], name='pvd_variante_poste_sens_idx'),
+        ]
 
     def __str__(self):
         return f"Doc for {self.poste} - {self.varianteGamme}"
 
 
+def _hierarchy_link(model, help_text, **kwargs):
+    # Rows are rebuilt by triggers, never cascaded by Django; lookups use the composite indexes
+    kwargs.setdefault('db_index', False)
+    return models.ForeignKey(
+        model, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+', help_text=help_text, **kwargs
+    )
+
+
+class SheetHierarchy(models.Model):
+    """
+    Flattened documentation links: one row per documentation link and cabine of
+    its variante (cabine empty when the variante has none), with every level of
+    the boat and ligne hierarchies. Maintained by database triggers on the links
+    and the hierarchy tables (see migration 0017), so filtering sheets by any
+    level is one indexed lookup. Read only.
+    """
+    id = models.BigAutoField(primary_key=True)
+    documentation = _hierarchy_link(PosteVarianteDocumentation, "reference to the documentation link", db_index=True)
+    sheet = _hierarchy_link(Sheet, "reference to the sheet")
+    boat = _hierarchy_link(Boat, "reference to the boat")
+    gamme = _hierarchy_link(GammeCabine, "reference to the gamme")
+    variante = _hierarchy_link(VarianteGamme, "reference to the variante")
+    cabine = _hierarchy_link(Cabine, "reference to the cabine", null=True)
+    ligne = _hierarchy_link(Ligne, "reference to the ligne")
+    poste = _hierarchy_link(Poste, "reference to the poste")
+    ligne_sens = models.CharField(max_length=1, help_text="sens of the ligne: D, G or -")
+
+    class Meta:
+        db_table = 'sheet_hierarchy'
+        verbose_name = 'Sheet Hierarchy'
+        verbose_name_plural = 'Sheet Hierarchy'
+        indexes = [
+            models.Index(fields=['boat', 'sheet'], name='sheet_hierarchy_boat_idx'),
+            models.Index(fields=['gamme', 'sheet'], name='sheet_hierarchy_gamme_idx'),
+            models.Index(fields=['variante', 'sheet'], name='sheet_hierarchy_variante_idx'),
+            models.Index(fields=['cabine', 'sheet'], name='sheet_hierarchy_cabine_idx'),
+            models.Index(fields=['ligne', 'sheet'], name='sheet_hierarchy_ligne_idx'),
+            models.Index(fields=['poste', 'sheet'], name='sheet_hierarchy_poste_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sheet_id}: {self.variante_id}/{self.cabine_id} @ {self.poste_id} {self.ligne_sens}"
+
+
+class LigneDailyLoad(models.Model):
+    """
+    Daily load of a ligne from the planning (actual dates): cabines entering,
+    leaving and on the ligne that day. Only days with cabines have a row.
+    Maintained by database triggers on the planning, which recompute the days
+    of the lines each statement touched, one ligne at a time (see migrations
+    0020 and 0024). Read only.
+    """
+    id = models.BigAutoField(primary_key=True)
+    ligne = _hierarchy_link(Ligne, "reference to the ligne")
+    day = models.DateField(help_text="day of the load")
+    entries = models.PositiveIntegerField(help_text="cabines entering the ligne that day")
+    exits = models.PositiveIntegerField(help_text="cabines leaving the ligne that day")
+    wip = models.PositiveIntegerField(help_text="cabines on the ligne that day (work in progress)")
+
+    class Meta:
+        db_table = 'ligne_daily_load'
+        verbose_name = 'Ligne Daily Load'
+        verbose_name_plural = 'Ligne Daily Loads'
+        constraints = [
+            models.UniqueConstraint(fields=['ligne', 'day'], name='ligne_daily_load_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.ligne_id} on {self.day}: {self.wip}"
+
+
 class SheetPage(models.Model):
     sheet = models.ForeignKey(Sheet, on_delete=models.CASCADE, related_name='pages', help_text="reference to the sheet")
     number = models.IntegerField(help_text="Page number")
@@ -163,8 +300,17 @@ class SheetPage(models.Model):
         db_table = 'sheet_page'
         verbose_name = 'Sheet Page'
         verbose_name_plural = 'Sheet Pages'
-        unique_together = [['sheet', 'number']]
         ordering = ['sheet', 'number']
+        constraints = [
+            # Deferrable so that renumbering a range of pages with a single
+            # `UPDATE ... SET number = number + 1` is checked at the end of the
+            # statement rather than row by row (see page_order.py)
+            models.UniqueConstraint(
+                fields=['sheet', 'number'],
+                name='sheet_page_sheet_number_uniq',
+                deferrable=models.Deferrable.IMMEDIATE,
+            ),
+        ]
 
     def __str__(self):
         return f"Page {self.number} of {self.sheet.name}"
@@ -227,6 +373,9 @@ class InteractiveElement(models.Model):
         verbose_name = 'Interactive Element'
         verbose_name_plural = 'Interactive Elements'
         ordering = ['page', 'z_order', 'id']
+        indexes = [
+            models.Index(fields=['page', 'z_order', 'id'], name='element_page_zorder_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.type} - {self.business_id}"
@@ -316,6 +465,9 @@ class MediaLibrary(models.Model):
         verbose_name = 'Media Library'
         verbose_name_plural = 'Media Library'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='media_created_id_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         # Auto-detect dimensions and metadata
@@ -410,6 +562,9 @@ class ReferenceValue(models.Model):
         verbose_name = 'Reference Value'
         verbose_name_plural = 'Reference Values'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='reference_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.type} (v{self.version})"
@@ -515,3 +670,44 @@ class ReferenceHistory(models.Model):
     
     def __str__(self):
         return f"{self.reference.type} v{self.version} - {self.changed_at.strftime('%Y-%m-%d %H:%M')}"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Row-level change of a sheet's content (pages, elements, instance field values).
+    Written by database triggers (see migration 0016), so bulk and raw writes are
+    logged too, and read by the delta sync feed (see changes.py).
+    """
+    MODEL_CHOICES = [
+        ('page', 'Sheet Page'),
+        ('element', 'Interactive Element'),
+        ('field_value', 'Field Definition Value'),
+    ]
+    ACTION_CHOICES = [
+        ('insert', 'Insert'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+        # Last pruned entry, kept to detect expired cursors (see production.changes)
+        ('prune', 'Prune marker'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    txid = models.BigIntegerField(help_text="Id of the writing transaction (txid_current())")
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES, help_text="Kind of the changed row")
+    object_id = models.BigIntegerField(help_text="Id of the changed row")
+    sheet_id = models.BigIntegerField(help_text="Sheet the row belongs to (not a foreign key: entries outlive the sheet)")
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, help_text="Kind of change")
+    changed_at = models.DateTimeField(help_text="When the change was made")
+    
+    class Meta:
+        db_table = 'change_log'
+        verbose_name = 'Change Log Entry'
+        verbose_name_plural = 'Change Log'
+        ordering = ['txid', 'id']
+        indexes = [
+            models.Index(fields=['txid', 'id'], name='change_log_txid_id_idx'),
+            models.Index(fields=['sheet_id', 'txid', 'id'], name='change_log_sheet_txid_id_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} {self.model} {self.object_id}"
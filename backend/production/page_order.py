@@ -0,0 +1,110 @@
+"""
+Page numbering of a sheet.
+
+Inserting, moving, reordering and deleting pages renumber the other pages
+with one set-based UPDATE instead of saving pages one by one. The
+(sheet, number) unique constraint is deferrable, so it is checked once the
+statement has shifted the whole range. Every operation locks the sheet row,
+so concurrent edits of the same sheet are applied one after the other.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .caching import invalidate
+from .models import Sheet, SheetPage
+from .signals import touch_sheets
+
+
+def _lock_sheet(sheet_id):
+    Sheet.objects.select_for_update().only('pk').get(pk=sheet_id)
+
+
+def _renumber(pages, number):
+    """Apply a `number` expression to the pages, bumping their updated_at, in one UPDATE"""
+    return pages.update(number=number, updated_at=timezone.now())
+
+
+def _pages_renumbered(sheet_id):
+    # Page numbers show in page and element representations. Their detail
+    # responses depend on the sheet version: one key, whatever the page count
+    invalidate('pages', 'elements')
+    touch_sheets([sheet_id])
+
+
+def _clamp(number, last):
+    return max(1, min(number, last))
+
+
+def insert_page(sheet, number, user=None, description=None):
+    """
+    Create a page at position `number` (clamped to 1..count+1), shifting the
+    pages at or after it by one
+    """
+    with transaction.atomic():
+        _lock_sheet(sheet.pk)
+        pages = SheetPage.objects.filter(sheet=sheet)
+        number = _clamp(number, pages.count() + 1)
+        _renumber(pages.filter(number__gte=number), F('number') + 1)
+        page = SheetPage.objects.create(
+            sheet=sheet,
+            number=number,
+            description=description or {},
+            created_by=user
+        )
+        _pages_renumbered(sheet.pk)
+    return page
+
+
+def move_page(page, number):
+    """Move a page to position `number` (clamped to 1..count), shifting the pages in between"""
+    with transaction.atomic():
+        _lock_sheet(page.sheet_id)
+        pages = SheetPage.objects.filter(sheet_id=page.sheet_id)
+        current = pages.values_list('number', flat=True).get(pk=page.pk)
+        number = _clamp(number, pages.count())
+        if number == current:
+            return page
+        # The moved page takes its new number, the pages in between shift towards its old one
+        step = -1 if number > current else 1
+        _renumber(
+            pages.filter(number__range=sorted([current, number])),
+            Case(When(pk=page.pk, then=Value(number)), default=F('number') + step, output_field=IntegerField())
+        )
+        _pages_renumbered(page.sheet_id)
+    page.number = number
+    return page
+
+
+def reorder_pages(sheet, page_ids):
+    """
+    Renumber all the pages of a sheet 1..n in the order of `page_ids`, which
+    must list every page of the sheet exactly once. Raises ValueError otherwise.
+    """
+    with transaction.atomic():
+        _lock_sheet(sheet.pk)
+        pages = SheetPage.objects.filter(sheet=sheet)
+        if len(set(page_ids)) != len(page_ids) or set(page_ids) != set(pages.values_list('id', flat=True)):
+            raise ValueError('page_ids must list every page of the sheet exactly once')
+        if page_ids:
+            _renumber(
+                pages,
+                Case(
+                    *[When(pk=page_id, then=Value(position)) for position, page_id in enumerate(page_ids, 1)],
+                    output_field=IntegerField()
+                )
+            )
+        _pages_renumbered(sheet.pk)
+
+
+def delete_page(page, renumber=True):
+    """Delete a page, closing the gap in the numbering unless renumber is False"""
+    with transaction.atomic():
+        _lock_sheet(page.sheet_id)
+        sheet_id = page.sheet_id
+        number = SheetPage.objects.values_list('number', flat=True).get(pk=page.pk)
+        page.delete()
+        if renumber:
+            _renumber(SheetPage.objects.filter(sheet_id=sheet_id, number__gt=number), F('number') - 1)
+        # Page deletes send no signals (see production.signals)
+        _pages_renumbered(sheet_id)
@@ -0,0 +1,200 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are read with an indexed row comparison on the ordering key, e.g.
+`WHERE (created_at, id) < (%s, %s) ORDER BY created_at DESC, id DESC LIMIT n`,
+so response time stays flat however deep the client pages.
+
+Pagination is opt-in to keep existing clients working: it applies when the
+request has a `limit` or `cursor` parameter, otherwise the full list is returned.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from django.db.models import BooleanField, F, Func, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetAfter(Func):
+    """Row comparison `(f1, f2, ...) > (v1, v2, ...)` (or `<` when descending)"""
+    output_field = BooleanField()
+
+    def __init__(self, fields, values, descending=False):
+        self.operator = '<' if descending else '>'
+        super().__init__(*[F(field) for field in fields], *values)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sqls, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.extend(expression_params)
+        half = len(sqls) // 2
+        return f"({', '.join(sqls[:half])}) {self.operator} ({', '.join(sqls[half:])})", params
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward keyset pagination on `ordering`, which must end with a unique
+    field and use the same direction for every field.
+
+    Query parameters:
+    - limit: page size (default `page_size`, at most `max_page_size`)
+    - cursor: opaque position returned as `next` by the previous page
+    - count=true: also return the total number of rows matching the filters
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        descending = self.ordering[0].startswith('-')
+
+        queryset = queryset.order_by(*self.ordering)
+
+        self.count = None
+        if params.get(self.count_query_param, '').lower() == 'true':
+            self.count = queryset.count()
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            values = self.cursor_values(queryset.model, position)
+            queryset = queryset.filter(KeysetAfter(self.fields, values, descending))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.row_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def row_position(self, row):
+        position = []
+        for name in self.fields:
+            value = getattr(row, row._meta.get_field(name).attname)
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def cursor_values(self, model, position):
+        """Typed Values for the cursor position, so the comparison uses the column types"""
+        values = []
+        for name, raw in zip(self.fields, position):
+            field = model._meta.get_field(name)
+            try:
+                values.append(Value(field.to_python(raw), output_field=field))
+            except Exception:
+                raise NotFound('Invalid cursor')
+        return values
+
+    def encode_cursor(self, position):
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(position, list) or len(position) != len(self.fields):
+            raise NotFound('Invalid cursor')
+        return position
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link()}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results per page (enables pagination)',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Pagination cursor value (enables pagination)',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to true to include the total count',
+                'schema': {'type': 'boolean'},
+            },
+        ]
+
+
+class SheetPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class InteractiveElementPagination(KeysetPagination):
+    # page_id rather than page, so ordering doesn't expand to SheetPage's default ordering
+    ordering = ('page_id', 'z_order', 'id')
+    page_size = 200
+    max_page_size = 1000
+
+
+class MediaLibraryPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class ReferenceValuePagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class ProductionPlanningLinePagination(KeysetPagination):
+    ordering = ('entry_date', 'id')
+    page_size = 200
+    max_page_size = 1000
@@ -0,0 +1,56 @@
+"""
+Planning timeline lookups.
+
+A planning line occupies its ligne over the closed date range
+[entry_date, exit_date] (and, as scheduled, [scheduled_entry_date,
+scheduled_exit_date]). Both periods are indexed as `daterange` expressions
+with GiST indexes (see `ProductionPlanningLine.Meta`), so "what is on ligne L
+during [d1, d2]" is a range-overlap index scan that only reads the lines of
+the window, however long the planning history; "where is cabine C on date D"
+goes through the (cabine, ligne, entry_date) btree index.
+
+Queries must use `DateSpan` exactly as the indexes do for the planner to
+match them.
+"""
+from django.contrib.postgres.fields import DateRangeField
+from django.db.models import F, Func, IntegerField, Value
+from django.db.models.functions import Greatest, Least
+from psycopg2.extras import DateRange
+
+# Date fields of each period of a planning line
+PERIODS = {
+    'actual': ('entry_date', 'exit_date'),
+    'scheduled': ('scheduled_entry_date', 'scheduled_exit_date'),
+}
+
+
+class DateSpan(Func):
+    """Closed `daterange` between two date columns, tolerating an end before the start"""
+    function = 'daterange'
+    output_field = DateRangeField()
+
+    def __init__(self, start, end):
+        super().__init__(Least(F(start), F(end)), Greatest(F(start), F(end)), Value('[]'))
+
+
+class EpochDay(Func):
+    """Days since 1970-01-01 of a date column, as an integer (for NumPy)"""
+    template = "(%(expressions)s - DATE '1970-01-01')"
+    output_field = IntegerField()
+
+    def __init__(self, field):
+        super().__init__(F(field))
+
+
+def period(kind='actual'):
+    return DateSpan(*PERIODS[kind])
+
+
+def planning_during(queryset, start, end, kind='actual'):
+    """Planning lines whose period overlaps [start, end] (both included)"""
+    return queryset.alias(period=period(kind)).filter(period__overlap=DateRange(start, end, '[]'))
+
+
+def planning_on(queryset, day, kind='actual'):
+    """Planning lines whose period includes `day`"""
+    return queryset.alias(period=period(kind)).filter(period__contains=day)
@@ -0,0 +1,295 @@
+"""
+Bulk import of the production planning.
+
+The ERP exports the planning as CSV (or XLSX) with one line per cabine
+passage on a ligne:
+
+    cabine, ligne, ligne_sens, entry_date, exit_date[, scheduled_entry_date, scheduled_exit_date]
+
+where cabine and ligne are internal ids. `import_planning` streams the rows,
+validated, into a temporary staging table with `COPY`, resolves the internal
+ids with joins, and merges the result into `production_planning_line` with
+two set-based statements: an UPDATE of the lines whose values changed and an
+INSERT of the new ones. A cabine can pass several times on a ligne, so a
+planning line is identified by (cabine, ligne, scheduled_entry_date), the
+scheduled entry being fixed once planned (it defaults to the actual entry);
+the last row of the file for a line wins. Unchanged lines are not written, and nothing locks
+the table beyond the rows actually changed, so a full reimport is cheap.
+The report lists the overlaps and capacity violations the import leaves for
+the cabines and lignes of the file (see conflicts.py), dry runs included.
+"""
+import csv
+import io
+from datetime import date, datetime
+
+from django.db import DatabaseError, connection, transaction
+
+from .caching import invalidate
+from .conflicts import find_conflicts
+
+COLUMNS = ['cabine', 'ligne', 'ligne_sens', 'entry_date', 'exit_date', 'scheduled_entry_date', 'scheduled_exit_date']
+REQUIRED_COLUMNS = COLUMNS[:5]
+# Header aliases of the ERP exports
+ALIASES = {'cabine_internal_id': 'cabine', 'ligne_internal_id': 'ligne', 'sens': 'ligne_sens'}
+SENS_VALUES = {'D', 'G', '-'}
+DATE_FORMATS = ['%d/%m/%Y', '%d/%m/%y', '%Y/%m/%d']
+MAX_ERRORS = 100
+
+PLANNING_FIELDS = ['ligne_sens', 'entry_date', 'exit_date', 'scheduled_entry_date', 'scheduled_exit_date']
+
+STAGING_SQL = """
+CREATE TEMPORARY TABLE planning_import (
+    line integer, cabine text, ligne text, ligne_sens varchar(1),
+    entry_date date, exit_date date, scheduled_entry_date date, scheduled_exit_date date
+) ON COMMIT DROP
+"""
+# Internal ids of the file matching exactly one cabine / ligne (internal ids
+# aren't unique: ambiguous ones are rejected like unknown ones)
+MATCHES_SQL = """
+WITH cabines AS (
+    SELECT internal_id, min(id) AS id, count(*) AS matches FROM cabine
+    WHERE internal_id IN (SELECT cabine FROM planning_import) GROUP BY internal_id
+), lignes AS (
+    SELECT internal_id, min(id) AS id, count(*) AS matches FROM ligne
+    WHERE internal_id IN (SELECT ligne FROM planning_import) GROUP BY internal_id
+)
+"""
+# Staged rows with resolved ids, the last row of the file for each line
+RESOLVE_SQL = """
+CREATE TEMPORARY TABLE planning_resolved ON COMMIT DROP AS
+""" + MATCHES_SQL + """
+SELECT DISTINCT ON (c.id, l.id, s.scheduled_entry_date) c.id AS cabine_id, l.id AS ligne_id, {fields}
+FROM planning_import s
+JOIN cabines c ON c.internal_id = s.cabine AND c.matches = 1
+JOIN lignes l ON l.internal_id = s.ligne AND l.matches = 1
+ORDER BY c.id, l.id, s.scheduled_entry_date, s.line DESC
+"""
+UNRESOLVED_SQL = MATCHES_SQL + """
+SELECT s.line, s.cabine, s.ligne, COALESCE(c.matches, 0), COALESCE(l.matches, 0)
+FROM planning_import s
+LEFT JOIN cabines c ON c.internal_id = s.cabine
+LEFT JOIN lignes l ON l.internal_id = s.ligne
+WHERE c.matches IS DISTINCT FROM 1 OR l.matches IS DISTINCT FROM 1
+ORDER BY s.line
+"""
+UPDATE_SQL = """
+WITH updated AS (
+    UPDATE production_planning_line p SET {assignments}
+    FROM planning_resolved r
+    WHERE p.cabine_id = r.cabine_id AND p.ligne_id = r.ligne_id AND p.scheduled_entry_date = r.scheduled_entry_date
+        AND ({current}) IS DISTINCT FROM ({imported})
+    RETURNING p.cabine_id, p.ligne_id, p.scheduled_entry_date
+)
+SELECT count(*), count(DISTINCT (cabine_id, ligne_id, scheduled_entry_date)) FROM updated
+"""
+INSERT_SQL = """
+INSERT INTO production_planning_line (cabine_id, ligne_id, {fields})
+SELECT r.cabine_id, r.ligne_id, {imported}
+FROM planning_resolved r
+WHERE NOT EXISTS (
+    SELECT 1 FROM production_planning_line p
+    WHERE p.cabine_id = r.cabine_id AND p.ligne_id = r.ligne_id AND p.scheduled_entry_date = r.scheduled_entry_date
+)
+"""
+
+
+class PlanningImportError(ValueError):
+    """The file can't be imported at all (format, missing columns)"""
+
+
+class _LineStream(io.RawIOBase):
+    """Readable binary stream over an iterator of text lines, for COPY"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.buffer = b''
+        # psycopg2 reports errors raised while reading as a failed COPY
+        self.error = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self.buffer:
+            try:
+                line = next(self.lines, None)
+            except Exception as e:
+                self.error = e
+                raise
+            if line is None:
+                return 0
+            self.buffer = line.encode('utf-8')
+        size = min(len(target), len(self.buffer))
+        target[:size], self.buffer = self.buffer[:size], self.buffer[size:]
+        return size
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = (value or '').strip()
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f'invalid date "{value}"')
+
+
+def _csv_rows(stream, delimiter=None):
+    """Rows of a CSV text stream; the delimiter is sniffed from the header when not given"""
+    header = stream.readline()
+    if delimiter is None:
+        delimiter = max([',', ';', '\t'], key=header.count)
+    yield next(csv.reader([header], delimiter=delimiter), [])
+    yield from csv.reader(stream, delimiter=delimiter)
+
+
+def _xlsx_rows(binary_stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise PlanningImportError('Importing XLSX files requires openpyxl, export the planning as CSV instead')
+    sheet = load_workbook(binary_stream, read_only=True, data_only=True).active
+    for row in sheet.iter_rows(values_only=True):
+        yield ['' if value is None else value for value in row]
+
+
+def _header_positions(header):
+    names = [ALIASES.get(str(name).strip().lower(), str(name).strip().lower()) for name in header]
+    missing = [column for column in REQUIRED_COLUMNS if column not in names]
+    if missing:
+        raise PlanningImportError(f"Missing columns: {', '.join(missing)}")
+    return {column: names.index(column) for column in COLUMNS if column in names}
+
+
+def _staged_lines(rows, positions, errors, counts):
+    """Validated rows as CSV lines for COPY; invalid rows go to `errors`"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line, row in enumerate(rows, 2):
+        if not any(str(value).strip() for value in row):
+            continue
+        counts['rows'] += 1
+        values = {column: row[position] if position < len(row) else '' for column, position in positions.items()}
+        try:
+            cabine, ligne = str(values['cabine']).strip(), str(values['ligne']).strip()
+            sens = str(values['ligne_sens']).strip().upper()
+            if not cabine or not ligne:
+                raise ValueError('cabine and ligne are required')
+            if sens not in SENS_VALUES:
+                raise ValueError(f'invalid ligne_sens "{sens}"')
+            entry_date, exit_date = _parse_date(values['entry_date']), _parse_date(values['exit_date'])
+            # Without scheduled dates, the plan is the actual dates
+            scheduled_entry_date = _parse_date(values['scheduled_entry_date']) if str(values.get('scheduled_entry_date', '')).strip() else entry_date
+            scheduled_exit_date = _parse_date(values['scheduled_exit_date']) if str(values.get('scheduled_exit_date', '')).strip() else exit_date
+        except ValueError as e:
+            counts['invalid'] += 1
+            if len(errors) < MAX_ERRORS:
+                errors.append({'line': line, 'error': str(e)})
+            continue
+        writer.writerow([line, cabine, ligne, sens, entry_date, exit_date, scheduled_entry_date, scheduled_exit_date])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def import_planning(stream, file_format='csv', delimiter=None, dry_run=False):
+    """
+    Import a planning export (binary stream) and merge it into the planning.
+
+    Returns the counts of rows read, invalid and unresolved rows (unknown
+    cabine or ligne), inserted and updated planning lines and unchanged
+    lines of the file,
+    with the first errors, and the planning conflicts of the cabines and
+    lignes of the file (see `find_conflicts`). Raises PlanningImportError
+    when the file can't be read. With dry_run, nothing is written.
+    """
+    if file_format == 'xlsx':
+        rows = _xlsx_rows(stream)
+    elif file_format == 'csv':
+        rows = _csv_rows(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''), delimiter)
+    else:
+        raise PlanningImportError(f'Unsupported format "{file_format}"')
+    try:
+        positions = _header_positions(next(rows, []))
+    except UnicodeDecodeError:
+        raise PlanningImportError('The file is not UTF-8 encoded text')
+
+    errors = []
+    counts = {'rows': 0, 'invalid': 0}
+    lines = _LineStream(_staged_lines(rows, positions, errors, counts))
+    quote = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(STAGING_SQL)
+        try:
+            cursor.copy_expert(
+                'COPY planning_import FROM STDIN WITH (FORMAT csv)', io.BufferedReader(lines, buffer_size=1 << 16)
+            )
+        except DatabaseError:
+            if isinstance(lines.error, UnicodeDecodeError):
+                raise PlanningImportError('The file is not UTF-8 encoded text')
+            if lines.error is not None:
+                raise lines.error
+            raise
+
+        # Temporary tables have no statistics until analyzed
+        cursor.execute('ANALYZE planning_import')
+        cursor.execute(UNRESOLVED_SQL)
+        unresolved = cursor.fetchall()
+        for line, cabine, ligne, cabine_matches, ligne_matches in unresolved[:max(MAX_ERRORS - len(errors), 0)]:
+            problems = [
+                f'{"unknown" if matches == 0 else "ambiguous"} {kind} "{internal_id}"'
+                for kind, internal_id, matches in [('cabine', cabine, cabine_matches), ('ligne', ligne, ligne_matches)]
+                if matches != 1
+            ]
+            errors.append({'line': line, 'error': ', '.join(problems)})
+
+        fields = ', '.join(quote(field) for field in PLANNING_FIELDS)
+        cursor.execute(RESOLVE_SQL.format(fields=', '.join(f's.{quote(field)}' for field in PLANNING_FIELDS)))
+        resolved = cursor.rowcount
+        cursor.execute('ANALYZE planning_resolved')
+
+        cursor.execute(UPDATE_SQL.format(
+            assignments=', '.join(f'{quote(field)} = r.{quote(field)}' for field in PLANNING_FIELDS),
+            current=', '.join(f'p.{quote(field)}' for field in PLANNING_FIELDS),
+            imported=', '.join(f'r.{quote(field)}' for field in PLANNING_FIELDS),
+        ))
+        # Rows written, and lines of the file they belong to
+        updated, updated_lines = cursor.fetchone()
+        cursor.execute(INSERT_SQL.format(
+            fields=fields,
+            imported=', '.join(f'r.{quote(field)}' for field in PLANNING_FIELDS),
+        ))
+        inserted = cursor.rowcount
+        # Conflicts the file leaves in the planning, for its cabines and lignes
+        cursor.execute('SELECT array_agg(DISTINCT cabine_id), array_agg(DISTINCT ligne_id) FROM planning_resolved')
+        cabines, lignes = cursor.fetchone()
+        conflicts = find_conflicts(cabines=cabines or [], lignes=lignes or [])
+        # ON COMMIT DROP doesn't apply inside an outer transaction
+        cursor.execute('DROP TABLE planning_import, planning_resolved')
+
+        if dry_run:
+            transaction.set_rollback(True)
+        elif inserted or updated:
+            # Set-based writes bypass the signals
+            invalidate('planning')
+
+    errors.sort(key=lambda error: error['line'])
+    return {
+        'rows': counts['rows'],
+        'invalid': counts['invalid'],
+        'unresolved': len(unresolved),
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': resolved - inserted - updated_lines,
+        'dry_run': dry_run,
+        'errors': errors,
+        'conflicts': conflicts,
+    }
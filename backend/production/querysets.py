@@ -0,0 +1,52 @@
+"""
+Shared querysets with annotated counts.
+
+Serializers read `pages_count`, `elements_count` and `media_count` from these
+annotations when present, so list endpoints don't run one COUNT per row.
+"""
+from django.db.models import Count, Prefetch
+
+from .models import Sheet, SheetPage, InteractiveElement, MediaTag
+
+
+def sheets_with_counts(queryset=None):
+    """Sheets annotated with `pages_count`"""
+    if queryset is None:
+        queryset = Sheet.objects.all()
+    return queryset.annotate(pages_count=Count('pages', distinct=True))
+
+
+def pages_with_counts(queryset=None):
+    """Pages annotated with `elements_count`"""
+    if queryset is None:
+        queryset = SheetPage.objects.all()
+    return queryset.annotate(elements_count=Count('elements', distinct=True))
+
+
+def media_tags_with_counts(queryset=None):
+    """Media tags annotated with `media_count`"""
+    if queryset is None:
+        queryset = MediaTag.objects.all()
+    return queryset.annotate(media_count=Count('media_items', distinct=True))
+
+
+def prefetch_tags_with_counts(lookup='tags'):
+    """Prefetch of media tags (at `lookup`) annotated with `media_count`"""
+    return Prefetch(lookup, queryset=media_tags_with_counts())
+
+
+def elements_with_details(queryset=None):
+    """
+    Elements with everything InteractiveElementSerializer walks through
+    (creator, reference and its fields, field values, images and their tags)
+    """
+    if queryset is None:
+        queryset = InteractiveElement.objects.all()
+    return queryset.select_related(
+        'created_by', 'reference_value__created_by'
+    ).prefetch_related(
+        'field_values__value_image__created_by',
+        prefetch_tags_with_counts('field_values__value_image__tags'),
+        'reference_value__fields__value_image__created_by',
+        prefetch_tags_with_counts('reference_value__fields__value_image__tags'),
+    )
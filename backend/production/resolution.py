@@ -0,0 +1,126 @@
+"""
+Sheet resolution for a cabine at a poste.
+
+The shop-floor question "cabine X is at poste Y: which sheet do I show?" goes
+cabine -> variante, poste -> ligne, the cabine's planning line on that ligne ->
+sens, and the documentation link of (variante, poste, sens) -> sheet.
+`resolve_cabine_at_poste` answers it with one query using the
+(cabine, ligne, entry_date) planning and (variante, poste, sens) documentation
+indexes. The served document (sheet, optionally a page bundle) is then cached
+per (variante, poste, sens) by `build_resolution`, live or, for READER users,
+as last published like the sheet endpoints serve it.
+
+Documentation links with sens '-' apply to both sens; a link for the exact
+sens wins over it.
+"""
+from django.db import connection
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from .bundles import build_page_bundle
+from .caching import cached_data
+from .languages import project_language
+from .models import Sheet, SheetPage
+from .querysets import sheets_with_counts
+from .serializers import SheetListSerializer
+from .snapshots import get_published_document, published_page_bundle, published_sheet
+
+ANY_SENS = '-'
+
+# The planning line of the cabine on the poste's ligne running on the date,
+# else its latest one starting before the date, else its first one
+RESOLVE_SQL = """
+SELECT c.variante_gamme_id, p.ligne_id, COALESCE(%(sens)s, pl.ligne_sens), d.sheet_id
+FROM cabine c
+CROSS JOIN poste p
+LEFT JOIN LATERAL (
+    SELECT ligne_sens FROM production_planning_line
+    WHERE cabine_id = c.id AND ligne_id = p.ligne_id
+    ORDER BY entry_date <= %(date)s DESC, exit_date >= %(date)s DESC,
+        CASE WHEN entry_date <= %(date)s THEN entry_date END DESC NULLS LAST, entry_date
+    LIMIT 1
+) pl ON true
+LEFT JOIN LATERAL (
+    SELECT sheet_id FROM poste_variante_documentation
+    WHERE "varianteGamme_id" = c.variante_gamme_id AND poste_id = p.id
+        AND ligne_sens IN (COALESCE(%(sens)s, pl.ligne_sens, %(any)s), %(any)s)
+    ORDER BY ligne_sens = %(any)s, id
+    LIMIT 1
+) d ON true
+WHERE c.id = %(cabine)s AND p.id = %(poste)s
+"""
+
+
+def resolve_cabine_at_poste(cabine_id, poste_id, on_date, sens=None):
+    """
+    Resolve the sheet documenting a cabine at a poste on a date.
+
+    `sens` overrides the sens from the planning. Returns None when the cabine
+    or the poste doesn't exist, else {cabine, poste, variante, ligne,
+    ligne_sens, sheet} where ligne_sens is None without planning line (only
+    links for both sens match then) and sheet is None when no link matches.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(RESOLVE_SQL, {
+            'cabine': cabine_id, 'poste': poste_id, 'date': on_date, 'sens': sens, 'any': ANY_SENS,
+        })
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    variante_id, ligne_id, ligne_sens, sheet_id = row
+    return {
+        'cabine': cabine_id,
+        'poste': poste_id,
+        'variante': variante_id,
+        'ligne': ligne_id,
+        'ligne_sens': ligne_sens,
+        'sheet': sheet_id,
+    }
+
+
+def build_resolution(resolution, context, bundle_page=None, published=False):
+    """
+    Document served for a resolution with a sheet: the sheet, plus the render
+    bundle of page number `bundle_page` when given. With `published` (READER
+    users), both come from the latest published snapshot when the sheet has
+    one. Cached per (variante, poste, sens) until the sheet (or what its pages
+    embed) changes or is published. Returns (document, cache hit).
+    """
+    language = context.get('lang')
+    request = context.get('request')
+    sheet_id = resolution['sheet']
+
+    def build_published(snapshot):
+        document = {'sheet': published_sheet(snapshot['document'])}
+        if bundle_page is not None:
+            page = next((page for page in snapshot['document']['pages'] if page['number'] == bundle_page), None)
+            if page is None:
+                raise Http404('Page not published')
+            document['bundle'] = published_page_bundle(snapshot['document'], page['id'])
+        return document
+
+    def build():
+        snapshot = get_published_document(sheet_id, language) if published else None
+        if snapshot is not None:
+            return build_published(snapshot)
+        sheets = sheets_with_counts(Sheet.objects.select_related('created_by'))
+        document = {'sheet': SheetListSerializer(get_object_or_404(sheets, pk=sheet_id), context=context).data}
+        if bundle_page is not None:
+            pages = SheetPage.objects.select_related('sheet', 'created_by')
+            if language:
+                pages = project_language(pages, language)
+            page = get_object_or_404(pages, sheet_id=sheet_id, number=bundle_page)
+            document['bundle'] = build_page_bundle(page, context=context)
+        return document
+
+    parts = [
+        request.get_host() if request is not None else '',
+        resolution['variante'], resolution['poste'], resolution['ligne_sens'], bundle_page, language,
+        'published' if published else 'live',
+    ]
+    # Page and element changes touch their sheet, publishing bumps it too;
+    # bundles also embed references and media
+    dependencies = [f'sheet:{sheet_id}']
+    if bundle_page is not None:
+        dependencies += ['references', 'media']
+    return cached_data('resolve', parts, dependencies, build)
@@ -1,12 +1,33 @@
+from collections import Counter
+
 from rest_framework import serializers
 from .models import (
-    Sheet, SheetPage, InteractiveElement, MediaTag, MediaLibrary,
+    Sheet, SheetPage, InteractiveElement, MediaTag, MediaLibrary, SheetSnapshot,
     ReferenceValue, FieldDefinitionValue, ReferenceHistory,
-    Boat, GammeCabine, VarianteGamme, Cabine, Ligne, Poste
+    Boat, GammeCabine, VarianteGamme, Cabine, Ligne, Poste, ProductionPlanningLine
 )
+from .caching import invalidate
+from .languages import PROJECTED_FIELDS
+from .signals import touch_elements, touch_reference_users
+
+
+class LanguageProjectedSerializerMixin:
+    """
+    When the serializer context has a `lang`, multilingual JSON fields are read
+    from the `<field>_lang` annotations added by `languages.project_language`
+    instead of the full multilingual blobs.
+    """
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('lang'):
+            for name in PROJECTED_FIELDS.get(self.Meta.model.__name__, {}):
+                if name in fields:
+                    fields[name] = serializers.JSONField(source=f'{name}_lang', read_only=True)
+        return fields
 
 
-class InteractiveElementSerializer(serializers.ModelSerializer):
+class InteractiveElementSerializer(LanguageProjectedSerializerMixin, serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     reference = serializers.SerializerMethodField()
     field_values = serializers.SerializerMethodField()
@@ -78,6 +99,7 @@ class InteractiveElementSerializer(serializers.ModelSerializer):
         if field_values_data is not None:
             # Delete existing field values
             instance.field_values.all().delete()
+            touch_elements([instance.pk])
             
             # Create new field values
             for field_data in field_values_data:
@@ -96,7 +118,7 @@ class InteractiveElementSerializer(serializers.ModelSerializer):
         return instance
 
 
-class SheetPageSerializer(serializers.ModelSerializer):
+class SheetPageSerializer(LanguageProjectedSerializerMixin, serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     elements = InteractiveElementSerializer(many=True, read_only=True)
     elements_count = serializers.SerializerMethodField()
@@ -118,7 +140,9 @@ class SheetPageSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by', 'created_by_username']
     
     def get_elements_count(self, obj):
-        return obj.elements.count()
+        # Annotated by the viewsets (see querysets.pages_with_counts)
+        count = getattr(obj, 'elements_count', None)
+        return count if count is not None else obj.elements.count()
     
     def create(self, validated_data):
         # Automatically set created_by from request user
@@ -147,7 +171,9 @@ class SheetSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by', 'created_by_username']
     
     def get_pages_count(self, obj):
-        return obj.pages.count()
+        # Annotated by the viewsets (see querysets.sheets_with_counts)
+        count = getattr(obj, 'pages_count', None)
+        return count if count is not None else obj.pages.count()
     
     def create(self, validated_data):
         # Automatically set created_by from request user
@@ -175,10 +201,30 @@ class SheetListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by', 'created_by_username']
     
     def get_pages_count(self, obj):
-        return obj.pages.count()
+        # Annotated by the viewsets (see querysets.sheets_with_counts)
+        count = getattr(obj, 'pages_count', None)
+        return count if count is not None else obj.pages.count()
+
+
+class SheetSnapshotSerializer(serializers.ModelSerializer):
+    """Published snapshot metadata (without the frozen documents)"""
+    published_by_username = serializers.CharField(source='published_by.username', read_only=True)
+    
+    class Meta:
+        model = SheetSnapshot
+        fields = [
+            'id',
+            'sheet',
+            'version',
+            'content_hash',
+            'published_at',
+            'published_by',
+            'published_by_username'
+        ]
+        read_only_fields = fields
 
 
-class SheetPageListSerializer(serializers.ModelSerializer):
+class SheetPageListSerializer(LanguageProjectedSerializerMixin, serializers.ModelSerializer):
     """Simplified serializer for list views without nested elements"""
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     sheet_name = serializers.CharField(source='sheet.name', read_only=True)
@@ -201,10 +247,12 @@ class SheetPageListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by', 'created_by_username']
     
     def get_elements_count(self, obj):
-        return obj.elements.count()
+        # Annotated by the viewsets (see querysets.pages_with_counts)
+        count = getattr(obj, 'elements_count', None)
+        return count if count is not None else obj.elements.count()
 
 
-class InteractiveElementListSerializer(serializers.ModelSerializer):
+class InteractiveElementListSerializer(LanguageProjectedSerializerMixin, serializers.ModelSerializer):
     """Simplified serializer for list views"""
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     page_number = serializers.IntegerField(source='page.number', read_only=True)
@@ -240,7 +288,9 @@ class MediaTagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
     
     def get_media_count(self, obj):
-        return obj.media_items.count()
+        # Annotated by the viewsets (see querysets.media_tags_with_counts)
+        count = getattr(obj, 'media_count', None)
+        return count if count is not None else obj.media_items.count()
 
 
 # Backward compatibility alias
@@ -396,6 +446,13 @@ class FieldDefinitionValueSerializer(serializers.ModelSerializer):
         return obj.get_value()
 
 
+class SyncFieldValueSerializer(FieldDefinitionValueSerializer):
+    """Instance field value in the delta sync feed, with the element it belongs to"""
+    
+    class Meta(FieldDefinitionValueSerializer.Meta):
+        fields = FieldDefinitionValueSerializer.Meta.fields + ['interactive_element']
+
+
 class ReferenceHistorySerializer(serializers.ModelSerializer):
     """Serializer for reference history"""
     changed_by_username = serializers.CharField(source='changed_by.username', read_only=True)
@@ -495,6 +552,8 @@ class ReferenceValueSerializer(serializers.ModelSerializer):
             
             # Delete existing fields
             instance.fields.all().delete()
+            invalidate('references')
+            touch_reference_users(instance.pk)
             
             # Create new fields
             for field_data in fields_data:
@@ -543,11 +602,13 @@ class ReferenceValueListSerializer(serializers.ModelSerializer):
     
     def get_fields_preview(self, obj):
         """Get a preview of the first translatable field (usually 'reference')"""
+        # Filter in Python so the viewset's prefetched fields are reused
+        ref_fields = [field for field in obj.fields.all() if field.name == 'reference']
         # Try to get 'reference' field in English first
-        ref_field = obj.fields.filter(name='reference', language='en').first()
+        ref_field = next((field for field in ref_fields if field.language == 'en'), None)
         if not ref_field:
             # Fallback to any reference field
-            ref_field = obj.fields.filter(name='reference').first()
+            ref_field = ref_fields[0] if ref_fields else None
         
         if ref_field:
             return {
@@ -598,7 +659,7 @@ class LigneSerializer(serializers.ModelSerializer):
     """Serializer for Ligne model"""
     class Meta:
         model = Ligne
-        fields = ['id', 'internal_id', 'name']
+        fields = ['id', 'internal_id', 'name', 'capacity']
 
 
 class PosteSerializer(serializers.ModelSerializer):
@@ -608,3 +669,231 @@ class PosteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Poste
         fields = ['id', 'internal_id', 'ligne', 'ligne_name']
+
+
+class ProductionPlanningLineSerializer(serializers.ModelSerializer):
+    """Serializer for ProductionPlanningLine model"""
+    cabine_internal_id = serializers.CharField(source='cabine.internal_id', read_only=True)
+    variante_gamme = serializers.IntegerField(source='cabine.variante_gamme_id', read_only=True)
+    ligne_name = serializers.CharField(source='ligne.name', read_only=True)
+    
+    class Meta:
+        model = ProductionPlanningLine
+        fields = [
+            'id',
+            'cabine',
+            'cabine_internal_id',
+            'variante_gamme',
+            'ligne',
+            'ligne_name',
+            'ligne_sens',
+            'entry_date',
+            'exit_date',
+            'scheduled_entry_date',
+            'scheduled_exit_date',
+        ]
+
+
+# Page bundle serializers: flat, normalized representation for the canvas viewer.
+# These only read prefetched/related ids so the bundle stays at a fixed query count.
+class BundleFieldValueSerializer(serializers.ModelSerializer):
+    """Field value without nested image: images are referenced by id in the bundle media map"""
+    value = serializers.SerializerMethodField()
+    value_image = serializers.IntegerField(source='value_image_id', read_only=True)
+    
+    class Meta:
+        model = FieldDefinitionValue
+        fields = [
+            'id',
+            'name',
+            'type',
+            'language',
+            'value',
+            'value_string',
+            'value_int',
+            'value_float',
+            'value_image'
+        ]
+    
+    def get_value(self, obj):
+        if obj.type == 'image':
+            return obj.value_image_id
+        return obj.get_value()
+
+
+class BundleElementSerializer(LanguageProjectedSerializerMixin, serializers.ModelSerializer):
+    """Interactive element with its instance field values (must be prefetched)"""
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    field_values = BundleFieldValueSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = InteractiveElement
+        fields = [
+            'id',
+            'page',
+            'business_id',
+            'type',
+            'z_order',
+            'descriptions',
+            'konva_jsons',
+            'reference_value',
+            'field_values',
+            'created_at',
+            'updated_at',
+            'created_by',
+            'created_by_username'
+        ]
+
+
+class BundleReferenceSerializer(serializers.ModelSerializer):
+    """Reference value with its template fields (must be prefetched)"""
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    fields = BundleFieldValueSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = ReferenceValue
+        fields = [
+            'id',
+            'type',
+            'icon',
+            'version',
+            'created_at',
+            'updated_at',
+            'created_by',
+            'created_by_username',
+            'fields'
+        ]
+
+
+class BundleMediaTagSerializer(serializers.ModelSerializer):
+    """Tag reference without the per-tag media count"""
+    class Meta:
+        model = MediaTag
+        fields = ['id', 'name']
+
+
+class BundleMediaSerializer(MediaLibraryListSerializer):
+    """Media item for the page bundle (tags must be prefetched)"""
+    tags = BundleMediaTagSerializer(many=True, read_only=True)
+
+
+class BundlePageSerializer(LanguageProjectedSerializerMixin, serializers.ModelSerializer):
+    """Page header for the page bundle"""
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    sheet_name = serializers.CharField(source='sheet.name', read_only=True)
+    sheet_business_id = serializers.CharField(source='sheet.business_id', read_only=True)
+    
+    class Meta:
+        model = SheetPage
+        fields = [
+            'id',
+            'sheet',
+            'sheet_name',
+            'sheet_business_id',
+            'number',
+            'description',
+            'created_at',
+            'updated_at',
+            'created_by',
+            'created_by_username'
+        ]
+
+
+# Bulk element sync (see element_sync.py)
+
+class FieldValueDataSerializer(serializers.Serializer):
+    """Instance field value of a synced element"""
+    name = serializers.CharField(max_length=100)
+    type = serializers.ChoiceField(choices=['string', 'int', 'float', 'image'])
+    language = serializers.CharField(max_length=2, required=False, allow_null=True, allow_blank=True)
+    value_string = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    value_int = serializers.IntegerField(required=False, allow_null=True)
+    value_float = serializers.FloatField(required=False, allow_null=True)
+    value_image = serializers.IntegerField(required=False, allow_null=True)
+
+
+class ElementSyncItemSerializer(serializers.Serializer):
+    """Desired state of one element, matched to existing ones by business_id (type is required to create one)"""
+    business_id = serializers.CharField(max_length=100)
+    type = serializers.CharField(max_length=50, required=False)
+    z_order = serializers.IntegerField(required=False)
+    descriptions = serializers.JSONField(required=False)
+    konva_jsons = serializers.JSONField(required=False)
+    reference_value = serializers.IntegerField(required=False, allow_null=True)
+    field_values_data = FieldValueDataSerializer(many=True, required=False)
+
+
+class ElementSyncSerializer(serializers.Serializer):
+    """
+    Element set of a page.
+    
+    With replace=true (default), `elements` is the full desired set and elements
+    missing from it are deleted. With replace=false, `elements` are upserted and
+    only the business ids listed in `deleted` are removed.
+    """
+    elements = ElementSyncItemSerializer(many=True)
+    deleted = serializers.ListField(child=serializers.CharField(max_length=100), required=False, default=list)
+    replace = serializers.BooleanField(required=False, default=True)
+    
+    def validate_elements(self, elements):
+        counts = Counter(element['business_id'] for element in elements)
+        duplicates = sorted(business_id for business_id, count in counts.items() if count > 1)
+        if duplicates:
+            raise serializers.ValidationError(f"Duplicate business_id: {', '.join(duplicates)}")
+        
+        reference_ids = {element['reference_value'] for element in elements if element.get('reference_value')}
+        if reference_ids:
+            found = set(ReferenceValue.objects.filter(id__in=reference_ids).values_list('id', flat=True))
+            missing = sorted(reference_ids - found)
+            if missing:
+                raise serializers.ValidationError(f"Unknown reference_value: {', '.join(map(str, missing))}")
+        return elements
+
+
+class ElementLanguagePatchSerializer(serializers.Serializer):
+    """One language of an element's multilingual fields"""
+    konva_json = serializers.JSONField(required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Provide konva_json and/or description.")
+        return attrs
+
+
+# Page numbering (see page_order.py)
+
+class PageInsertSerializer(serializers.Serializer):
+    """Page to insert at a position, shifting the following pages"""
+    sheet = serializers.PrimaryKeyRelatedField(queryset=Sheet.objects.all())
+    number = serializers.IntegerField(min_value=1)
+    description = serializers.JSONField(required=False)
+
+
+class PageMoveSerializer(serializers.Serializer):
+    """New position of a page"""
+    number = serializers.IntegerField(min_value=1)
+
+
+class PageReorderSerializer(serializers.Serializer):
+    """New order of all the pages of a sheet"""
+    sheet = serializers.PrimaryKeyRelatedField(queryset=Sheet.objects.all())
+    page_ids = serializers.ListField(child=serializers.IntegerField())
+
+
+class SheetCloneSerializer(serializers.Serializer):
+    """Identity of the copy and what to carry over"""
+    name = serializers.CharField(max_length=200)
+    business_id = serializers.CharField(max_length=100)
+    include_documentation = serializers.BooleanField(required=False, default=False)
+    variante_gamme = serializers.PrimaryKeyRelatedField(queryset=VarianteGamme.objects.all(), required=False, allow_null=True)
+    
+    def validate_business_id(self, value):
+        if Sheet.objects.filter(business_id=value).exists():
+            raise serializers.ValidationError("A sheet with this business_id already exists.")
+        return value
+    
+    def validate(self, attrs):
+        if attrs.get('variante_gamme') is not None and not attrs.get('include_documentation'):
+            raise serializers.ValidationError({'variante_gamme': "Only applies with include_documentation."})
+        return attrs
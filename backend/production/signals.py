@@ -0,0 +1,195 @@
+"""
+Change propagation between related rows.
+
+Reads of a sheet, page or element include their children (pages, elements,
+field values, references, media). To keep `updated_at` a valid validator for
+those representations, a change to a child "touches" (bumps `updated_at` of)
+every row whose representation includes it, with set-based UPDATEs that don't
+fire signals themselves. The same helpers invalidate the matching response
+cache versions (see `production.caching`).
+
+Code that writes with bulk operations (which bypass signals) should call the
+`touch_*` helpers directly.
+
+Pages, elements and field values have no delete receivers: any receiver
+would make Django load and delete every cascaded row one by one (no fast
+delete) and touch the parents once per row. Their deletes are propagated
+once by whoever deletes the root: the Sheet pre_delete receiver, `delete_page`,
+the element destroy view, the serializers replacing field values and the
+element sync.
+"""
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .caching import invalidate
+from .models import (
+    Sheet, SheetPage, InteractiveElement, FieldDefinitionValue,
+    ReferenceValue, MediaLibrary, MediaTag, SheetSnapshot, PosteVarianteDocumentation,
+    Boat, GammeCabine, VarianteGamme, Cabine, Ligne, Poste, ProductionPlanningLine
+)
+
+
+def touch_sheets(sheet_ids):
+    """Bump the given sheets"""
+    sheet_ids = list(sheet_ids)
+    if not sheet_ids:
+        return
+    Sheet.objects.filter(id__in=sheet_ids).update(updated_at=timezone.now())
+    invalidate('sheets', *[f'sheet:{sheet_id}' for sheet_id in sheet_ids])
+
+
+def touch_pages(page_ids):
+    """Bump the given pages and their sheets"""
+    page_ids = list(page_ids)
+    if not page_ids:
+        return
+    sheet_ids = set(SheetPage.objects.filter(id__in=page_ids).order_by().values_list('sheet_id', flat=True))
+    SheetPage.objects.filter(id__in=page_ids).update(updated_at=timezone.now())
+    # Page detail responses depend on their sheet, bumped below
+    invalidate('pages')
+    touch_sheets(sheet_ids)
+
+
+def touch_elements(elements):
+    """Bump the given elements (queryset or ids), their pages and sheets"""
+    if not hasattr(elements, 'values_list'):
+        elements = InteractiveElement.objects.filter(id__in=list(elements))
+    rows = list(elements.order_by().values_list('id', 'page_id'))
+    if not rows:
+        return
+    InteractiveElement.objects.filter(id__in=[row[0] for row in rows]).update(updated_at=timezone.now())
+    # Element detail responses depend on their sheet, bumped with the pages
+    invalidate('elements')
+    touch_pages({row[1] for row in rows})
+
+
+def touch_reference_users(reference_id):
+    """Bump the elements (and their pages and sheets) that embed a reference"""
+    touch_elements(InteractiveElement.objects.filter(reference_value_id=reference_id))
+
+
+def touch_media_users(media_ids):
+    """Bump the elements (and their pages and sheets) that embed one of these media"""
+    media_ids = list(media_ids)
+    if not media_ids:
+        return
+    touch_elements(InteractiveElement.objects.filter(field_values__value_image_id__in=media_ids).distinct())
+    touch_elements(InteractiveElement.objects.filter(reference_value__fields__value_image_id__in=media_ids).distinct())
+
+
+@receiver(post_save, sender=Sheet)
+def sheet_changed(sender, instance, **kwargs):
+    # Page and element lists show the sheet name, page bundles too
+    invalidate('sheets', 'pages', 'elements', f'sheet:{instance.pk}')
+
+
+@receiver(pre_delete, sender=Sheet)
+def sheet_deleted(sender, instance, **kwargs):
+    # Pages and elements are deleted with the sheet, without signals of their own
+    invalidate('sheets', 'pages', 'elements', f'sheet:{instance.pk}')
+
+
+@receiver(post_save, sender=SheetSnapshot)
+def sheet_published(sender, instance, **kwargs):
+    # Readers are served the latest published snapshot
+    invalidate(f'sheet:{instance.sheet_id}')
+
+
+@receiver([post_save, post_delete], sender=PosteVarianteDocumentation)
+def documentation_changed(sender, instance, **kwargs):
+    # Sheet lists are filtered through the documentation links
+    invalidate('sheets', 'documentation')
+
+
+@receiver(post_save, sender=SheetPage)
+def page_changed(sender, instance, **kwargs):
+    # Element lists show the page number
+    invalidate('pages', 'elements')
+    touch_sheets([instance.sheet_id])
+
+
+@receiver(post_save, sender=InteractiveElement)
+def element_changed(sender, instance, **kwargs):
+    invalidate('elements')
+    touch_pages([instance.page_id])
+
+
+@receiver(post_save, sender=FieldDefinitionValue)
+def field_value_changed(sender, instance, **kwargs):
+    if instance.interactive_element_id:
+        touch_elements([instance.interactive_element_id])
+    if instance.reference_id:
+        invalidate('references')
+        touch_reference_users(instance.reference_id)
+
+
+# Deletions are handled before the fact: afterwards the links to the deleted
+# row are already cleared (SET_NULL / m2m rows removed) and can't be followed.
+@receiver(post_save, sender=ReferenceValue)
+def reference_changed(sender, instance, created, **kwargs):
+    invalidate('references')
+    if not created:
+        touch_reference_users(instance.pk)
+
+
+@receiver(pre_delete, sender=ReferenceValue)
+def reference_deleted(sender, instance, **kwargs):
+    invalidate('references')
+    touch_reference_users(instance.pk)
+
+
+@receiver(post_save, sender=MediaLibrary)
+def media_changed(sender, instance, created, **kwargs):
+    invalidate('media')
+    if not created:
+        touch_media_users([instance.pk])
+
+
+@receiver(pre_delete, sender=MediaLibrary)
+def media_deleted(sender, instance, **kwargs):
+    invalidate('media')
+    touch_media_users([instance.pk])
+
+
+@receiver(post_save, sender=MediaTag)
+def media_tag_changed(sender, instance, created, **kwargs):
+    invalidate('media')
+    if not created:
+        instance.media_items.all().update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=MediaTag)
+def media_tag_deleted(sender, instance, **kwargs):
+    invalidate('media')
+    instance.media_items.all().update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=MediaLibrary.tags.through)
+def media_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Clears are handled before the fact, while the m2m rows can still be followed
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # instance is a tag: pk_set holds media ids (None on clear)
+        media = MediaLibrary.objects.filter(id__in=pk_set) if pk_set else instance.media_items.all()
+    else:
+        media = MediaLibrary.objects.filter(id=instance.pk)
+    media.update(updated_at=timezone.now())
+    invalidate('media')
+
+
+@receiver([post_save, post_delete], sender=Boat)
+@receiver([post_save, post_delete], sender=GammeCabine)
+@receiver([post_save, post_delete], sender=VarianteGamme)
+@receiver([post_save, post_delete], sender=Cabine)
+@receiver([post_save, post_delete], sender=Ligne)
+@receiver([post_save, post_delete], sender=Poste)
+def hierarchy_changed(sender, instance, **kwargs):
+    # Sheet lists are filtered through the hierarchy
+    invalidate('hierarchy', 'sheets')
+
+
+@receiver([post_save, post_delete], sender=ProductionPlanningLine)
+def planning_changed(sender, instance, **kwargs):
+    invalidate('planning')
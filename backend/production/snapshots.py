@@ -0,0 +1,194 @@
+"""
+Published sheet snapshots.
+
+Publishing freezes the fully resolved sheet document (the `SheetSerializer`
+representation, with pages, elements, references and field values) into an
+immutable `SheetSnapshot` row, once with all languages and once per language.
+Readers are then served a single row instead of the live editable tables:
+the sheet, and its pages, elements and page bundles cut out of the document
+in the shapes of the live endpoints.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Prefetch
+from django.db.models.fields.json import KeyTransform
+
+from .languages import FALLBACK_LANGUAGES, project_language
+from .models import Sheet, SheetPage, MediaLibrary, SheetSnapshot
+from .querysets import sheets_with_counts, pages_with_counts, elements_with_details
+from .serializers import SheetSerializer
+
+SNAPSHOT_LANGUAGES = [code for code, _ in MediaLibrary.LANGUAGE_CHOICES]
+
+
+def _load_sheet(sheet_id, language=None):
+    """Load a sheet with everything SheetSerializer walks through prefetched"""
+    pages = pages_with_counts(SheetPage.objects.select_related('created_by'))
+    elements = elements_with_details()
+    if language:
+        pages = project_language(pages, language)
+        elements = project_language(elements, language)
+    return sheets_with_counts(Sheet.objects.select_related('created_by')).prefetch_related(
+        Prefetch('pages', queryset=pages),
+        Prefetch('pages__elements', queryset=elements),
+    ).get(pk=sheet_id)
+
+
+def build_sheet_documents(sheet_id, context=None):
+    """Resolve the sheet document for all languages and for each snapshot language"""
+    context = dict(context or {})
+    documents = {
+        SheetSnapshot.ALL_LANGUAGES: SheetSerializer(_load_sheet(sheet_id), context={**context, 'lang': None}).data
+    }
+    for language in SNAPSHOT_LANGUAGES:
+        sheet = _load_sheet(sheet_id, language)
+        documents[language] = SheetSerializer(sheet, context={**context, 'lang': language}).data
+    return json.loads(json.dumps(documents, cls=DjangoJSONEncoder))
+
+
+def compute_content_hash(documents):
+    payload = json.dumps(documents, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def publish_sheet(sheet, user=None, context=None):
+    """
+    Publish the current state of a sheet.
+
+    Returns (snapshot, created). When nothing changed since the last
+    published version, the latest snapshot is returned and no version is added.
+    """
+    with transaction.atomic():
+        # Lock the sheet row so concurrent publishes get distinct versions
+        Sheet.objects.select_for_update().only('pk').get(pk=sheet.pk)
+
+        documents = build_sheet_documents(sheet.pk, context)
+        content_hash = compute_content_hash(documents)
+
+        latest = SheetSnapshot.objects.filter(sheet=sheet).only('id', 'version', 'content_hash').first()
+        if latest and latest.content_hash == content_hash:
+            return latest, False
+
+        snapshot = SheetSnapshot.objects.create(
+            sheet=sheet,
+            version=(latest.version + 1) if latest else 1,
+            content_hash=content_hash,
+            documents=documents,
+            published_by=user
+        )
+        return snapshot, True
+
+
+def get_published_document(sheet_id, language=None, version=None):
+    """
+    Fetch one published document in a single query, extracting only the
+    requested language from the snapshot row.
+
+    Returns a dict with version, content_hash, language, published_at and
+    document, or None when the sheet has never been published.
+    """
+    if not language:
+        language = SheetSnapshot.ALL_LANGUAGES
+    elif language not in SNAPSHOT_LANGUAGES:
+        language = FALLBACK_LANGUAGES[0]
+
+    snapshots = SheetSnapshot.objects.filter(sheet_id=sheet_id)
+    if version is not None:
+        snapshots = snapshots.filter(version=version)
+    snapshot = (
+        snapshots
+        .order_by('-version')
+        .annotate(document=KeyTransform(language, 'documents'))
+        .values('version', 'content_hash', 'published_at', 'document')
+        .first()
+    )
+    if snapshot is None:
+        return None
+    snapshot['language'] = language
+    return snapshot
+
+
+# Reader views of a published document, in the shapes of the live endpoints
+
+def _find(items, item_id):
+    return next((item for item in items if item['id'] == item_id), None)
+
+
+def published_sheet(document):
+    """Sheet of a published document in the SheetListSerializer shape"""
+    return {key: value for key, value in document.items() if key != 'pages'}
+
+
+def published_page(document, page_id):
+    """Page of a published sheet document (SheetPageSerializer shape), or None"""
+    return _find(document['pages'], page_id)
+
+
+def published_page_list(document):
+    """Pages of a published sheet document in the SheetPageListSerializer shape"""
+    return [
+        {**{key: value for key, value in page.items() if key != 'elements'}, 'sheet_name': document['name']}
+        for page in sorted(document['pages'], key=lambda page: page['number'])
+    ]
+
+
+def published_element(document, element_id):
+    """Element of a published sheet document (InteractiveElementSerializer shape), or None"""
+    for page in document['pages']:
+        element = _find(page['elements'], element_id)
+        if element is not None:
+            return element
+    return None
+
+
+def published_element_list(document, page):
+    """Elements of a published page in the InteractiveElementListSerializer shape, by id like the live list"""
+    return [
+        {
+            **{key: value for key, value in element.items() if key not in ('reference_value', 'reference', 'field_values')},
+            'page_number': page['number'],
+            'sheet_name': document['name'],
+        }
+        for element in sorted(page['elements'], key=lambda element: element['id'])
+    ]
+
+
+def _bundle_fields(fields, media):
+    """Field values without their nested image, collected into `media` (see BundleFieldValueSerializer)"""
+    bundled = []
+    for field in fields:
+        field = dict(field)
+        image = field.pop('image', None)
+        if image:
+            media[str(image['id'])] = {**image, 'tags': [{'id': tag['id'], 'name': tag['name']} for tag in image['tags']]}
+        bundled.append(field)
+    return bundled
+
+
+def published_page_bundle(document, page_id):
+    """Render bundle (see bundles.build_page_bundle) of a published page, or None"""
+    page = published_page(document, page_id)
+    if page is None:
+        return None
+    elements = sorted(page['elements'], key=lambda element: (element['z_order'], element['id']))
+    references, media = {}, {}
+    bundled = {}
+    for element in elements:
+        reference = element.get('reference')
+        if reference:
+            references[str(reference['id'])] = {**reference, 'fields': _bundle_fields(reference['fields'], media)}
+        bundled[str(element['id'])] = {
+            **{key: value for key, value in element.items() if key != 'reference'},
+            'field_values': _bundle_fields(element['field_values'], media),
+        }
+    header = {key: value for key, value in page.items() if key not in ('elements', 'elements_count')}
+    return {
+        'page': {**header, 'sheet_name': document['name'], 'sheet_business_id': document['business_id']},
+        'element_order': [element['id'] for element in elements],
+        'elements': bundled,
+        'references': references,
+        'media': media,
+    }
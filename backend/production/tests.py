@@ -1,3 +1,240 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from .conflicts import find_over_capacity, find_overlaps
+from .ligne_load import rebuild_ligne_load
+from .models import (
+    Boat, Cabine, ChangeLogEntry, GammeCabine, InteractiveElement, Ligne, LigneDailyLoad, Poste,
+    PosteVarianteDocumentation, ProductionPlanningLine, Sheet, SheetHierarchy, SheetPage, VarianteGamme
+)
+
+
+def _days(*values):
+    return np.array(values, dtype=np.int64)
+
+
+class FindOverlapsTests(SimpleTestCase):
+    """Planning periods are inclusive: sharing a day is an overlap"""
+
+    def overlaps(self, cabines, first, last):
+        ids = np.arange(len(cabines), dtype=np.int64)
+        line, other, start, end = find_overlaps(ids, _days(*cabines), _days(*first), _days(*last))
+        return sorted(zip(line.tolist(), other.tolist(), start.tolist(), end.tolist()))
+
+    def test_entry_on_the_exit_day_of_the_previous_line(self):
+        self.assertEqual(self.overlaps([1, 1], [10, 15], [15, 20]), [(1, 0, 15, 15)])
+
+    def test_identical_single_day_lines(self):
+        self.assertEqual(self.overlaps([1, 1], [10, 10], [10, 10]), [(1, 0, 10, 10)])
+
+    def test_entry_the_day_after_the_exit(self):
+        self.assertEqual(self.overlaps([1, 1], [10, 16], [15, 20]), [])
+
+    def test_other_cabine_on_the_same_days(self):
+        self.assertEqual(self.overlaps([1, 2], [10, 15], [15, 20]), [])
+
+
+class FindOverCapacityTests(SimpleTestCase):
+    def test_cabines_sharing_the_exit_day(self):
+        lignes, first, last, peaks = find_over_capacity(_days(7, 7), _days(10, 15), _days(15, 20), {7: 1})
+        self.assertEqual((lignes.tolist(), first.tolist(), last.tolist(), peaks.tolist()), ([7], [15], [15], [2]))
+
+    def test_cabines_one_after_the_other(self):
+        lignes, _, _, _ = find_over_capacity(_days(7, 7), _days(10, 16), _days(15, 20), {7: 1})
+        self.assertEqual(lignes.tolist(), [])
+
+
+class SheetHierarchyTriggerTests(TestCase):
+    """sheet_hierarchy follows the documentation links and the hierarchy (migration 0017)"""
+
+    def setUp(self):
+        self.boat = Boat.objects.create(internal_id='B1')
+        self.other_boat = Boat.objects.create(internal_id='B2')
+        self.gamme = GammeCabine.objects.create(internal_id='G1', boat=self.boat)
+        self.other_gamme = GammeCabine.objects.create(internal_id='G2', boat=self.other_boat)
+        self.variante = VarianteGamme.objects.create(internal_id='V1', gamme=self.gamme)
+        self.other_variante = VarianteGamme.objects.create(internal_id='V2', gamme=self.gamme)
+        self.ligne = Ligne.objects.create(internal_id='L1')
+        self.other_ligne = Ligne.objects.create(internal_id='L2')
+        self.poste = Poste.objects.create(internal_id='P1', ligne=self.ligne)
+        self.sheet = Sheet.objects.create(name='Sheet', business_id='hierarchy-sheet')
+        self.link = PosteVarianteDocumentation.objects.create(
+            poste=self.poste, varianteGamme=self.variante, sheet=self.sheet, ligne_sens='D'
+        )
+
+    def rows(self):
+        return sorted(
+            SheetHierarchy.objects.values_list(
+                'documentation_id', 'sheet_id', 'boat_id', 'gamme_id', 'variante_id', 'cabine_id', 'ligne_id',
+                'poste_id', 'ligne_sens'
+            ),
+            key=lambda row: (row[0], row[5] or 0)
+        )
+
+    def row(self, cabine=None, link=None, boat=None, gamme=None, variante=None, ligne=None):
+        link = link or self.link
+        return (
+            link.pk, self.sheet.pk, (boat or self.boat).pk, (gamme or self.gamme).pk, (variante or self.variante).pk,
+            cabine.pk if cabine else None, (ligne or self.ligne).pk, link.poste_id, link.ligne_sens
+        )
+
+    def test_link_of_a_variante_without_cabines(self):
+        self.assertEqual(self.rows(), [self.row()])
+
+    def test_inserting_cabines(self):
+        cabines = Cabine.objects.bulk_create([
+            Cabine(internal_id='C1', variante_gamme=self.variante),
+            Cabine(internal_id='C2', variante_gamme=self.variante),
+        ])
+        self.assertEqual(self.rows(), [self.row(cabines[0]), self.row(cabines[1])])
+
+    def test_moving_a_cabine_to_another_variante(self):
+        other_link = PosteVarianteDocumentation.objects.create(
+            poste=self.poste, varianteGamme=self.other_variante, sheet=self.sheet, ligne_sens='G'
+        )
+        cabine = Cabine.objects.create(internal_id='C1', variante_gamme=self.variante)
+        Cabine.objects.filter(pk=cabine.pk).update(variante_gamme=self.other_variante)
+        self.assertEqual(self.rows(), [self.row(), self.row(cabine, link=other_link, variante=self.other_variante)])
+
+    def test_moving_a_variante_to_another_gamme(self):
+        cabine = Cabine.objects.create(internal_id='C1', variante_gamme=self.variante)
+        VarianteGamme.objects.filter(pk=self.variante.pk).update(gamme=self.other_gamme)
+        self.assertEqual(self.rows(), [self.row(cabine, boat=self.other_boat, gamme=self.other_gamme)])
+
+    def test_moving_a_gamme_to_another_boat(self):
+        GammeCabine.objects.filter(pk=self.gamme.pk).update(boat=self.other_boat)
+        self.assertEqual(self.rows(), [self.row(boat=self.other_boat)])
+
+    def test_moving_a_poste_to_another_ligne(self):
+        self.poste.ligne = self.other_ligne
+        self.poste.save()
+        self.assertEqual(self.rows(), [self.row(ligne=self.other_ligne)])
+
+    def test_deleting_a_cabine(self):
+        cabine = Cabine.objects.create(internal_id='C1', variante_gamme=self.variante)
+        Cabine.objects.create(internal_id='C2', variante_gamme=self.variante)
+        Cabine.objects.exclude(pk=cabine.pk).delete()
+        self.assertEqual(self.rows(), [self.row(cabine)])
+
+    def test_deleting_links(self):
+        Cabine.objects.create(internal_id='C1', variante_gamme=self.variante)
+        PosteVarianteDocumentation.objects.filter(pk=self.link.pk).delete()
+        self.assertEqual(self.rows(), [])
+
+
+class ChangeLogTriggerTests(TestCase):
+    """Writes of pages, elements and field values are logged per row (migration 0016)"""
+
+    def setUp(self):
+        self.sheet = Sheet.objects.create(name='Sheet', business_id='change-log-sheet')
+        self.other_sheet = Sheet.objects.create(name='Other', business_id='change-log-other')
+
+    def entries(self, model=None):
+        entries = ChangeLogEntry.objects.order_by('id')
+        if model:
+            entries = entries.filter(model=model)
+        return list(entries.values_list('model', 'object_id', 'sheet_id', 'action'))
+
+    def test_insert_update_and_delete(self):
+        page = SheetPage.objects.create(sheet=self.sheet, number=1)
+        element = InteractiveElement.objects.create(page=page, business_id='E1', type='rect')
+        InteractiveElement.objects.filter(pk=element.pk).update(z_order=2)
+        InteractiveElement.objects.filter(pk=element.pk).delete()
+        self.assertEqual(self.entries('page')[0], ('page', page.pk, self.sheet.pk, 'insert'))
+        self.assertEqual(self.entries('element'), [
+            ('element', element.pk, self.sheet.pk, 'insert'),
+            ('element', element.pk, self.sheet.pk, 'update'),
+            ('element', element.pk, self.sheet.pk, 'delete'),
+        ])
+
+    def test_one_entry_per_row_of_a_statement(self):
+        page = SheetPage.objects.create(sheet=self.sheet, number=1)
+        elements = InteractiveElement.objects.bulk_create([
+            InteractiveElement(page=page, business_id=f'E{i}', type='rect') for i in range(3)
+        ])
+        ChangeLogEntry.objects.all().delete()
+        InteractiveElement.objects.filter(page=page).update(z_order=1)
+        self.assertEqual(
+            sorted(self.entries()), [('element', element.pk, self.sheet.pk, 'update') for element in elements]
+        )
+
+    def test_moving_a_page_to_another_sheet(self):
+        page = SheetPage.objects.create(sheet=self.sheet, number=1)
+        ChangeLogEntry.objects.all().delete()
+        SheetPage.objects.filter(pk=page.pk).update(sheet=self.other_sheet)
+        self.assertEqual(self.entries(), [
+            ('page', page.pk, self.other_sheet.pk, 'update'),
+            ('page', page.pk, self.sheet.pk, 'delete'),
+        ])
+
+
+class LigneLoadTriggerTests(TestCase):
+    """The trigger-maintained ligne_daily_load matches a full rebuild (migrations 0020 and 0024)"""
+
+    def setUp(self):
+        boat = Boat.objects.create(internal_id='B1')
+        variante = VarianteGamme.objects.create(
+            internal_id='V1', gamme=GammeCabine.objects.create(internal_id='G1', boat=boat)
+        )
+        self.cabines = [Cabine.objects.create(internal_id=f'C{i}', variante_gamme=variante) for i in range(3)]
+        self.ligne = Ligne.objects.create(internal_id='L1')
+        self.other_ligne = Ligne.objects.create(internal_id='L2')
+
+    def plan(self, cabine, entry, exit, ligne=None):
+        return ProductionPlanningLine.objects.create(
+            cabine=cabine, ligne=ligne or self.ligne, entry_date=entry, exit_date=exit
+        )
+
+    def loads(self):
+        loads = LigneDailyLoad.objects.order_by('ligne_id', 'day')
+        return list(loads.values_list('ligne_id', 'day', 'entries', 'exits', 'wip'))
+
+    def assertMatchesRebuild(self):
+        maintained = self.loads()
+        rebuild_ligne_load()
+        self.assertEqual(maintained, self.loads())
+
+    def test_overlapping_lines(self):
+        self.plan(self.cabines[0], date(2026, 3, 2), date(2026, 3, 4))
+        self.plan(self.cabines[1], date(2026, 3, 4), date(2026, 3, 5))
+        self.assertEqual(self.loads(), [
+            (self.ligne.pk, date(2026, 3, 2), 1, 0, 1),
+            (self.ligne.pk, date(2026, 3, 3), 0, 0, 1),
+            (self.ligne.pk, date(2026, 3, 4), 1, 1, 2),
+            (self.ligne.pk, date(2026, 3, 5), 0, 1, 1),
+        ])
+        self.assertMatchesRebuild()
+
+    def test_bulk_inserts(self):
+        ProductionPlanningLine.objects.bulk_create([
+            ProductionPlanningLine(
+                cabine=cabine, ligne=self.ligne, entry_date=date(2026, 3, 1 + i), exit_date=date(2026, 3, 10 - i)
+            )
+            for i, cabine in enumerate(self.cabines)
+        ])
+        self.assertMatchesRebuild()
+
+    def test_moving_dates(self):
+        line = self.plan(self.cabines[0], date(2026, 3, 2), date(2026, 3, 6))
+        self.plan(self.cabines[1], date(2026, 3, 5), date(2026, 3, 8))
+        ProductionPlanningLine.objects.filter(pk=line.pk).update(
+            entry_date=date(2026, 3, 7), exit_date=date(2026, 3, 12)
+        )
+        self.assertMatchesRebuild()
+
+    def test_moving_a_line_to_another_ligne(self):
+        line = self.plan(self.cabines[0], date(2026, 3, 2), date(2026, 3, 6))
+        self.plan(self.cabines[1], date(2026, 3, 4), date(2026, 3, 8), ligne=self.other_ligne)
+        line.ligne = self.other_ligne
+        line.save()
+        self.assertMatchesRebuild()
+
+    def test_deleting_lines(self):
+        self.plan(self.cabines[0], date(2026, 3, 2), date(2026, 3, 6))
+        line = self.plan(self.cabines[1], date(2026, 3, 4), date(2026, 3, 8))
+        ProductionPlanningLine.objects.filter(pk=line.pk).delete()
+        self.assertMatchesRebuild()
+        ProductionPlanningLine.objects.all().delete()
+        self.assertEqual(self.loads(), [])
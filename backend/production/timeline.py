@@ -0,0 +1,151 @@
+"""
+Downsampled planning timeline (Gantt chart data).
+
+A year of planning over every ligne is hundreds of thousands of bars, far
+more than a screen can draw. `planning_timeline` sizes the answer to the
+viewport instead of the data: the client sends the period it shows and its
+width in pixels, and gets either
+
+- `intervals`: the planning lines of the viewport, one bar each, when days
+  are wide enough to draw them and they are few enough (fine zoom);
+- `buckets`: per ligne occupancy (cabines on the ligne) aggregated into
+  buckets of a few pixels (coarse zoom), so at most width / MIN_BUCKET_PIXELS
+  buckets per ligne whatever the number of lines.
+
+Buckets are a whole number of days from a fixed set of sizes, aligned on
+Mondays, so that panning at a given zoom keeps the same buckets. Occupancy
+is computed on a (ligne x day) grid: read from the materialized daily load
+for actual dates (see `LigneDailyLoad`), swept from the planning lines of the
+window with NumPy for scheduled dates. Each bucket reports the peak and the
+average number of cabines; empty buckets are omitted. Timelines are cached
+until the planning or the hierarchy changes.
+"""
+import numpy as np
+
+from .caching import cached_data
+from .models import Ligne, LigneDailyLoad, ProductionPlanningLine
+from .planning import PERIODS, EpochDay, planning_during
+
+ZOOMS = ['auto', 'buckets', 'intervals']
+DEFAULT_WIDTH = 1200
+MAX_WIDTH = 8000
+MAX_DAYS = 3660
+# Narrowest bucket drawn, and day width from which auto zoom draws the bars
+MIN_BUCKET_PIXELS = 4
+DETAIL_PIXELS_PER_DAY = 4
+MAX_INTERVALS = 5000
+BUCKET_DAYS = [1, 2, 7, 14, 28, 56, 91, 182, 364]
+# 1970-01-05, the first Monday after the epoch
+MONDAY = 4
+
+
+def bucket_days(days, width):
+    """Smallest bucket size (days) at least MIN_BUCKET_PIXELS wide"""
+    needed = -(-days * MIN_BUCKET_PIXELS // width)
+    return next((size for size in BUCKET_DAYS if size >= needed), needed)
+
+
+def _epoch_day(day):
+    return int(np.datetime64(day, 'D').astype(np.int64))
+
+
+def _daily_occupancy(ligne_ids, first, days, kind):
+    """(ligne x day) grid of cabines on the ligne, days counted from epoch day `first`"""
+    start, end = np.datetime64(first, 'D').astype(object), np.datetime64(first + days - 1, 'D').astype(object)
+    grid = np.zeros((len(ligne_ids), days), dtype=np.int64)
+    if kind == 'actual':
+        rows = LigneDailyLoad.objects.filter(day__range=(start, end), ligne_id__in=ligne_ids.tolist())
+        table = np.array(list(rows.values_list('ligne_id', EpochDay('day'), 'wip')), dtype=np.int64).reshape(-1, 3)
+        grid[np.searchsorted(ligne_ids, table[:, 0]), table[:, 1] - first] = table[:, 2]
+        return grid
+
+    lines = planning_during(ProductionPlanningLine.objects.filter(ligne_id__in=ligne_ids.tolist()), start, end, kind)
+    table = np.array(
+        list(lines.values_list('ligne_id', *(EpochDay(field) for field in PERIODS[kind]))), dtype=np.int64
+    ).reshape(-1, 3)
+    # Each line adds one cabine from its first day and removes it after its last (clipped to the grid)
+    entries = np.clip(np.minimum(table[:, 1], table[:, 2]) - first, 0, days)
+    exits = np.clip(np.maximum(table[:, 1], table[:, 2]) - first + 1, 0, days)
+    changes = np.zeros((len(ligne_ids), days + 1), dtype=np.int64)
+    rows = np.searchsorted(ligne_ids, table[:, 0])
+    np.add.at(changes, (rows, entries), 1)
+    np.add.at(changes, (rows, exits), -1)
+    return np.cumsum(changes, axis=1)[:, :days]
+
+
+def _buckets(ligne_ids, start, end, width, kind):
+    size = bucket_days((end - start).days + 1, width)
+    first = _epoch_day(start)
+    first -= (first - MONDAY) % size
+    count = -(-(_epoch_day(end) - first + 1) // size)
+    grid = _daily_occupancy(ligne_ids, first, count * size, kind).reshape(len(ligne_ids), count, size)
+
+    peak = grid.max(axis=2)
+    rows, buckets = np.nonzero(peak)
+    starts = np.datetime64(first, 'D') + buckets * size
+    return {
+        'bucket_days': size,
+        'from': np.datetime64(first, 'D').astype(object),
+        'to': np.datetime64(first + count * size - 1, 'D').astype(object),
+        'buckets': {
+            'ligne': ligne_ids[rows].tolist(),
+            'start': starts.astype(object).tolist(),
+            'peak': peak[rows, buckets].tolist(),
+            'occupancy': np.round(grid.sum(axis=2)[rows, buckets] / size, 2).tolist(),
+        },
+    }
+
+
+def _intervals(ligne_ids, start, end, kind):
+    """Planning lines of the viewport, None when there are more than MAX_INTERVALS"""
+    start_field, end_field = PERIODS[kind]
+    lines = planning_during(ProductionPlanningLine.objects.filter(ligne_id__in=ligne_ids.tolist()), start, end, kind)
+    rows = list(lines.order_by('ligne_id', start_field, 'id').values_list(
+        'id', 'ligne_id', 'cabine_id', 'cabine__internal_id', 'ligne_sens', start_field, end_field
+    )[:MAX_INTERVALS + 1])
+    if len(rows) > MAX_INTERVALS:
+        return None
+    columns = ['id', 'ligne', 'cabine', 'cabine_internal_id', 'ligne_sens', 'start', 'end']
+    return {column: [row[index] for row in rows] for index, column in enumerate(columns)}
+
+
+def planning_timeline(start, end, width=DEFAULT_WIDTH, zoom='auto', kind='actual', ligne_id=None):
+    """
+    Timeline of [start, end] drawn `width` pixels wide, for all lignes or
+    one: planning lines (zoom 'intervals'), occupancy buckets ('buckets'), or
+    'auto', intervals when a day is at least DETAIL_PIXELS_PER_DAY pixels
+    wide and the viewport has at most MAX_INTERVALS lines, else buckets.
+    Forced intervals over MAX_INTERVALS lines fall back to buckets too.
+    """
+    lignes = Ligne.objects.order_by('name', 'id')
+    if ligne_id is not None:
+        lignes = lignes.filter(id=ligne_id)
+    ligne_rows = list(lignes.values_list('id', 'internal_id', 'name'))
+    ligne_ids = np.array(sorted(row[0] for row in ligne_rows), dtype=np.int64)
+    timeline = {
+        'dates': kind,
+        'lignes': {
+            'id': [row[0] for row in ligne_rows],
+            'internal_id': [row[1] for row in ligne_rows],
+            'name': [row[2] for row in ligne_rows],
+        },
+    }
+
+    days = (end - start).days + 1
+    if zoom == 'intervals' or (zoom == 'auto' and width >= days * DETAIL_PIXELS_PER_DAY):
+        intervals = _intervals(ligne_ids, start, end, kind)
+        if intervals is not None:
+            return {'zoom': 'intervals', 'from': start, 'to': end, **timeline, 'intervals': intervals}
+    return {'zoom': 'buckets', **_buckets(ligne_ids, start, end, width, kind), **timeline}
+
+
+def cached_planning_timeline(start, end, width=DEFAULT_WIDTH, zoom='auto', kind='actual', ligne_id=None):
+    """
+    `planning_timeline`, cached by resolved viewport (a default period moves
+    with the day). Returns (timeline, cache hit).
+    """
+    parts = ['timeline', start, end, width, zoom, kind, ligne_id]
+    return cached_data(
+        'planning', parts, ['planning', 'hierarchy'],
+        lambda: planning_timeline(start, end, width, zoom, kind, ligne_id)
+    )
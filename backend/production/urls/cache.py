@@ -0,0 +1,6 @@
+from django.urls import path
+from ..views.cache import CacheStatsView
+
+urlpatterns = [
+    path('stats/', CacheStatsView.as_view(), name='cache-stats'),
+]
@@ -0,0 +1,6 @@
+from django.urls import path
+from ..views.hierarchy import HierarchyTreeView
+
+urlpatterns = [
+    path('', HierarchyTreeView.as_view(), name='hierarchy-tree'),
+]
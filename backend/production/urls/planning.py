@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+from ..views.planning import ProductionPlanningLineViewSet
+
+router = DefaultRouter()
+router.register(r'planning', ProductionPlanningLineViewSet, basename='planning')
+
+urlpatterns = router.urls
@@ -0,0 +1,9 @@
+from django.urls import path
+from ..views.reports import ConflictsReportView, CoverageReportView, LigneLoadReportView, ScheduleDeviationReportView
+
+urlpatterns = [
+    path('coverage/', CoverageReportView.as_view(), name='report-coverage'),
+    path('ligne-load/', LigneLoadReportView.as_view(), name='report-ligne-load'),
+    path('deviation/', ScheduleDeviationReportView.as_view(), name='report-deviation'),
+    path('conflicts/', ConflictsReportView.as_view(), name='report-conflicts'),
+]
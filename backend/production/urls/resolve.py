@@ -0,0 +1,7 @@
+from django.urls import path
+from ..views.resolve import ResolveSheetView, UpcomingSheetsView
+
+urlpatterns = [
+    path('', ResolveSheetView.as_view(), name='resolve-sheet'),
+    path('upcoming/', UpcomingSheetsView.as_view(), name='resolve-upcoming'),
+]
@@ -0,0 +1,6 @@
+from django.urls import path
+from ..views.sync import ChangeFeedView
+
+urlpatterns = [
+    path('changes/', ChangeFeedView.as_view(), name='sync-changes'),
+]
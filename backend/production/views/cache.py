@@ -0,0 +1,33 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_yasg.utils import swagger_auto_schema
+
+from ..caching import get_stats, reset_stats
+from ..permissions import IsAdminUser
+
+
+class CacheStatsView(APIView):
+    """Response cache hit/miss counters per resource of the worker process serving the request (ADMIN only)"""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Get response cache hits, misses and hit ratio per resource (ADMIN only). "
+            "The counters are kept in memory by each worker process and start over when it restarts."
+        ),
+        responses={200: "Counters per resource", 403: "Permission denied - requires ADMIN role"},
+        tags=['Cache']
+    )
+    def get(self, request):
+        return Response(get_stats())
+    
+    @swagger_auto_schema(
+        operation_description="Reset the response cache counters of the worker process serving the request (ADMIN only)",
+        responses={204: "Counters reset", 403: "Permission denied - requires ADMIN role"},
+        tags=['Cache']
+    )
+    def delete(self, request):
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,36 @@
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_yasg.utils import swagger_auto_schema
+
+from ..conditional import not_modified_response, set_validators
+from ..hierarchy import hierarchy_state, hierarchy_tree
+
+
+class HierarchyTreeView(APIView):
+    """The whole boat and ligne hierarchy in one columnar document, for filter UIs"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Boats, gammes, variantes, cabines, lignes and postes in one document. Each level is columnar: "
+            "parallel lists of id, internal_id and parent id (boat, gamme, variante_gamme, ligne) or name. "
+            "Served with an ETag that only changes with the hierarchy: send If-None-Match to get 304."
+        ),
+        responses={
+            200: "{boats: {id, internal_id, name}, gammes: {id, internal_id, boat}, variantes: {id, internal_id, gamme}, "
+                 "cabines: {id, internal_id, variante_gamme}, lignes: {id, internal_id, name}, postes: {id, internal_id, ligne}}",
+            304: "Not modified"
+        },
+        tags=['Hierarchy']
+    )
+    def get(self, request):
+        etag, last_modified = hierarchy_state()
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        tree, hit = hierarchy_tree(etag)
+        response = set_validators(Response(tree), etag, last_modified)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
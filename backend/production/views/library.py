@@ -6,19 +6,24 @@ from django.db.models import Q
 from ..models import MediaTag, MediaLibrary
 from ..serializers import MediaTagSerializer, MediaLibrarySerializer, MediaLibraryListSerializer
 from ..permissions import IsAdminUser
+from ..querysets import media_tags_with_counts, prefetch_tags_with_counts
+from ..pagination import MediaLibraryPagination
+from ..conditional import ConditionalGetMixin
+from ..caching import CachedResponseMixin
 
 
-class MediaTagViewSet(viewsets.ModelViewSet):
+class MediaTagViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing media tags.
     Read access for authenticated users, write access for admins only.
     """
-    queryset = MediaTag.objects.all()
+    queryset = media_tags_with_counts()
     serializer_class = MediaTagSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
+    cache_resource = 'media'
     
     def get_permissions(self):
         """
@@ -36,7 +41,7 @@ class MediaTagViewSet(viewsets.ModelViewSet):
 ImageTagViewSet = MediaTagViewSet
 
 
-class MediaLibraryViewSet(viewsets.ModelViewSet):
+class MediaLibraryViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing media (images and videos) in the library.
     Read access for authenticated users, write access for admins only.
@@ -48,10 +53,12 @@ class MediaLibraryViewSet(viewsets.ModelViewSet):
     - media_type: Filter by media type (image/video)
     """
     queryset = MediaLibrary.objects.all()
+    pagination_class = MediaLibraryPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    cache_resource = 'media'
     
     def get_permissions(self):
         """
@@ -92,7 +99,7 @@ class MediaLibraryViewSet(viewsets.ModelViewSet):
             else:
                 queryset = queryset.filter(language=language)
         
-        return queryset.prefetch_related('tags')
+        return queryset.select_related('created_by').prefetch_related(prefetch_tags_with_counts())
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
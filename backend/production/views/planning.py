@@ -0,0 +1,181 @@
+from datetime import date, timedelta
+
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from ..models import ProductionPlanningLine
+from ..serializers import ProductionPlanningLineSerializer
+from ..permissions import IsEditorOrAdmin, IsAdminUser
+from ..pagination import ProductionPlanningLinePagination
+from ..caching import CachedResponseMixin
+from ..planning import PERIODS, planning_during, planning_on
+from ..planning_import import PlanningImportError, import_planning
+from ..timeline import DEFAULT_WIDTH, MAX_DAYS, MAX_INTERVALS, MAX_WIDTH, ZOOMS, cached_planning_timeline
+
+
+def _date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: 'Expected a date (YYYY-MM-DD)'})
+
+
+class ProductionPlanningLineViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for reading the production planning (read-only).
+    
+    Timeline filters apply to the actual dates, or the scheduled ones with
+    `dates=scheduled`:
+    - `from` / `to`: lines overlapping the period (e.g. cabines on a ligne during [d1, d2])
+    - `date`: lines running on that day (e.g. where a cabine is on a day)
+    
+    `timeline/` serves Gantt chart data sized to the viewport. Admins import
+    the ERP planning export through `import/`.
+    """
+    queryset = ProductionPlanningLine.objects.select_related('cabine', 'ligne').order_by('entry_date', 'id')
+    serializer_class = ProductionPlanningLineSerializer
+    permission_classes = [IsEditorOrAdmin]
+    pagination_class = ProductionPlanningLinePagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['cabine', 'ligne', 'ligne_sens']
+    cache_resource = 'planning'
+    # Lines embed cabine and ligne ids and names
+    cache_shared_dependencies = ['hierarchy']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        
+        params = self.request.query_params
+        kind = params.get('dates', 'actual')
+        if kind not in PERIODS:
+            raise ValidationError({'dates': f"Expected one of: {', '.join(PERIODS)}"})
+        
+        day = _date_param(params, 'date')
+        if day is not None:
+            queryset = planning_on(queryset, day, kind)
+        start, end = _date_param(params, 'from'), _date_param(params, 'to')
+        if start is not None or end is not None:
+            if start is not None and end is not None and end < start:
+                raise ValidationError({'to': 'Must not be before from'})
+            queryset = planning_during(queryset, start, end, kind)
+        return queryset
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "List planning lines ordered by entry date, filterable by cabine, ligne and ligne_sens. "
+            "`from`/`to` return the lines overlapping a period, `date` the lines running on a day."
+        ),
+        manual_parameters=[
+            openapi.Parameter('from', openapi.IN_QUERY, description="Start of the period (YYYY-MM-DD, included)", type=openapi.TYPE_STRING),
+            openapi.Parameter('to', openapi.IN_QUERY, description="End of the period (YYYY-MM-DD, included)", type=openapi.TYPE_STRING),
+            openapi.Parameter('date', openapi.IN_QUERY, description="Day the lines run on (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+            openapi.Parameter('dates', openapi.IN_QUERY, description="Dates the filters apply to: actual (default) or scheduled", type=openapi.TYPE_STRING),
+        ],
+        responses={200: ProductionPlanningLineSerializer(many=True), 400: "Invalid parameters"},
+        tags=['Planning']
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @swagger_auto_schema(
+        operation_description="Get a planning line",
+        responses={200: ProductionPlanningLineSerializer(), 404: "Planning line not found"},
+        tags=['Planning']
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    @swagger_auto_schema(
+        method='get',
+        operation_description=(
+            "Gantt chart data for a viewport: the period shown (from/to) and its width in pixels. "
+            "zoom=intervals returns the planning lines of the viewport (columnar: id, ligne, cabine, "
+            "cabine_internal_id, ligne_sens, start, end), zoom=buckets the occupancy of each ligne in buckets "
+            "of bucket_days days (columnar: ligne, start, peak, occupancy = average cabines; empty buckets "
+            "omitted), so the size of the answer follows the width, not the planning. zoom=auto (default) "
+            f"returns the lines once a day is wide enough to draw them, buckets above {MAX_INTERVALS} lines."
+        ),
+        manual_parameters=[
+            openapi.Parameter('from', openapi.IN_QUERY, description="First day shown (YYYY-MM-DD, default: 4 weeks ago)", type=openapi.TYPE_STRING),
+            openapi.Parameter('to', openapi.IN_QUERY, description=f"Last day shown (YYYY-MM-DD, default: 12 weeks after from, at most {MAX_DAYS} days)", type=openapi.TYPE_STRING),
+            openapi.Parameter('width', openapi.IN_QUERY, description=f"Width of the timeline in pixels (default {DEFAULT_WIDTH})", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('zoom', openapi.IN_QUERY, description="auto (default), buckets or intervals", type=openapi.TYPE_STRING),
+            openapi.Parameter('dates', openapi.IN_QUERY, description="actual (default) or scheduled", type=openapi.TYPE_STRING),
+            openapi.Parameter('ligne', openapi.IN_QUERY, description="Only this ligne", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: "{zoom, from, to, dates, lignes: {id, internal_id, name}, intervals | (bucket_days, buckets)}",
+            400: "Invalid parameters"
+        },
+        tags=['Planning']
+    )
+    @action(detail=False, methods=['get'])
+    def timeline(self, request):
+        """Planning lines or occupancy buckets of a viewport"""
+        params = request.query_params
+        start = _date_param(params, 'from') or date.today() - timedelta(weeks=4)
+        end = _date_param(params, 'to') or start + timedelta(weeks=12, days=-1)
+        if end < start or (end - start).days >= MAX_DAYS:
+            raise ValidationError({'to': f'Must be after from, at most {MAX_DAYS} days later'})
+        try:
+            width = int(params.get('width') or DEFAULT_WIDTH)
+            ligne_id = int(params['ligne']) if params.get('ligne') else None
+        except ValueError:
+            raise ValidationError({'width': 'width and ligne must be integers'})
+        if not 1 <= width <= MAX_WIDTH:
+            raise ValidationError({'width': f'Must be between 1 and {MAX_WIDTH}'})
+        zoom, kind = params.get('zoom', 'auto'), params.get('dates', 'actual')
+        if zoom not in ZOOMS:
+            raise ValidationError({'zoom': f"Expected one of: {', '.join(ZOOMS)}"})
+        if kind not in PERIODS:
+            raise ValidationError({'dates': f"Expected one of: {', '.join(PERIODS)}"})
+        
+        timeline, hit = cached_planning_timeline(start, end, width, zoom, kind, ligne_id)
+        response = Response(timeline)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+    
+    @swagger_auto_schema(
+        method='post',
+        operation_description=(
+            "Import a planning export (CSV or XLSX) with columns cabine, ligne (internal ids), ligne_sens, "
+            "entry_date, exit_date and optionally scheduled_entry_date, scheduled_exit_date. "
+            "Lines are matched on (cabine, ligne, scheduled_entry_date), so a cabine can pass several times on a ligne: "
+            "changed lines are updated, new ones inserted. "
+            "Returns the inserted/updated/unchanged counts and the rejected rows. Admin only."
+        ),
+        manual_parameters=[
+            openapi.Parameter('file', openapi.IN_FORM, description="Planning export", type=openapi.TYPE_FILE, required=True),
+            openapi.Parameter('dry_run', openapi.IN_FORM, description="Report without writing", type=openapi.TYPE_BOOLEAN),
+        ],
+        responses={200: "Import report", 400: "Unreadable file"},
+        tags=['Planning']
+    )
+    @action(
+        detail=False, methods=['post'], url_path='import',
+        permission_classes=[IsAuthenticated, IsAdminUser], parser_classes=[MultiPartParser]
+    )
+    def import_file(self, request):
+        """Import a planning export, streamed from the upload"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = 'xlsx' if upload.name.lower().endswith('.xlsx') else 'csv'
+        dry_run = request.data.get('dry_run', '').lower() in ('1', 'true')
+        try:
+            report = import_planning(upload, file_format=file_format, dry_run=dry_run)
+        except PlanningImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
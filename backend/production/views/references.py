@@ -11,13 +11,19 @@ from ..serializers import (
     ReferenceHistorySerializer
 )
 from ..permissions import IsAdminUser
+from ..querysets import prefetch_tags_with_counts
+from ..pagination import ReferenceValuePagination
+from ..caching import CachedResponseMixin
 
 
-class ReferenceValueViewSet(viewsets.ModelViewSet):
+class ReferenceValueViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing reference values.
     Read access for authenticated users, write access for admins only.
     """
+    pagination_class = ReferenceValuePagination
+    cache_resource = 'references'
+    cache_shared_dependencies = ['media']
     
     def get_permissions(self):
         """
@@ -36,7 +42,11 @@ class ReferenceValueViewSet(viewsets.ModelViewSet):
         return ReferenceValueSerializer
     
     def get_queryset(self):
-        queryset = ReferenceValue.objects.all().prefetch_related('fields', 'fields__value_image')
+        queryset = ReferenceValue.objects.all().select_related('created_by').prefetch_related(
+            'fields',
+            'fields__value_image__created_by',
+            prefetch_tags_with_counts('fields__value_image__tags')
+        )
         
         # Filter by type if provided
         ref_type = self.request.query_params.get('type', None)
@@ -0,0 +1,215 @@
+import csv
+from datetime import date, timedelta
+
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from ..conflicts import MAX_CONFLICTS, conflicts_report
+from ..coverage import SENS, STATUSES, coverage_report
+from ..deviation import GROUPS, PERCENTILES, schedule_deviation
+from ..ligne_load import BUCKETS, ligne_load
+from ..planning import PERIODS
+from .resolve import MAX_UPCOMING_HOURS
+
+MAX_LOAD_DAYS = 3 * 366
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    return int(value) if value not in (None, '') else None
+
+
+def csv_response(filename, columns, cells):
+    """CSV attachment of columnar cells"""
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    writer = csv.writer(response)
+    writer.writerow(columns)
+    writer.writerows(zip(*(cells[column] for column in columns)))
+    return response
+
+
+class CoverageReportView(APIView):
+    """Documentation coverage of the poste x variante x sens matrix"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Which (poste, variante, sens) combinations have no documentation link (a link with sens '-' "
+            "covers both sens). Cells are columnar: parallel lists of poste, poste_internal_id, ligne, variante, "
+            "variante_internal_id, ligne_sens (and sheet with status=all). export=csv returns them as CSV."
+        ),
+        manual_parameters=[
+            openapi.Parameter('status', openapi.IN_QUERY, description="missing (default): uncovered cells only; all: every cell with its sheet", type=openapi.TYPE_STRING),
+            openapi.Parameter('ligne', openapi.IN_QUERY, description="Only the postes of this ligne", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('poste', openapi.IN_QUERY, description="Only this poste", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('boat', openapi.IN_QUERY, description="Only the variantes of this boat", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('sens', openapi.IN_QUERY, description="Only this sens (D or G)", type=openapi.TYPE_STRING),
+            openapi.Parameter('upcoming', openapi.IN_QUERY, description=f"Only the variantes planned in the next N hours (max {MAX_UPCOMING_HOURS})", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('export', openapi.IN_QUERY, description="csv: download the cells as CSV", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: "{summary: {postes, variantes, combinations, covered, missing}, cells: {column: [values]}}",
+            400: "Invalid parameters"
+        },
+        tags=['Reports']
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            filters = {name: _int_param(params, name) for name in ('ligne', 'poste', 'boat')}
+            upcoming_hours = _int_param(params, 'upcoming')
+        except ValueError:
+            return Response({'error': 'ligne, poste, boat and upcoming must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        report_status = params.get('status', 'missing')
+        if report_status not in STATUSES:
+            return Response({'error': f"status must be one of: {', '.join(STATUSES)}"}, status=status.HTTP_400_BAD_REQUEST)
+        sens = params.get('sens') or None
+        if sens not in [None] + SENS:
+            return Response({'error': f"sens must be one of: {', '.join(SENS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if upcoming_hours is not None:
+            upcoming_hours = min(max(upcoming_hours, 0), MAX_UPCOMING_HOURS)
+        
+        report, hit = coverage_report(report_status, sens=sens, upcoming_hours=upcoming_hours, **filters)
+        if params.get('export') == 'csv':
+            response = csv_response(f'coverage-{report_status}.csv', list(report['cells']), report['cells'])
+        else:
+            response = Response(report)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
+class LigneLoadReportView(APIView):
+    """Ligne load dashboard (cabines in, out and in progress), by day or week"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Load of the lignes from the planning (actual dates), read from the materialized daily load. "
+            "Columnar: lignes {id, internal_id, name} and loads {ligne, start, entries, exits, wip} by day, or "
+            "{ligne, start, entries, exits, wip_max, wip_avg} by week (whole weeks from Monday). "
+            "Buckets without cabines are omitted."
+        ),
+        manual_parameters=[
+            openapi.Parameter('from', openapi.IN_QUERY, description="First day (YYYY-MM-DD, default: 4 weeks ago)", type=openapi.TYPE_STRING),
+            openapi.Parameter('to', openapi.IN_QUERY, description="Last day (YYYY-MM-DD, default: 12 weeks after from)", type=openapi.TYPE_STRING),
+            openapi.Parameter('bucket', openapi.IN_QUERY, description="day (default) or week", type=openapi.TYPE_STRING),
+            openapi.Parameter('ligne', openapi.IN_QUERY, description="Only this ligne", type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: "{bucket, from, to, lignes: {column: [values]}, loads: {column: [values]}}", 400: "Invalid parameters"},
+        tags=['Reports']
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            start = date.fromisoformat(params['from']) if params.get('from') else date.today() - timedelta(weeks=4)
+            end = date.fromisoformat(params['to']) if params.get('to') else start + timedelta(weeks=12, days=-1)
+            ligne_id = _int_param(params, 'ligne')
+        except ValueError:
+            return Response({'error': 'from and to must be dates (YYYY-MM-DD), ligne an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        bucket = params.get('bucket', 'day')
+        if bucket not in BUCKETS:
+            return Response({'error': f"bucket must be one of: {', '.join(BUCKETS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if end < start or (end - start).days > MAX_LOAD_DAYS:
+            return Response(
+                {'error': f'to must be after from, at most {MAX_LOAD_DAYS} days later'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(ligne_load(start, end, bucket, ligne_id))
+
+
+class ScheduleDeviationReportView(APIView):
+    """Deviation of the actual planning dates from the scheduled ones, per ligne or gamme"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Delays (actual minus scheduled date, calendar days, positive when late) and lead times (working days "
+            "on the ligne, actual and scheduled) of the planning lines. groups is columnar: id, labels, lines, "
+            f"then <metric>_<stat> for the metrics entry_delay, exit_delay, lead_time, scheduled_lead_time and "
+            f"lead_deviation and the stats mean, min, max, {', '.join(f'p{p}' for p in PERCENTILES)} "
+            "(and late, the share of late lines, for the delays). summary has the same stats over all lines, "
+            "histogram the count of lines per delay day. export=csv returns the groups as CSV."
+        ),
+        manual_parameters=[
+            openapi.Parameter('group', openapi.IN_QUERY, description="ligne (default) or gamme", type=openapi.TYPE_STRING),
+            openapi.Parameter('ligne', openapi.IN_QUERY, description="Only this ligne", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('boat', openapi.IN_QUERY, description="Only the cabines of this boat", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('from', openapi.IN_QUERY, description="Only lines scheduled on or after this day (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+            openapi.Parameter('to', openapi.IN_QUERY, description="Only lines scheduled on or before this day (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+            openapi.Parameter('export', openapi.IN_QUERY, description="csv: download the groups as CSV", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: "{group, percentiles, summary: {lines, stat: value}, groups: {column: [values]}, histogram: {delay, entry, exit}}",
+            400: "Invalid parameters"
+        },
+        tags=['Reports']
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            filters = {name: _int_param(params, name) for name in ('ligne', 'boat')}
+            start = date.fromisoformat(params['from']) if params.get('from') else None
+            end = date.fromisoformat(params['to']) if params.get('to') else None
+        except ValueError:
+            return Response({'error': 'ligne and boat must be integers, from and to dates (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+        group = params.get('group', 'ligne')
+        if group not in GROUPS:
+            return Response({'error': f"group must be one of: {', '.join(GROUPS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if start is not None and end is not None and end < start:
+            return Response({'error': 'to must be after from'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        report, hit = schedule_deviation(group, start=start, end=end, **filters)
+        if params.get('export') == 'csv':
+            response = csv_response(f'deviation-{group}.csv', list(report['groups']), report['groups'])
+        else:
+            response = Response(report)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
+class ConflictsReportView(APIView):
+    """Planning conflicts: cabines on overlapping lines, lignes over capacity"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Overlapping planning lines of a cabine (columnar: cabine, cabine_internal_id, line, ligne, other_line, "
+            "other_ligne, start, end of the overlap) and periods when a ligne holds more cabines than its capacity "
+            "(columnar: ligne, capacity, start, end, peak). Periods are inclusive: a cabine entering a ligne on "
+            f"the day it leaves another is a conflict. Lists are capped at {MAX_CONFLICTS}, summary has the full counts."
+        ),
+        manual_parameters=[
+            openapi.Parameter('dates', openapi.IN_QUERY, description="actual (default) or scheduled", type=openapi.TYPE_STRING),
+            openapi.Parameter('from', openapi.IN_QUERY, description="Only lines overlapping [from, to] (YYYY-MM-DD, with to)", type=openapi.TYPE_STRING),
+            openapi.Parameter('to', openapi.IN_QUERY, description="Only lines overlapping [from, to] (YYYY-MM-DD, with from)", type=openapi.TYPE_STRING),
+            openapi.Parameter('ligne', openapi.IN_QUERY, description="Only this ligne's capacity and the cabines planned on it", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: "{dates, summary: {lines, overlaps, over_capacity}, overlaps: {column: [values]}, over_capacity: {column: [values]}}",
+            400: "Invalid parameters"
+        },
+        tags=['Reports']
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            start = date.fromisoformat(params['from']) if params.get('from') else None
+            end = date.fromisoformat(params['to']) if params.get('to') else None
+            ligne_id = _int_param(params, 'ligne')
+        except ValueError:
+            return Response({'error': 'from and to must be dates (YYYY-MM-DD), ligne an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if (start is None) != (end is None) or (start is not None and end < start):
+            return Response({'error': 'from and to go together, to after from'}, status=status.HTTP_400_BAD_REQUEST)
+        kind = params.get('dates', 'actual')
+        if kind not in PERIODS:
+            return Response({'error': f"dates must be one of: {', '.join(PERIODS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        report, hit = conflicts_report(kind, start, end, ligne_id)
+        response = Response(report)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
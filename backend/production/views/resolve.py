@@ -0,0 +1,111 @@
+from datetime import date
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from ..languages import get_requested_language
+from ..resolution import resolve_cabine_at_poste, build_resolution
+from ..warming import upcoming_visits, planning_window
+
+MAX_UPCOMING_HOURS = 24 * 14
+
+
+class ResolveSheetView(APIView):
+    """Sheet to show for a cabine at a poste (shop-floor scan)"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Resolve the sheet documenting a cabine at a poste: cabine -> variante, the cabine's planning "
+            "line on the poste's ligne -> sens, documentation link (variante, poste, sens) -> sheet. "
+            "With bundle=true, also returns the render bundle of a page of the sheet. READER users get the "
+            "sheet and bundle as last published when the sheet is published."
+        ),
+        manual_parameters=[
+            openapi.Parameter('cabine', openapi.IN_QUERY, description="Cabine id", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('poste', openapi.IN_QUERY, description="Poste id", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('date', openapi.IN_QUERY, description="Planning date (YYYY-MM-DD, default today)", type=openapi.TYPE_STRING),
+            openapi.Parameter('sens', openapi.IN_QUERY, description="Ligne sens (D, G or -), instead of the planning's", type=openapi.TYPE_STRING),
+            openapi.Parameter('bundle', openapi.IN_QUERY, description="Also return a page render bundle", type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter('page', openapi.IN_QUERY, description="Page number of the bundle (default 1)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('lang', openapi.IN_QUERY, description="Only return this language of the multilingual fields", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: "{resolution: {cabine, poste, variante, ligne, ligne_sens, sheet}, sheet, bundle?}",
+            400: "Invalid parameters",
+            404: "Unknown cabine or poste, or no sheet documents the cabine at this poste"
+        },
+        tags=['Resolve']
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            cabine_id = int(params['cabine'])
+            poste_id = int(params['poste'])
+            on_date = date.fromisoformat(params['date']) if params.get('date') else date.today()
+            bundle_page = int(params.get('page', 1)) if params.get('bundle') in ('true', '1') else None
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'cabine and poste are required integers, date must be YYYY-MM-DD and page an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        sens = params.get('sens') or None
+        if sens not in (None, 'D', 'G', '-'):
+            return Response({'error': 'sens must be D, G or -'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        resolution = resolve_cabine_at_poste(cabine_id, poste_id, on_date, sens=sens)
+        if resolution is None:
+            return Response({'error': 'Unknown cabine or poste'}, status=status.HTTP_404_NOT_FOUND)
+        if resolution['sheet'] is None:
+            return Response(
+                {'error': 'No sheet documents this cabine at this poste', 'resolution': resolution},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        context = {'request': request, 'lang': get_requested_language(request)}
+        published = getattr(request.user, 'role', None) == 'READER'
+        document, hit = build_resolution(resolution, context, bundle_page=bundle_page, published=published)
+        response = Response({'resolution': resolution, **document})
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
+class UpcomingSheetsView(APIView):
+    """Sheets a poste will need for the cabines planned in the next hours, for stations to prefetch"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Cabines planned on the poste's ligne in the next hours, with the sheet each one resolves to "
+            "at this poste, ordered by entry date. Stations prefetch them through the resolve endpoint."
+        ),
+        manual_parameters=[
+            openapi.Parameter('poste', openapi.IN_QUERY, description="Poste id", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('hours', openapi.IN_QUERY, description=f"Look-ahead window in hours (default CACHE_WARMING_HOURS, max {MAX_UPCOMING_HOURS})", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: "{poste, from, until, visits: [{cabine, cabine_internal_id, variante, ligne, ligne_sens, dates, sheet, ...}]}",
+            400: "Invalid parameters"
+        },
+        tags=['Resolve']
+    )
+    def get(self, request):
+        try:
+            poste_id = int(request.query_params['poste'])
+            hours = int(request.query_params.get('hours', settings.CACHE_WARMING_HOURS))
+        except (KeyError, ValueError):
+            return Response({'error': 'poste is a required integer, hours an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        hours = min(max(hours, 0), MAX_UPCOMING_HOURS)
+        
+        start, until = planning_window(hours)
+        return Response({
+            'poste': poste_id,
+            'from': start,
+            'until': until,
+            'visits': upcoming_visits(hours, poste_id=poste_id),
+        })
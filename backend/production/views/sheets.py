@@ -1,23 +1,117 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.exceptions import NotFound
+from django.db.models import Prefetch
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from ..models import Sheet, SheetPage, InteractiveElement
+from ..models import Sheet, SheetPage, InteractiveElement, SheetSnapshot, SheetHierarchy
 from ..serializers import (
     SheetSerializer,
     SheetListSerializer,
     SheetPageSerializer,
     SheetPageListSerializer,
     InteractiveElementSerializer,
-    InteractiveElementListSerializer
+    InteractiveElementListSerializer,
+    SheetSnapshotSerializer,
+    ElementSyncSerializer,
+    PageInsertSerializer,
+    PageMoveSerializer,
+    PageReorderSerializer,
+    SheetCloneSerializer,
+    ElementLanguagePatchSerializer
 )
 from ..permissions import IsEditorOrAdmin
+from ..bundles import build_page_bundle
+from ..languages import project_language, get_requested_language, JSONSetKey
+from ..snapshots import (
+    publish_sheet,
+    get_published_document,
+    published_page,
+    published_page_list,
+    published_element,
+    published_element_list,
+    published_page_bundle
+)
+from ..querysets import sheets_with_counts, pages_with_counts, elements_with_details
+from ..pagination import SheetPagination, InteractiveElementPagination
+from ..conditional import ConditionalGetMixin, HierarchyConditionalGetMixin, not_modified_response, set_validators
+from ..caching import CachedResponseMixin, invalidate
+from ..element_sync import sync_page_elements
+from ..page_order import insert_page, move_page, reorder_pages, delete_page
+from ..cloning import clone_sheet
+from ..signals import touch_pages
+
 
+lang_parameter = openapi.Parameter(
+    'lang',
+    openapi.IN_QUERY,
+    description="Only return this language of the multilingual fields (fallback: en, fr, first available)",
+    type=openapi.TYPE_STRING
+)
 
-class SheetViewSet(viewsets.ModelViewSet):
+
+class LanguageProjectionMixin:
+    """
+    Adds the `?lang=` read mode to a viewset: multilingual JSON fields are
+    projected to a single language in the database instead of shipping all of them.
+    """
+    
+    def get_language(self):
+        request = self.request
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        return get_requested_language(request)
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['lang'] = self.get_language()
+        return context
+
+
+def _object_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise NotFound()
+
+
+def reader_snapshot(view, sheet_id):
+    """
+    Latest published snapshot of a sheet when the user is a READER, None for
+    other roles and unpublished sheets (served from the live tables)
+    """
+    if getattr(view.request.user, 'role', None) != 'READER' or sheet_id is None:
+        return None
+    return get_published_document(sheet_id, view.get_language())
+
+
+def snapshot_response(request, snapshot, data, part='sheet', immutable=False):
+    """Response with data cut out of a published snapshot, validated by the snapshot hash"""
+    etag = f'"{snapshot["content_hash"]}-{snapshot["language"]}-{part}"'
+    response = not_modified_response(request, etag, snapshot['published_at'])
+    if response is None:
+        response = Response(data)
+    set_validators(response, etag, snapshot['published_at'])
+    response['X-Sheet-Version'] = str(snapshot['version'])
+    if immutable:
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
+# Sheet filters: (query parameter, SheetHierarchy field) chains, most specific level first
+HIERARCHY_FILTERS = [
+    [('cabine', 'cabine_id'), ('variante_gamme', 'variante_id'), ('gamme_cabine', 'gamme_id'), ('boat', 'boat_id')],
+    [('poste', 'poste_id'), ('ligne', 'ligne_id')],
+    [('ligne_sens', 'ligne_sens')],
+]
+
+
+class SheetViewSet(LanguageProjectionMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for Sheet CRUD operations.
     
@@ -30,59 +124,50 @@ class SheetViewSet(viewsets.ModelViewSet):
     """
     queryset = Sheet.objects.all()
     permission_classes = [IsEditorOrAdmin]
+    pagination_class = SheetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['business_id', 'created_by']
     search_fields = ['name', 'business_id']
     ordering_fields = ['created_at', 'updated_at', 'name']
     ordering = ['-created_at']
+    cache_resource = 'sheets'
+    cache_sheet_field = 'id'
+    cache_shared_dependencies = ['references', 'media']
     
     def get_queryset(self):
         """
         Optionally restricts the returned sheets by filtering against
-        boat/ligne hierarchies via PosteVarianteDocumentation
+        boat/ligne hierarchies via the flattened SheetHierarchy table
         """
         queryset = super().get_queryset()
         
-        # Get filter parameters
-        boat_id = self.request.query_params.get('boat')
-        gamme_cabine_id = self.request.query_params.get('gamme_cabine')
-        variante_gamme_id = self.request.query_params.get('variante_gamme')
-        cabine_id = self.request.query_params.get('cabine')
-        ligne_id = self.request.query_params.get('ligne')
-        poste_id = self.request.query_params.get('poste')
-        ligne_sens = self.request.query_params.get('ligne_sens')
+        # Most specific level given of each hierarchy
+        filters = {}
+        for chain in HIERARCHY_FILTERS:
+            for param, field in chain:
+                value = self.request.query_params.get(param)
+                if value:
+                    filters[field] = value
+                    break
         
-        # If any filters are provided, filter through PosteVarianteDocumentation
-        if any([boat_id, gamme_cabine_id, variante_gamme_id, cabine_id, ligne_id, poste_id, ligne_sens]):
-            from ..models import PosteVarianteDocumentation
-            
-            # Start with all documentation records
-            docs = PosteVarianteDocumentation.objects.all()
-            
-            # Apply boat hierarchy filters
-            if cabine_id:
-                docs = docs.filter(varianteGamme__cabine__id=cabine_id)
-            elif variante_gamme_id:
-                docs = docs.filter(varianteGamme__id=variante_gamme_id)
-            elif gamme_cabine_id:
-                docs = docs.filter(varianteGamme__gamme__id=gamme_cabine_id)
-            elif boat_id:
-                docs = docs.filter(varianteGamme__gamme__boat__id=boat_id)
-            
-            # Apply ligne hierarchy filters
-            if poste_id:
-                docs = docs.filter(poste__id=poste_id)
-            elif ligne_id:
-                docs = docs.filter(poste__ligne__id=ligne_id)
-            
-            # Apply ligne_sens filter
-            if ligne_sens:
-                docs = docs.filter(ligne_sens=ligne_sens)
-            
-            # Get sheet IDs from filtered documentation
-            sheet_ids = docs.values_list('sheet_id', flat=True).distinct()
+        if filters:
+            sheet_ids = SheetHierarchy.objects.filter(**filters).values('sheet_id')
             queryset = queryset.filter(id__in=sheet_ids)
         
+        queryset = sheets_with_counts(queryset.select_related('created_by'))
+        
+        if self.action == 'retrieve':
+            pages = pages_with_counts(SheetPage.objects.select_related('created_by'))
+            elements = elements_with_details()
+            language = self.get_language()
+            if language:
+                pages = project_language(pages, language)
+                elements = project_language(elements, language)
+            queryset = queryset.prefetch_related(
+                Prefetch('pages', queryset=pages),
+                Prefetch('pages__elements', queryset=elements),
+            )
+        
         return queryset
     
     def get_serializer_class(self):
@@ -102,6 +187,7 @@ class SheetViewSet(viewsets.ModelViewSet):
     
     @swagger_auto_schema(
         operation_description="Retrieve a specific sheet with all its pages",
+        manual_parameters=[lang_parameter],
         responses={
             200: SheetSerializer(),
             404: "Sheet not found"
@@ -109,6 +195,10 @@ class SheetViewSet(viewsets.ModelViewSet):
         tags=['Sheets']
     )
     def retrieve(self, request, *args, **kwargs):
+        # Readers are served the latest published snapshot when there is one
+        snapshot = reader_snapshot(self, _object_id(kwargs['pk']))
+        if snapshot is not None:
+            return snapshot_response(request, snapshot, snapshot['document'])
         return super().retrieve(request, *args, **kwargs)
     
     @swagger_auto_schema(
@@ -182,9 +272,102 @@ class SheetViewSet(viewsets.ModelViewSet):
         sheets = self.queryset.filter(business_id=business_id)
         serializer = SheetListSerializer(sheets, many=True)
         return Response(serializer.data)
+    
+    @swagger_auto_schema(
+        method='post',
+        operation_description=(
+            "Copy a sheet with all its pages, elements and their field values under a new business_id "
+            "(EDITOR/ADMIN only). With include_documentation, its poste/variante documentation links are "
+            "copied too, pointing to variante_gamme when given (variante_gamme requires include_documentation)."
+        ),
+        request_body=SheetCloneSerializer,
+        responses={
+            201: SheetListSerializer(),
+            400: "Invalid data",
+            403: "Permission denied - requires EDITOR or ADMIN role",
+            404: "Sheet not found"
+        },
+        tags=['Sheets']
+    )
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        """Deep copy a sheet"""
+        sheet = self.get_object()
+        serializer = SheetCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        clone = clone_sheet(sheet, user=request.user, **serializer.validated_data)
+        clone = sheets_with_counts(Sheet.objects.select_related('created_by')).get(pk=clone.pk)
+        return Response(SheetListSerializer(clone).data, status=status.HTTP_201_CREATED)
+    
+    @swagger_auto_schema(
+        method='post',
+        operation_description=(
+            "Publish the current state of a sheet as a new immutable snapshot (EDITOR/ADMIN only). "
+            "If nothing changed since the last published version, that version is returned."
+        ),
+        responses={
+            201: SheetSnapshotSerializer(),
+            200: SheetSnapshotSerializer(),
+            403: "Permission denied - requires EDITOR or ADMIN role",
+            404: "Sheet not found"
+        },
+        tags=['Sheets']
+    )
+    @action(detail=True, methods=['post'])
+    def publish(self, request, pk=None):
+        """Freeze the sheet into a new published snapshot"""
+        sheet = self.get_object()
+        snapshot, created = publish_sheet(sheet, request.user, context=self.get_serializer_context())
+        serializer = SheetSnapshotSerializer(snapshot)
+        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+    
+    @swagger_auto_schema(
+        method='get',
+        operation_description="Get a published snapshot of a sheet (latest version unless version is given)",
+        manual_parameters=[
+            lang_parameter,
+            openapi.Parameter(
+                'version',
+                openapi.IN_QUERY,
+                description="Published version number (default: latest)",
+                type=openapi.TYPE_INTEGER
+            )
+        ],
+        responses={
+            200: SheetSerializer(),
+            404: "Sheet not published"
+        },
+        tags=['Sheets']
+    )
+    @action(detail=True, methods=['get'])
+    def published(self, request, pk=None):
+        """Get a published snapshot of a sheet"""
+        version = request.query_params.get('version')
+        if version is not None and not version.isdigit():
+            return Response({'error': 'version must be an integer'}, status=400)
+        
+        snapshot = get_published_document(pk, self.get_language(), int(version) if version else None)
+        if snapshot is None:
+            return Response({'error': 'No published version found'}, status=404)
+        return snapshot_response(request, snapshot, snapshot['document'], immutable=version is not None)
+    
+    @swagger_auto_schema(
+        method='get',
+        operation_description="List the published versions of a sheet",
+        responses={
+            200: SheetSnapshotSerializer(many=True)
+        },
+        tags=['Sheets']
+    )
+    @action(detail=True, methods=['get'])
+    def versions(self, request, pk=None):
+        """List the published versions of a sheet"""
+        snapshots = SheetSnapshot.objects.filter(sheet_id=pk).select_related('published_by').defer('documents')
+        serializer = SheetSnapshotSerializer(snapshots, many=True)
+        return Response(serializer.data)
 
 
-class SheetPageViewSet(viewsets.ModelViewSet):
+class SheetPageViewSet(LanguageProjectionMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for SheetPage CRUD operations.
     
@@ -198,6 +381,25 @@ class SheetPageViewSet(viewsets.ModelViewSet):
     search_fields = []  # Description is now JSON, can't be searched easily
     ordering_fields = ['created_at', 'updated_at', 'number']
     ordering = ['sheet', 'number']
+    last_modified_fields = ['updated_at', 'sheet__updated_at']
+    cache_resource = 'pages'
+    cache_sheet_field = 'sheet_id'
+    cache_shared_dependencies = ['references', 'media']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('sheet', 'created_by')
+        if self.action in ['list', 'retrieve']:
+            queryset = pages_with_counts(queryset)
+        
+        language = self.get_language()
+        if language:
+            queryset = project_language(queryset, language)
+        if self.action == 'retrieve':
+            elements = elements_with_details()
+            if language:
+                elements = project_language(elements, language)
+            queryset = queryset.prefetch_related(Prefetch('elements', queryset=elements))
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -205,17 +407,36 @@ class SheetPageViewSet(viewsets.ModelViewSet):
         return SheetPageSerializer
     
     @swagger_auto_schema(
-        operation_description="List all sheet pages with optional filtering",
+        operation_description=(
+            "List all sheet pages with optional filtering. READER users list the pages of one sheet "
+            "(sheet is required), from its latest published snapshot when there is one."
+        ),
+        manual_parameters=[lang_parameter],
         responses={
             200: SheetPageListSerializer(many=True),
+            400: "sheet missing (READER users)"
         },
         tags=['Sheet Pages']
     )
     def list(self, request, *args, **kwargs):
+        if getattr(request.user, 'role', None) == 'READER':
+            if not request.query_params.get('sheet'):
+                return Response({'error': 'sheet is required'}, status=status.HTTP_400_BAD_REQUEST)
+            snapshot = reader_snapshot(self, _object_id(request.query_params['sheet']))
+            if snapshot is not None:
+                pages = published_page_list(snapshot['document'])
+                number = request.query_params.get('number')
+                if number:
+                    pages = [page for page in pages if str(page['number']) == number]
+                return snapshot_response(request, snapshot, pages, f'pages-{number or ""}')
         return super().list(request, *args, **kwargs)
     
     @swagger_auto_schema(
-        operation_description="Retrieve a specific sheet page with all its elements",
+        operation_description=(
+            "Retrieve a specific sheet page with all its elements "
+            "(for READER users, as last published when the sheet is published)"
+        ),
+        manual_parameters=[lang_parameter],
         responses={
             200: SheetPageSerializer(),
             404: "Sheet page not found"
@@ -223,6 +444,13 @@ class SheetPageViewSet(viewsets.ModelViewSet):
         tags=['Sheet Pages']
     )
     def retrieve(self, request, *args, **kwargs):
+        page_id = _object_id(kwargs['pk'])
+        snapshot = reader_snapshot(self, self.get_object_sheet_id())
+        if snapshot is not None:
+            page = published_page(snapshot['document'], page_id)
+            if page is None:
+                raise NotFound('Page not published')
+            return snapshot_response(request, snapshot, page, f'page-{page_id}')
         return super().retrieve(request, *args, **kwargs)
     
     @swagger_auto_schema(
@@ -287,30 +515,156 @@ class SheetPageViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         renumber = request.query_params.get('renumber', 'true').lower() == 'true'
-        
-        if renumber:
-            deleted_number = instance.number
-            sheet_id = instance.sheet_id
-            
-            # Delete the page
-            self.perform_destroy(instance)
-            
-            # Renumber subsequent pages
-            pages_to_update = SheetPage.objects.filter(
-                sheet_id=sheet_id,
-                number__gt=deleted_number
-            )
-            for page in pages_to_update:
-                page.number -= 1
-                page.save()
-        else:
-            self.perform_destroy(instance)
-        
+        delete_page(instance, renumber=renumber)
         return Response(status=status.HTTP_204_NO_CONTENT)
     
+    def sheet_pages_response(self, sheet_id):
+        """Pages of a sheet in their new order"""
+        pages = pages_with_counts(SheetPage.objects.filter(sheet_id=sheet_id).select_related('sheet', 'created_by'))
+        return Response(SheetPageListSerializer(pages, many=True).data)
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Insert a page at a position (EDITOR/ADMIN only). The pages at or after it are shifted by one. "
+            "The position is clamped to the end of the sheet."
+        ),
+        request_body=PageInsertSerializer,
+        responses={
+            201: SheetPageSerializer(),
+            400: "Invalid data",
+            403: "Permission denied - requires EDITOR or ADMIN role"
+        },
+        tags=['Sheet Pages']
+    )
+    @action(detail=False, methods=['post'])
+    def insert(self, request):
+        """Insert a page at a position"""
+        serializer = PageInsertSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        page = insert_page(
+            serializer.validated_data['sheet'],
+            serializer.validated_data['number'],
+            user=request.user,
+            description=serializer.validated_data.get('description')
+        )
+        return Response(SheetPageSerializer(page, context=self.get_serializer_context()).data, status=status.HTTP_201_CREATED)
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Move a page to another position (EDITOR/ADMIN only). The pages in between are shifted by one. "
+            "Returns the pages of the sheet in their new order."
+        ),
+        request_body=PageMoveSerializer,
+        responses={
+            200: SheetPageListSerializer(many=True),
+            400: "Invalid data",
+            403: "Permission denied - requires EDITOR or ADMIN role",
+            404: "Sheet page not found"
+        },
+        tags=['Sheet Pages']
+    )
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """Move a page to another position"""
+        page = self.get_object()
+        serializer = PageMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        move_page(page, serializer.validated_data['number'])
+        return self.sheet_pages_response(page.sheet_id)
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Renumber all the pages of a sheet in the given order (EDITOR/ADMIN only). "
+            "page_ids must list every page of the sheet exactly once."
+        ),
+        request_body=PageReorderSerializer,
+        responses={
+            200: SheetPageListSerializer(many=True),
+            400: "Invalid data",
+            403: "Permission denied - requires EDITOR or ADMIN role"
+        },
+        tags=['Sheet Pages']
+    )
+    @action(detail=False, methods=['post'])
+    def reorder(self, request):
+        """Renumber the pages of a sheet"""
+        serializer = PageReorderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        sheet = serializer.validated_data['sheet']
+        try:
+            reorder_pages(sheet, serializer.validated_data['page_ids'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self.sheet_pages_response(sheet.pk)
+    
+    @swagger_auto_schema(
+        method='get',
+        operation_description=(
+            "Get everything needed to render a page in a single request: the page, its elements "
+            "ordered by z_order, and the references and media they use, keyed by id. READER users get "
+            "the page as last published when the sheet is published."
+        ),
+        manual_parameters=[lang_parameter],
+        responses={
+            200: "Page bundle: {page, element_order, elements, references, media}",
+            404: "Sheet page not found"
+        },
+        tags=['Sheet Pages']
+    )
+    @action(detail=True, methods=['get'])
+    def bundle(self, request, pk=None):
+        """Get the normalized render bundle of a page"""
+        page_id = _object_id(pk)
+        snapshot = reader_snapshot(self, self.get_object_sheet_id())
+        if snapshot is not None:
+            bundle = published_page_bundle(snapshot['document'], page_id)
+            if bundle is None:
+                raise NotFound('Page not published')
+            return snapshot_response(request, snapshot, bundle, f'bundle-{page_id}')
+        
+        def bundle_response(request, pk=None):
+            page = self.get_object()
+            return Response(build_page_bundle(page, context=self.get_serializer_context()))
+        return self.cached_response(bundle_response, request, pk=pk)
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Save all the elements of a page in one transaction (EDITOR/ADMIN only). Elements are matched "
+            "by business_id; with replace=true (default) elements missing from the payload are deleted, "
+            "with replace=false only the business ids listed in `deleted` are."
+        ),
+        request_body=ElementSyncSerializer,
+        responses={
+            200: "Counts ({created, updated, unchanged, deleted}) and the page's elements after the sync",
+            400: "Invalid data",
+            403: "Permission denied - requires EDITOR or ADMIN role",
+            404: "Sheet page not found"
+        },
+        tags=['Sheet Pages']
+    )
+    @action(detail=True, methods=['post'], url_path='elements/sync')
+    def sync_elements(self, request, pk=None):
+        """Create, update and delete the elements of a page in bulk"""
+        page = self.get_object()
+        serializer = ElementSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            result = sync_page_elements(
+                page,
+                serializer.validated_data['elements'],
+                user=request.user,
+                replace=serializer.validated_data['replace'],
+                deleted=serializer.validated_data['deleted']
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        elements = InteractiveElement.objects.filter(page=page).select_related('page__sheet', 'created_by')
+        result['elements'] = InteractiveElementListSerializer(elements, many=True).data
+        return Response(result)
 
 
-class InteractiveElementViewSet(viewsets.ModelViewSet):
+class InteractiveElementViewSet(LanguageProjectionMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for InteractiveElement CRUD operations.
     
@@ -319,11 +673,25 @@ class InteractiveElementViewSet(viewsets.ModelViewSet):
     """
     queryset = InteractiveElement.objects.all()
     permission_classes = [IsEditorOrAdmin]
+    pagination_class = InteractiveElementPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['page', 'business_id', 'type', 'created_by']
     search_fields = ['business_id', 'type']
     ordering_fields = ['created_at', 'updated_at']
     ordering = ['page', 'id']
+    last_modified_fields = ['updated_at', 'page__updated_at', 'page__sheet__updated_at']
+    cache_resource = 'elements'
+    cache_sheet_field = 'page__sheet_id'
+    cache_shared_dependencies = ['references', 'media']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('page__sheet', 'created_by')
+        if self.action == 'retrieve':
+            queryset = elements_with_details(queryset)
+        language = self.get_language()
+        if language:
+            queryset = project_language(queryset, language)
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -331,17 +699,35 @@ class InteractiveElementViewSet(viewsets.ModelViewSet):
         return InteractiveElementSerializer
     
     @swagger_auto_schema(
-        operation_description="List all interactive elements with optional filtering",
+        operation_description=(
+            "List all interactive elements with optional filtering. READER users list the elements of one "
+            "page (page is required), as last published when the sheet is published (not paginated)."
+        ),
+        manual_parameters=[lang_parameter],
         responses={
             200: InteractiveElementListSerializer(many=True),
+            400: "page missing (READER users)"
         },
         tags=['Interactive Elements']
     )
     def list(self, request, *args, **kwargs):
+        if getattr(request.user, 'role', None) == 'READER':
+            if not request.query_params.get('page'):
+                return Response({'error': 'page is required'}, status=status.HTTP_400_BAD_REQUEST)
+            page_id = _object_id(request.query_params['page'])
+            snapshot = reader_snapshot(self, SheetPage.objects.filter(pk=page_id).values_list('sheet_id', flat=True).first())
+            if snapshot is not None:
+                page = published_page(snapshot['document'], page_id)
+                elements = published_element_list(snapshot['document'], page) if page is not None else []
+                return snapshot_response(request, snapshot, elements, f'elements-{page_id}')
         return super().list(request, *args, **kwargs)
     
     @swagger_auto_schema(
-        operation_description="Retrieve a specific interactive element",
+        operation_description=(
+            "Retrieve a specific interactive element "
+            "(for READER users, as last published when the sheet is published)"
+        ),
+        manual_parameters=[lang_parameter],
         responses={
             200: InteractiveElementSerializer(),
             404: "Interactive element not found"
@@ -349,6 +735,13 @@ class InteractiveElementViewSet(viewsets.ModelViewSet):
         tags=['Interactive Elements']
     )
     def retrieve(self, request, *args, **kwargs):
+        element_id = _object_id(kwargs['pk'])
+        snapshot = reader_snapshot(self, self.get_object_sheet_id())
+        if snapshot is not None:
+            element = published_element(snapshot['document'], element_id)
+            if element is None:
+                raise NotFound('Element not published')
+            return snapshot_response(request, snapshot, element, f'element-{element_id}')
         return super().retrieve(request, *args, **kwargs)
     
     @swagger_auto_schema(
@@ -379,10 +772,23 @@ class InteractiveElementViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
     
     @swagger_auto_schema(
-        operation_description="Partially update an interactive element (EDITOR/ADMIN only)",
+        operation_description=(
+            "Partially update an interactive element (EDITOR/ADMIN only). "
+            "With ?lang=, only that language of konva_jsons / descriptions is replaced, from a "
+            "{konva_json, description} body, without reading or rewriting the other languages (204)."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'lang',
+                openapi.IN_QUERY,
+                description="Language to replace in konva_jsons / descriptions (language patch mode)",
+                type=openapi.TYPE_STRING
+            )
+        ],
         request_body=InteractiveElementSerializer,
         responses={
             200: InteractiveElementSerializer(),
+            204: "Language updated (language patch mode)",
             400: "Invalid data",
             403: "Permission denied - requires EDITOR or ADMIN role",
             404: "Interactive element not found"
@@ -390,8 +796,32 @@ class InteractiveElementViewSet(viewsets.ModelViewSet):
         tags=['Interactive Elements']
     )
     def partial_update(self, request, *args, **kwargs):
+        language = get_requested_language(request)
+        if language:
+            return self.partial_update_language(request, language)
         return super().partial_update(request, *args, **kwargs)
     
+    def partial_update_language(self, request, language):
+        """Replace one language of the multilingual fields in a single UPDATE"""
+        serializer = ElementLanguagePatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        values = {}
+        if 'konva_json' in serializer.validated_data:
+            values['konva_jsons'] = JSONSetKey('konva_jsons', language, serializer.validated_data['konva_json'])
+        if 'description' in serializer.validated_data:
+            values['descriptions'] = JSONSetKey('descriptions', language, serializer.validated_data['description'])
+        
+        element_id = _object_id(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        elements = InteractiveElement.objects.filter(pk=element_id)
+        if not elements.update(updated_at=timezone.now(), **values):
+            raise NotFound('Interactive element not found')
+        
+        # QuerySet.update doesn't send signals
+        invalidate('elements')
+        touch_pages(elements.order_by().values_list('page_id', flat=True))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
     @swagger_auto_schema(
         operation_description="Delete an interactive element (EDITOR/ADMIN only)",
         responses={
@@ -404,6 +834,13 @@ class InteractiveElementViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
     
+    def perform_destroy(self, instance):
+        page_id = instance.page_id
+        instance.delete()
+        # Element deletes send no signals (see production.signals)
+        invalidate('elements')
+        touch_pages([page_id])
+    
     @swagger_auto_schema(
         method='get',
         operation_description="Get all translations of an element by business_id",
@@ -432,50 +869,56 @@ from ..serializers import (
 )
 
 
-class BoatViewSet(viewsets.ReadOnlyModelViewSet):
+class BoatViewSet(HierarchyConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for listing boats (read-only)"""
     queryset = Boat.objects.all().order_by('name')
+    cache_resource = 'hierarchy'
     serializer_class = BoatSerializer
     permission_classes = [IsEditorOrAdmin]
 
 
-class GammeCabineViewSet(viewsets.ReadOnlyModelViewSet):
+class GammeCabineViewSet(HierarchyConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for listing gamme cabines (read-only), filterable by boat"""
-    queryset = GammeCabine.objects.all().order_by('internal_id')
+    queryset = GammeCabine.objects.select_related('boat').order_by('internal_id')
+    cache_resource = 'hierarchy'
     serializer_class = GammeCabineSerializer
     permission_classes = [IsEditorOrAdmin]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['boat']
 
 
-class VarianteGammeViewSet(viewsets.ReadOnlyModelViewSet):
+class VarianteGammeViewSet(HierarchyConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for listing variante gammes (read-only), filterable by gamme"""
-    queryset = VarianteGamme.objects.all().order_by('internal_id')
+    queryset = VarianteGamme.objects.select_related('gamme').order_by('internal_id')
+    cache_resource = 'hierarchy'
     serializer_class = VarianteGammeSerializer
     permission_classes = [IsEditorOrAdmin]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['gamme']
 
 
-class CabineViewSet(viewsets.ReadOnlyModelViewSet):
+class CabineViewSet(HierarchyConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for listing cabines (read-only), filterable by variante_gamme"""
-    queryset = Cabine.objects.all().order_by('internal_id')
+    queryset = Cabine.objects.select_related('variante_gamme').order_by('internal_id')
+    cache_resource = 'hierarchy'
     serializer_class = CabineSerializer
     permission_classes = [IsEditorOrAdmin]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['variante_gamme']
 
 
-class LigneViewSet(viewsets.ReadOnlyModelViewSet):
+class LigneViewSet(HierarchyConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for listing lignes (read-only)"""
     queryset = Ligne.objects.all().order_by('name')
+    cache_resource = 'hierarchy'
     serializer_class = LigneSerializer
     permission_classes = [IsEditorOrAdmin]
 
 
-class PosteViewSet(viewsets.ReadOnlyModelViewSet):
+class PosteViewSet(HierarchyConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for listing postes (read-only), filterable by ligne"""
-    queryset = Poste.objects.all().order_by('internal_id')
+    queryset = Poste.objects.select_related('ligne').order_by('internal_id')
+    cache_resource = 'hierarchy'
     serializer_class = PosteSerializer
     permission_classes = [IsEditorOrAdmin]
     filter_backends = [DjangoFilterBackend]
@@ -0,0 +1,59 @@
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from ..changes import CursorExpired, get_changes, current_cursor, DEFAULT_LIMIT, MAX_LIMIT
+from ..languages import get_requested_language
+
+
+class ChangeFeedView(APIView):
+    """
+    Delta sync feed of pages, elements and instance field values.
+    
+    Clients first get a cursor (no `since`), then load what they need, then
+    follow changes with `?since=<cursor>`, passing back the returned cursor
+    until `has_more` is false. Changes are kept CHANGE_LOG_RETENTION_DAYS: an
+    older cursor gets 410 Gone, and the client has to reload everything from
+    the regular endpoints with the new cursor returned along.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Pages, elements and instance field values created, updated or deleted after a cursor. "
+            "Without `since`, only returns the current cursor."
+        ),
+        manual_parameters=[
+            openapi.Parameter('since', openapi.IN_QUERY, description="Cursor returned by the previous call", type=openapi.TYPE_STRING),
+            openapi.Parameter('sheet', openapi.IN_QUERY, description="Only changes of this sheet", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('limit', openapi.IN_QUERY, description=f"Maximum number of changes (default {DEFAULT_LIMIT}, max {MAX_LIMIT})", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('lang', openapi.IN_QUERY, description="Only return this language of the multilingual fields", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: "{cursor, has_more, pages, elements, field_values, deleted: {pages, elements, field_values}}",
+            400: "Invalid parameters",
+            410: "{error, cursor}: the cursor expired, reload everything and follow changes from the new cursor"
+        },
+        tags=['Sync']
+    )
+    def get(self, request):
+        since = request.query_params.get('since')
+        if not since:
+            return Response({'cursor': current_cursor()})
+        
+        try:
+            sheet_id = int(request.query_params['sheet']) if request.query_params.get('sheet') else None
+            limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'sheet and limit must be integers'}, status=400)
+        
+        context = {'request': request, 'lang': get_requested_language(request)}
+        try:
+            return Response(get_changes(since, sheet_id=sheet_id, limit=limit, context=context))
+        except CursorExpired:
+            return Response(
+                {'error': 'Cursor expired, a full resync is required', 'cursor': current_cursor()},
+                status=410
+            )
@@ -0,0 +1,107 @@
+"""
+Planning-driven cache warming.
+
+The planning says when each cabine enters which ligne, so the sheets every
+poste will need in the next hours are known in advance: for each planning
+line running in the window, each poste of its ligne needs the sheet resolved
+for (variante, poste, sens), exactly as `resolution.resolve_cabine_at_poste`
+would at scan time. `upcoming_visits` lists them in one query (stations
+prefetch them through the upcoming endpoint) and `warm_caches` builds their
+resolution documents, first page bundle included, ahead of the first scan.
+
+Warming fills the cache of the process running it: run the `warm_caches`
+command against a cache shared with the web workers (see CACHES).
+"""
+from datetime import timedelta
+from itertools import product
+
+from django.db import connection
+from django.http import Http404
+from django.utils import timezone
+
+from .resolution import ANY_SENS, build_resolution
+
+# For each planning line overlapping the window (actual or scheduled dates)
+# and each poste of its ligne, the documentation link of (variante, poste,
+# sens), the exact sens winning over '-' like at resolution time
+UPCOMING_SQL = """
+SELECT * FROM (
+    SELECT DISTINCT ON (pl.id, p.id)
+        p.id AS poste, pl.cabine_id AS cabine, c.internal_id AS cabine_internal_id,
+        c.variante_gamme_id AS variante, pl.ligne_id AS ligne, pl.ligne_sens,
+        pl.entry_date, pl.exit_date, pl.scheduled_entry_date, pl.scheduled_exit_date,
+        s.id AS sheet, s.business_id AS sheet_business_id, s.name AS sheet_name, s.updated_at AS sheet_updated_at
+    FROM production_planning_line pl
+    JOIN cabine c ON c.id = pl.cabine_id
+    JOIN poste p ON p.ligne_id = pl.ligne_id
+    JOIN poste_variante_documentation d
+        ON d."varianteGamme_id" = c.variante_gamme_id AND d.poste_id = p.id AND d.ligne_sens IN (pl.ligne_sens, %(any)s)
+    JOIN sheet s ON s.id = d.sheet_id
+    WHERE ((pl.entry_date <= %(until)s AND pl.exit_date >= %(today)s)
+        OR (pl.scheduled_entry_date <= %(until)s AND pl.scheduled_exit_date >= %(today)s))
+        {poste_filter}
+    ORDER BY pl.id, p.id, d.ligne_sens = %(any)s, d.id
+) visits
+ORDER BY LEAST(entry_date, scheduled_entry_date), poste, cabine
+"""
+
+
+def planning_window(hours, now=None):
+    """Planning dates covered by the next `hours` hours (planning lines are dated by day)"""
+    now = timezone.localtime(now)
+    return now.date(), (now + timedelta(hours=hours)).date()
+
+
+def upcoming_visits(hours, poste_id=None, now=None):
+    """
+    Cabines running on a ligne in the next `hours` hours, with the sheet each
+    poste of the ligne (or only `poste_id`) will show for them
+    """
+    today, until = planning_window(hours, now)
+    params = {'today': today, 'until': until, 'any': ANY_SENS}
+    poste_filter = ''
+    if poste_id is not None:
+        poste_filter = 'AND p.id = %(poste)s'
+        params['poste'] = poste_id
+    with connection.cursor() as cursor:
+        cursor.execute(UPCOMING_SQL.format(poste_filter=poste_filter), params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def warm_caches(hours, context, languages=(None,), now=None):
+    """
+    Build the resolution documents (sheet alone and with its first page
+    bundle) of every upcoming (variante, poste, sens), for each language,
+    both live and as published (what READER stations are served).
+
+    `context` must hold the request the documents are built for (its host
+    and scheme show in media URLs). Returns counts of visits, documents and
+    documents that had to be built.
+    """
+    visits = upcoming_visits(hours, now=now)
+    resolutions = {
+        (visit['variante'], visit['poste'], visit['ligne_sens']): {
+            'cabine': visit['cabine'],
+            'poste': visit['poste'],
+            'variante': visit['variante'],
+            'ligne': visit['ligne'],
+            'ligne_sens': visit['ligne_sens'],
+            'sheet': visit['sheet'],
+        }
+        for visit in visits
+    }
+    documents = built = 0
+    for resolution in resolutions.values():
+        for language in languages:
+            for bundle_page, published in product((None, 1), (False, True)):
+                try:
+                    _, hit = build_resolution(
+                        resolution, {**context, 'lang': language}, bundle_page=bundle_page, published=published
+                    )
+                except Http404:
+                    # Sheet without pages
+                    continue
+                documents += 1
+                built += not hit
+    return {'visits': len(visits), 'documents': documents, 'built': built}
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useMemo, useState } from 'react';
 import { Accordion, Badge, Button, Form, ListGroup, Modal } from 'react-bootstrap';
 import { ChevronLeft, ChevronRight, FunnelFill, Plus, XCircle } from 'react-bootstrap-icons';
 import { useAuth } from '../../contexts/AuthContext';
@@ -6,8 +6,8 @@ import { useError } from '../../contexts/ErrorContext';
 import { useLanguage } from '../../contexts/LanguageContext';
 import { useSheet } from '../../contexts/SheetContext';
 import { useSuccess } from '../../contexts/SuccessContext';
-import { BoatsAPI, CabinesAPI, GammeCabinesAPI, LignesAPI, PostesAPI, VarianteGammesAPI } from '../../services/api';
-import type { SheetFilters } from '../../types';
+import { HierarchyAPI, hierarchyRows } from '../../services/api';
+import type { HierarchyTree, SheetFilters } from '../../types';
 
 export const SheetSidebar: React.FC = () => {
   const { t } = useLanguage();
@@ -23,90 +23,57 @@ export const SheetSidebar: React.FC = () => {
   // Filter state
   const [filters, setFilters] = useState<SheetFilters>({});
   
-  // Filter options
-  const [boats, setBoats] = useState<Array<{id: number; internal_id: string; name: string}>>([]);
-  const [gammeCabines, setGammeCabines] = useState<Array<{id: number; internal_id: string}>>([]);
-  const [varianteGammes, setVarianteGammes] = useState<Array<{id: number; internal_id: string}>>([]);
-  const [cabines, setCabines] = useState<Array<{id: number; internal_id: string}>>([]);
-  const [lignes, setLignes] = useState<Array<{id: number; internal_id: string; name: string}>>([]);
-  const [postes, setPostes] = useState<Array<{id: number; internal_id: string}>>([]);
+  // Filter options, all from the hierarchy tree
+  const [tree, setTree] = useState<HierarchyTree | null>(null);
 
-  // Load filter options
   useEffect(() => {
-    loadBoats();
-    loadLignes();
+    loadHierarchy();
   }, []);
 
-  const loadBoats = async () => {
+  const loadHierarchy = async () => {
     try {
-      const response = await BoatsAPI.list();
-      setBoats(response.data);
+      const response = await HierarchyAPI.tree();
+      setTree(response.data);
     } catch (error) {
-      console.error('Failed to load boats:', error);
+      console.error('Failed to load hierarchy:', error);
     }
   };
 
-  const loadGammeCabines = async (boatId: number) => {
-    try {
-      const response = await GammeCabinesAPI.list(boatId);
-      setGammeCabines(response.data);
-    } catch (error) {
-      console.error('Failed to load gamme cabines:', error);
-    }
-  };
-
-  const loadVarianteGammes = async (gammeId: number) => {
-    try {
-      const response = await VarianteGammesAPI.list(gammeId);
-      setVarianteGammes(response.data);
-    } catch (error) {
-      console.error('Failed to load variante gammes:', error);
-    }
-  };
-
-  const loadCabines = async (varianteId: number) => {
-    try {
-      const response = await CabinesAPI.list(varianteId);
-      setCabines(response.data);
-    } catch (error) {
-      console.error('Failed to load cabines:', error);
-    }
-  };
-
-  const loadLignes = async () => {
-    try {
-      const response = await LignesAPI.list();
-      setLignes(response.data);
-    } catch (error) {
-      console.error('Failed to load lignes:', error);
-    }
-  };
-
-  const loadPostes = async (ligneId: number) => {
-    try {
-      const response = await PostesAPI.list(ligneId);
-      setPostes(response.data);
-    } catch (error) {
-      console.error('Failed to load postes:', error);
-    }
-  };
+  const boats = useMemo(() => (tree ? hierarchyRows(tree.boats) : []), [tree]);
+  const lignes = useMemo(() => (tree ? hierarchyRows(tree.lignes) : []), [tree]);
+  const gammeCabines = useMemo(
+    () => (tree && filters.boat ? hierarchyRows(tree.gammes).filter(gamme => gamme.boat === filters.boat) : []),
+    [tree, filters.boat]
+  );
+  const varianteGammes = useMemo(
+    () => (tree && filters.gamme_cabine
+      ? hierarchyRows(tree.variantes).filter(variante => variante.gamme === filters.gamme_cabine)
+      : []),
+    [tree, filters.gamme_cabine]
+  );
+  const cabines = useMemo(
+    () => (tree && filters.variante_gamme
+      ? hierarchyRows(tree.cabines).filter(cabine => cabine.variante_gamme === filters.variante_gamme)
+      : []),
+    [tree, filters.variante_gamme]
+  );
+  const postes = useMemo(
+    () => (tree && filters.ligne ? hierarchyRows(tree.postes).filter(poste => poste.ligne === filters.ligne) : []),
+    [tree, filters.ligne]
+  );
 
   // Handle filter changes with cascading
   const handleBoatChange = (boatId: string) => {
     const newFilters = { ...filters };
     if (boatId) {
       newFilters.boat = parseInt(boatId);
-      loadGammeCabines(parseInt(boatId));
     } else {
       delete newFilters.boat;
-      setGammeCabines([]);
     }
     // Clear downstream filters
     delete newFilters.gamme_cabine;
     delete newFilters.variante_gamme;
     delete newFilters.cabine;
-    setVarianteGammes([]);
-    setCabines([]);
     setFilters(newFilters);
   };
 
@@ -114,15 +81,12 @@ export const SheetSidebar: React.FC = () => {
     const newFilters = { ...filters };
     if (gammeId) {
       newFilters.gamme_cabine = parseInt(gammeId);
-      loadVarianteGammes(parseInt(gammeId));
     } else {
       delete newFilters.gamme_cabine;
-      setVarianteGammes([]);
     }
     // Clear downstream filters
     delete newFilters.variante_gamme;
     delete newFilters.cabine;
-    setCabines([]);
     setFilters(newFilters);
   };
 
@@ -130,10 +94,8 @@ export const SheetSidebar: React.FC = () => {
     const newFilters = { ...filters };
     if (varianteId) {
       newFilters.variante_gamme = parseInt(varianteId);
-      loadCabines(parseInt(varianteId));
     } else {
       delete newFilters.variante_gamme;
-      setCabines([]);
     }
     // Clear downstream filters
     delete newFilters.cabine;
@@ -154,10 +116,8 @@ export const SheetSidebar: React.FC = () => {
     const newFilters = { ...filters };
     if (ligneId) {
       newFilters.ligne = parseInt(ligneId);
-      loadPostes(parseInt(ligneId));
     } else {
       delete newFilters.ligne;
-      setPostes([]);
     }
     // Clear downstream filters
     delete newFilters.poste;
@@ -192,10 +152,6 @@ export const SheetSidebar: React.FC = () => {
 
   const handleClearFilters = () => {
     setFilters({});
-    setGammeCabines([]);
-    setVarianteGammes([]);
-    setCabines([]);
-    setPostes([]);
     if (applyFilters) {
       applyFilters({});
     }
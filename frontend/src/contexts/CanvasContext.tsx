@@ -7,7 +7,7 @@ import { getReferenceModel } from '../config/references';
 import { useLanguage } from '../contexts/LanguageContext';
 import { InteractiveElementsAPI } from '../services/api';
 import { CanvasElement } from '../types/canvas';
-import { InteractiveElementCreateUpdate } from '../types/index';
+import { InteractiveElementSyncItem } from '../types/index';
 
 interface CanvasContextType {
   elements: CanvasElement[];
@@ -218,6 +218,8 @@ export const CanvasProvider: React.FC<{ children: React.ReactNode }> = ({ childr
         : -1;
       let nextZOrder = maxZOrder + 1;
       
+      const items: InteractiveElementSyncItem[] = [];
+      
       // Process each canvas element
       for (const element of elements) {
         keepBusinessIds.add(element.id);
@@ -239,8 +241,7 @@ export const CanvasProvider: React.FC<{ children: React.ReactNode }> = ({ childr
           lang
         );
         
-        const elementData: InteractiveElementCreateUpdate = {
-          page: pageId,
+        items.push({
           business_id: element.id,
           type: element.type,
           z_order: ('z_order' in element && typeof (element as any).z_order === 'number') 
@@ -248,25 +249,16 @@ export const CanvasProvider: React.FC<{ children: React.ReactNode }> = ({ childr
             : (existing ? existing.z_order : nextZOrder++),
           descriptions,
           konva_jsons,
-        };
-        
-        if (existing) {
-          // Update existing element
-          await InteractiveElementsAPI.update(existing.id, elementData);
-        } else {
-          // Create new element
-          await InteractiveElementsAPI.create(elementData);
-        }
-        
-        keepBusinessIds.add(element.id);
+        });
       }
       
-      // Delete elements that are no longer in the canvas
-      for (const existing of existingElements) {
-        if (!keepBusinessIds.has(existing.business_id)) {
-          await InteractiveElementsAPI.delete(existing.id);
-        }
-      }
+      // Elements that are no longer in the canvas
+      const deleted = existingElements
+        .filter(existing => !keepBusinessIds.has(existing.business_id))
+        .map(existing => existing.business_id);
+      
+      // Save everything in a single transactional request
+      await InteractiveElementsAPI.sync(pageId, { elements: items, deleted, replace: false });
       
       console.log('Elements saved successfully');
     } catch (error) {
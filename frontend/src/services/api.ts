@@ -1,11 +1,30 @@
 import axios, { InternalAxiosRequestConfig } from "axios";
 import type {
   InteractiveElement,
+  ConflictFilters,
+  CoverageFilters,
+  CoverageReport,
+  DeviationFilters,
+  DeviationReport,
+  LigneLoadFilters,
+  LigneLoadReport,
+  HierarchyTree,
+  PlanningFilters,
+  PlanningConflicts,
+  PlanningImportReport,
+  PlanningTimeline,
+  TimelineFilters,
+  ProductionPlanningLine,
   InteractiveElementCreateUpdate,
+  InteractiveElementSync,
+  InteractiveElementSyncResult,
   Sheet,
   SheetCreateUpdate,
   SheetPage,
-  SheetPageCreateUpdate
+  SheetPageCreateUpdate,
+  SheetResolution,
+  SyncChanges,
+  UpcomingSheets
 } from "../types";
 
 const api = axios.create({
@@ -208,6 +227,18 @@ export const SheetPagesAPI = {
     await getFreshCsrfToken();
     return api.delete(`/pages/${id}/?renumber=${renumber}`);
   },
+  insert: async (data: SheetPageCreateUpdate) => {
+    await getFreshCsrfToken();
+    return api.post<SheetPage>('/pages/insert/', data);
+  },
+  move: async (id: number, number: number) => {
+    await getFreshCsrfToken();
+    return api.post<SheetPage[]>(`/pages/${id}/move/`, { number });
+  },
+  reorder: async (sheetId: number, pageIds: number[]) => {
+    await getFreshCsrfToken();
+    return api.post<SheetPage[]>('/pages/reorder/', { sheet: sheetId, page_ids: pageIds });
+  },
   getByBusinessId: (businessId: string) =>
     api.get<SheetPage[]>(`/pages/by_business_id/?business_id=${businessId}`),
 };
@@ -236,14 +267,33 @@ export const InteractiveElementsAPI = {
     await getFreshCsrfToken();
     return api.patch<InteractiveElement>(`/elements/${id}/`, data);
   },
+  patchLanguage: async (id: number, lang: string, data: { konva_json?: object; description?: string }) => {
+    await getFreshCsrfToken();
+    return api.patch(`/elements/${id}/?lang=${lang}`, data);
+  },
   delete: async (id: number) => {
     await getFreshCsrfToken();
     return api.delete(`/elements/${id}/`);
   },
   getByBusinessId: (businessId: string) =>
     api.get<InteractiveElement[]>(`/elements/by_business_id/?business_id=${businessId}`),
+  sync: async (pageId: number, data: InteractiveElementSync) => {
+    await getFreshCsrfToken();
+    return api.post<InteractiveElementSyncResult>(`/pages/${pageId}/elements/sync/`, data);
+  },
+};
+
+// Whole boat/ligne hierarchy in one request (revalidated with its ETag)
+export const HierarchyAPI = {
+  tree: () => api.get<HierarchyTree>('/hierarchy/'),
 };
 
+// Rows of a columnar hierarchy level
+export const hierarchyRows = <T extends Record<string, unknown[]>>(level: T) =>
+  (level.id || []).map((_, index) =>
+    Object.fromEntries(Object.entries(level).map(([column, values]) => [column, values[index]]))
+  ) as Array<{ [K in keyof T]: T[K][number] }>;
+
 // Filter entity APIs for sheet filtering
 export const BoatsAPI = {
   list: () => api.get<Array<{id: number; internal_id: string; name: string}>>('/boats/'),
@@ -281,4 +331,104 @@ export const PostesAPI = {
   },
 };
 
+export const PlanningAPI = {
+  list: (filters?: PlanningFilters) => {
+    const queryParams = new URLSearchParams();
+    Object.entries(filters || {}).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') queryParams.append(key, value.toString());
+    });
+    const query = queryParams.toString();
+    return api.get<ProductionPlanningLine[]>(`/planning/${query ? `?${query}` : ''}`);
+  },
+  // Gantt data sized to the viewport: bars at fine zoom, occupancy buckets at coarse zoom
+  timeline: (filters?: TimelineFilters) => {
+    const queryParams = new URLSearchParams();
+    Object.entries(filters || {}).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') queryParams.append(key, value.toString());
+    });
+    const query = queryParams.toString();
+    return api.get<PlanningTimeline>(`/planning/timeline/${query ? `?${query}` : ''}`);
+  },
+  // Admin only: merge an ERP planning export (CSV or XLSX) into the planning
+  import: (file: File, dryRun = false) => {
+    const data = new FormData();
+    data.append('file', file);
+    if (dryRun) data.append('dry_run', 'true');
+    return api.post<PlanningImportReport>('/planning/import/', data, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
+};
+
+const reportQuery = (filters?: object) => {
+  const queryParams = new URLSearchParams();
+  Object.entries(filters || {}).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== '') queryParams.append(key, String(value));
+  });
+  return queryParams;
+};
+
+export const ReportsAPI = {
+  coverage: (filters?: CoverageFilters) => {
+    const query = reportQuery(filters).toString();
+    return api.get<CoverageReport>(`/reports/coverage/${query ? `?${query}` : ''}`);
+  },
+  coverageCsv: (filters?: CoverageFilters) => {
+    const queryParams = reportQuery(filters);
+    queryParams.append('export', 'csv');
+    return api.get<Blob>(`/reports/coverage/?${queryParams.toString()}`, { responseType: 'blob' });
+  },
+  ligneLoad: (filters?: LigneLoadFilters) => {
+    const query = reportQuery(filters).toString();
+    return api.get<LigneLoadReport>(`/reports/ligne-load/${query ? `?${query}` : ''}`);
+  },
+  deviation: (filters?: DeviationFilters) => {
+    const query = reportQuery(filters).toString();
+    return api.get<DeviationReport>(`/reports/deviation/${query ? `?${query}` : ''}`);
+  },
+  deviationCsv: (filters?: DeviationFilters) => {
+    const queryParams = reportQuery(filters);
+    queryParams.append('export', 'csv');
+    return api.get<Blob>(`/reports/deviation/?${queryParams.toString()}`, { responseType: 'blob' });
+  },
+  conflicts: (filters?: ConflictFilters) => {
+    const query = reportQuery(filters).toString();
+    return api.get<PlanningConflicts>(`/reports/conflicts/${query ? `?${query}` : ''}`);
+  },
+};
+
+// Delta sync feed: get a cursor first, then follow changes with `since`.
+// A 410 means the cursor expired: reload everything and follow the returned cursor
+export const SyncAPI = {
+  changes: (params?: { since?: string; sheet?: number; limit?: number; lang?: string }) => {
+    const queryParams = new URLSearchParams();
+    if (params?.since) queryParams.append('since', params.since);
+    if (params?.sheet) queryParams.append('sheet', params.sheet.toString());
+    if (params?.limit) queryParams.append('limit', params.limit.toString());
+    if (params?.lang) queryParams.append('lang', params.lang);
+    const query = queryParams.toString();
+    return api.get<SyncChanges>(`/sync/changes/${query ? `?${query}` : ''}`);
+  },
+};
+
+// Sheet of a cabine at a poste
+export const ResolveAPI = {
+  resolve: (params: { cabine: number; poste: number; date?: string; sens?: string; bundle?: boolean; page?: number; lang?: string }) => {
+    const queryParams = new URLSearchParams();
+    queryParams.append('cabine', params.cabine.toString());
+    queryParams.append('poste', params.poste.toString());
+    if (params.date) queryParams.append('date', params.date);
+    if (params.sens) queryParams.append('sens', params.sens);
+    if (params.bundle) queryParams.append('bundle', 'true');
+    if (params.page) queryParams.append('page', params.page.toString());
+    if (params.lang) queryParams.append('lang', params.lang);
+    return api.get<SheetResolution>(`/resolve/?${queryParams.toString()}`);
+  },
+  // Sheets the poste will need soon, to prefetch in the background
+  upcoming: (poste: number, hours?: number) => {
+    const query = hours !== undefined ? `&hours=${hours}` : '';
+    return api.get<UpcomingSheets>(`/resolve/upcoming/?poste=${poste}${query}`);
+  },
+};
+
 export default api;
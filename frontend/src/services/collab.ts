@@ -0,0 +1,29 @@
+import type { PageEditDiff, PageEditServerMessage } from '../types';
+
+/**
+ * Live editing session of a page.
+ * Authenticated by the bearertoken cookie, sent with the WebSocket handshake.
+ */
+export class PageEditSession {
+  private socket: WebSocket;
+  private nextId = 1;
+
+  constructor(pageId: number, onMessage: (message: PageEditServerMessage) => void) {
+    const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    this.socket = new WebSocket(`${protocol}//${window.location.host}/ws/pages/${pageId}/`);
+    this.socket.onmessage = (event) => onMessage(JSON.parse(event.data));
+  }
+
+  /**
+   * Send a batch of element changes; returns its id, echoed by the ack or error
+   */
+  sendDiff(diff: PageEditDiff): number {
+    const id = this.nextId++;
+    this.socket.send(JSON.stringify({ type: 'diff', id, ...diff }));
+    return id;
+  }
+
+  close(): void {
+    this.socket.close();
+  }
+}
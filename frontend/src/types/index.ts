@@ -68,6 +68,22 @@ export interface InteractiveElementCreateUpdate {
   field_values_data?: FieldDefinitionValueData[];
 }
 
+export type InteractiveElementSyncItem = Omit<InteractiveElementCreateUpdate, 'page'>;
+
+export interface InteractiveElementSync {
+  elements: InteractiveElementSyncItem[];
+  deleted?: string[]; // business ids to delete when replace is false
+  replace?: boolean; // true (default): elements missing from `elements` are deleted
+}
+
+export interface InteractiveElementSyncResult {
+  created: number;
+  updated: number;
+  unchanged: number;
+  deleted: number;
+  elements: InteractiveElement[];
+}
+
 export interface FieldDefinitionValue {
   id: number;
   name: string;
@@ -81,6 +97,52 @@ export interface FieldDefinitionValue {
   image?: Record<string, unknown>; // ImageLibrary object when expanded
 }
 
+export interface SyncChanges {
+  cursor: string;
+  has_more?: boolean;
+  pages?: SheetPage[];
+  elements?: InteractiveElement[];
+  field_values?: Array<FieldDefinitionValue & { interactive_element: number }>;
+  deleted?: { pages: number[]; elements: number[]; field_values: number[] };
+}
+
+export interface SheetResolution {
+  resolution: {
+    cabine: number;
+    poste: number;
+    variante: number;
+    ligne: number;
+    ligne_sens: 'D' | 'G' | '-' | null;
+    sheet: number;
+  };
+  sheet: Sheet;
+  bundle?: Record<string, unknown>; // page render bundle, with bundle: true
+}
+
+export interface UpcomingVisit {
+  poste: number;
+  cabine: number;
+  cabine_internal_id: string;
+  variante: number;
+  ligne: number;
+  ligne_sens: 'D' | 'G' | '-';
+  entry_date: string;
+  exit_date: string;
+  scheduled_entry_date: string;
+  scheduled_exit_date: string;
+  sheet: number;
+  sheet_business_id: string;
+  sheet_name: string;
+  sheet_updated_at: string;
+}
+
+export interface UpcomingSheets {
+  poste: number;
+  from: string;
+  until: string;
+  visits: UpcomingVisit[];
+}
+
 export interface FieldDefinitionValueData {
   name: string;
   type: 'string' | 'int' | 'float' | 'image';
@@ -123,6 +185,7 @@ export interface Ligne {
   id: number;
   internal_id: string;
   name: string;
+  capacity: number | null; // most cabines at once, null: unlimited
 }
 
 export interface Poste {
@@ -132,6 +195,178 @@ export interface Poste {
   ligne_name?: string;
 }
 
+export interface ProductionPlanningLine {
+  id: number;
+  cabine: number;
+  cabine_internal_id: string;
+  variante_gamme: number;
+  ligne: number;
+  ligne_name: string;
+  ligne_sens: 'D' | 'G' | '-';
+  entry_date: string;
+  exit_date: string;
+  scheduled_entry_date: string;
+  scheduled_exit_date: string;
+}
+
+export interface PlanningFilters {
+  cabine?: number;
+  ligne?: number;
+  ligne_sens?: 'D' | 'G' | '-';
+  from?: string; // lines overlapping [from, to]
+  to?: string;
+  date?: string; // lines running on that day
+  dates?: 'actual' | 'scheduled';
+}
+
+export interface TimelineFilters {
+  from?: string; // viewport, YYYY-MM-DD
+  to?: string;
+  width?: number; // viewport width in pixels
+  zoom?: 'auto' | 'buckets' | 'intervals';
+  dates?: 'actual' | 'scheduled';
+  ligne?: number;
+}
+
+interface TimelineBase {
+  from: string;
+  to: string;
+  dates: 'actual' | 'scheduled';
+  lignes: { id: number[]; internal_id: string[]; name: string[] };
+}
+
+// Columnar: one bar per planning line (fine zoom) or occupancy per ligne and bucket (coarse zoom)
+export type PlanningTimeline =
+  | (TimelineBase & {
+      zoom: 'intervals';
+      intervals: {
+        id: number[];
+        ligne: number[];
+        cabine: number[];
+        cabine_internal_id: string[];
+        ligne_sens: ('D' | 'G' | '-')[];
+        start: string[];
+        end: string[];
+      };
+    })
+  | (TimelineBase & {
+      zoom: 'buckets';
+      bucket_days: number;
+      buckets: { ligne: number[]; start: string[]; peak: number[]; occupancy: number[] };
+    });
+
+export interface PlanningImportReport {
+  rows: number;
+  invalid: number; // rows rejected by validation
+  unresolved: number; // rows with an unknown or ambiguous cabine/ligne
+  inserted: number;
+  updated: number;
+  unchanged: number;
+  dry_run: boolean;
+  errors: { line: number; error: string }[]; // first errors only
+  conflicts: PlanningConflicts; // for the cabines and lignes of the file
+}
+
+export interface ConflictFilters {
+  dates?: 'actual' | 'scheduled';
+  from?: string; // with to: lines overlapping [from, to]
+  to?: string;
+  ligne?: number;
+}
+
+// Columnar, capped lists; summary has the full counts
+export interface PlanningConflicts {
+  dates: 'actual' | 'scheduled';
+  summary: { lines: number; overlaps: number; over_capacity: number };
+  overlaps: {
+    cabine: number[];
+    cabine_internal_id: string[];
+    line: number[];
+    ligne: number[];
+    other_line: number[];
+    other_ligne: number[];
+    start: string[];
+    end: string[];
+  };
+  over_capacity: { ligne: number[]; capacity: number[]; start: string[]; end: string[]; peak: number[] };
+}
+
+// Columnar hierarchy levels: parallel lists, one entry per row
+export interface HierarchyTree {
+  boats: { id: number[]; internal_id: string[]; name: string[] };
+  gammes: { id: number[]; internal_id: string[]; boat: number[] };
+  variantes: { id: number[]; internal_id: string[]; gamme: number[] };
+  cabines: { id: number[]; internal_id: string[]; variante_gamme: number[] };
+  lignes: { id: number[]; internal_id: string[]; name: string[] };
+  postes: { id: number[]; internal_id: string[]; ligne: number[] };
+}
+
+export interface CoverageFilters {
+  status?: 'missing' | 'all';
+  ligne?: number;
+  poste?: number;
+  boat?: number;
+  sens?: 'D' | 'G';
+  upcoming?: number; // only variantes planned in the next N hours
+}
+
+export interface CoverageReport {
+  summary: { postes: number; variantes: number; combinations: number; covered: number; missing: number };
+  // Columnar cells; sheet only with status=all (null when uncovered)
+  cells: {
+    poste: number[];
+    poste_internal_id: string[];
+    ligne: number[];
+    variante: number[];
+    variante_internal_id: string[];
+    ligne_sens: ('D' | 'G')[];
+    sheet?: (number | null)[];
+  };
+}
+
+export interface LigneLoadFilters {
+  from?: string; // YYYY-MM-DD
+  to?: string;
+  bucket?: 'day' | 'week';
+  ligne?: number;
+}
+
+export interface LigneLoadReport {
+  bucket: 'day' | 'week';
+  from: string;
+  to: string;
+  lignes: { id: number[]; internal_id: string[]; name: string[] };
+  // Columnar, one entry per ligne and bucket with cabines; wip by day, wip_max/wip_avg by week
+  loads: {
+    ligne: number[];
+    start: string[];
+    entries: number[];
+    exits: number[];
+    wip?: number[];
+    wip_max?: number[];
+    wip_avg?: number[];
+  };
+}
+
+export interface DeviationFilters {
+  group?: 'ligne' | 'gamme';
+  ligne?: number;
+  boat?: number;
+  from?: string; // YYYY-MM-DD, scheduled dates
+  to?: string;
+}
+
+export interface DeviationReport {
+  group: 'ligne' | 'gamme';
+  percentiles: number[];
+  // <metric>_<stat>: metrics entry_delay, exit_delay (calendar days, positive when late), lead_time,
+  // scheduled_lead_time, lead_deviation (working days); stats mean, min, max, p<percentile>, late (delays)
+  summary: { lines: number } & Record<string, number>;
+  // Columnar, one entry per ligne (internal_id, name) or gamme (internal_id, boat)
+  groups: { id: number[]; internal_id: string[]; lines: number[] } & Record<string, (number | string)[]>;
+  histogram: { delay: number[]; entry: number[]; exit: number[] };
+}
+
 export interface SheetFilters {
   boat?: number;
   gamme_cabine?: number;
@@ -141,3 +376,17 @@ export interface SheetFilters {
   poste?: number;
   ligne_sens?: 'D' | 'G' | '-';
 }
+
+// Page editing WebSocket messages (see backend production/collab.py)
+export interface PageEditDiff {
+  upsert?: Partial<InteractiveElementSyncItem>[]; // type is required for new elements
+  delete?: string[]; // business ids
+}
+
+export type PageEditServerMessage =
+  | { type: 'welcome'; connection: string; page: number }
+  | { type: 'ack'; id: number; created: number; updated: number; unchanged: number; deleted: number }
+  | { type: 'error'; id: number | null; error: unknown }
+  | { type: 'diff'; origin: string; user: string; elements: InteractiveElement[]; deleted: string[] }
+  | { type: 'joined' | 'left'; connection: string; user: string }
+  | { type: 'pong' };